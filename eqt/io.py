@@ -1,8 +1,65 @@
+import hashlib
+import importlib
+import json
+import mmap
 import os
+import shutil
+import socket
+import struct
+import sys
+import threading
 import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional, Union
 
+#: Size of the blocks that file members are read, compressed and written in.
+BLOCK_SIZE = 16 * 1024 * 1024
+#: Maximum size of the file data read ahead of the archive being written when compressing with
+#: several workers. The compressed data of those blocks is held in memory as well.
+MAX_PENDING_BYTES = 64 * 1024 * 1024
+#: Name of the archive member recording the size, modification time and hash of each file.
+MANIFEST_NAME = '.eqt-manifest.json'
+#: Extensions of files whose contents are already compressed, which are stored as they are.
+PRECOMPRESSED_EXTENSIONS = frozenset({
+    '.nxs', '.h5', '.hdf5', '.hdf', '.npz', '.png', '.jpg', '.jpeg', '.gif', '.webp', '.zip',
+    '.gz', '.bz2', '.xz', '.zst', '.7z'})
+#: Name of the file indexing the session archives in a sessions directory.
+SESSION_INDEX_NAME = '.eqt-sessions.json'
+#: Prefix of the journals which sessions are autosaved to in a sessions directory. Each running
+#: application writes its own journal, named by `autosave_journal_name`.
+AUTOSAVE_JOURNAL_PREFIX = '.eqt-autosave-'
+#: Suffix of the temporary files written by `write_file_atomically` & `zip_directory` before
+#: they replace their target. Those left behind by a process which is no longer running are
+#: removed by the next write to the same target.
+ATOMIC_WRITE_SUFFIX = '.eqt-tmp'
+#: Compression methods by name, e.g. for presenting them to the user.
+COMPRESSION_TYPES = {
+    'Deflate': zipfile.ZIP_DEFLATED, 'BZIP2': zipfile.ZIP_BZIP2, 'LZMA': zipfile.ZIP_LZMA}
 
-def zip_directory(directory: str, compress: bool = True):
+# the fixed-size part of the local file header of an archive member, as per the zip
+# specification, which `zipfile` does not expose publicly
+_LOCAL_FILE_HEADER = struct.Struct('<4s5H3L2H')
+_LOCAL_FILE_HEADER_SIGNATURE = b'PK\x03\x04'
+# general purpose flags of an archive member: sizes & CRC follow the data, and (for LZMA)
+# the end of the data is marked in the stream
+_DATA_DESCRIPTOR_FLAG = 0x08
+_LZMA_EOS_FLAG = 0x02
+# Windows API constants used by `is_process_running`
+_PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+_ERROR_ACCESS_DENIED = 5
+_STILL_ACTIVE = 259
+# module needed by each compression method
+_COMPRESSION_MODULES = {
+    zipfile.ZIP_STORED: None, zipfile.ZIP_DEFLATED: 'zlib', zipfile.ZIP_BZIP2: 'bz2',
+    zipfile.ZIP_LZMA: 'lzma'}
+
+
+def zip_directory(directory: str, compress: Union[bool, int] = True, workers: Optional[int] = 1,
+                  manifest: bool = False, base_archive: Optional[str] = None,
+                  compresslevel: Optional[int] = None, progress_callback=None, cancel_event=None):
     """
     Zips a directory, optionally compressing it.
 
@@ -11,12 +68,770 @@ def zip_directory(directory: str, compress: bool = True):
     directory
         The directory to be zipped.
     compress
-        Whether to compress the directory.
-    """
-    compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
-    with zipfile.ZipFile(f'{directory}.zip', 'a') as zipper:
-        for r, _, f in os.walk(directory):
-            for _file in f:
-                filepath = os.path.join(r, _file)
-                arcname = os.path.relpath(filepath, directory)
-                zipper.write(filepath, arcname, compress_type=compress_type)
+        Whether to compress the directory, or the compression method to use: one of
+        `zipfile.ZIP_STORED`, `zipfile.ZIP_DEFLATED` (used if `True`), `zipfile.ZIP_BZIP2` or
+        `zipfile.ZIP_LZMA`. Files with an extension in `PRECOMPRESSED_EXTENSIONS` are always
+        stored uncompressed, as compressing them again costs time but saves little space.
+    workers
+        The number of threads used to compress the files. If `None`, the number of CPUs is used.
+        With more than one worker, each file to be deflated is split into blocks which are
+        compressed concurrently and then written into the archive in order. The result is a
+        standard zip archive, readable by e.g. `shutil.unpack_archive`. BZIP2 and LZMA streams
+        cannot be split, so those files are compressed one at a time. The blocks read ahead
+        are limited to `MAX_PENDING_BYTES` in total, whatever the number of workers.
+    manifest
+        Whether to store a manifest of the size, modification time, SHA-256 hash and
+        compression level of each file in the archive, so that the archive can later be used
+        as a `base_archive`.
+    base_archive
+        A previous archive of the directory, saved with a manifest. Files which have not
+        changed since then are copied from it as they are, so that only new and modified files
+        are read and compressed. A file whose size and modification time match the manifest
+        is not read at all. Files compressed with a different method or level are written
+        again. Defaults to the existing archive `f'{directory}.zip'`, if any.
+    compresslevel
+        The compression level: 1 (fastest) to 9 (smallest) for DEFLATE and BZIP2.
+        If `None`, the default level of the method is used. It is ignored by LZMA.
+    progress_callback
+        An object with an `emit` method, such as the `progress_callback` signal passed to the
+        function of a `eqt.threading.Worker`. The files are read and written in chunks of
+        `BLOCK_SIZE` bytes. After each chunk, the percentage of the total size of the files
+        processed so far is emitted, whenever it changes.
+    cancel_event
+        An object with an `is_set` method, such as a `threading.Event`, which is checked
+        between chunks. Once it is set, `concurrent.futures.CancelledError` is raised.
+
+    The archive is written to a temporary file, which then atomically replaces
+    `f'{directory}.zip'`. The archive contains exactly one member per file in the directory,
+    and an interrupted save leaves any previous archive untouched.
+    """
+    if isinstance(compress, bool):
+        compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    else:
+        compress_type = compress
+    _check_compress_type(compress_type)
+    members = []
+    for r, _, f in os.walk(directory):
+        for _file in f:
+            filepath = os.path.join(r, _file)
+            arcname = os.path.relpath(filepath, directory).replace(os.sep, '/')
+            if arcname != MANIFEST_NAME:
+                members.append((filepath, arcname, member_compress_type(arcname, compress_type)))
+    progress = _Progress(sum(os.path.getsize(member[0]) for member in members), progress_callback,
+                         cancel_event)
+
+    archive = f'{directory}.zip'
+    if base_archive is None:
+        base_archive = archive
+    with _atomic_write(archive) as tmp:
+        with _open_base_archive(base_archive) as base, zipfile.ZipFile(tmp, 'w') as zipper:
+            base_manifest = {} if base is None else read_manifest(base)
+            entries, changed = {}, []
+            for member in members:
+                entry = _unchanged_entry(base, base_manifest, *member, compresslevel, progress)
+                if entry is None:
+                    changed.append(member)
+                else:
+                    _copy_member(zipper, base, base.getinfo(member[1]), progress)
+                    entries[member[1]] = entry
+            entries.update(
+                _write_members(zipper, changed, compresslevel, workers, manifest, progress))
+            if manifest:
+                _write_manifest(zipper, entries)
+
+
+def member_compress_type(arcname: str, compress_type: int) -> int:
+    """
+    Returns the compression method to use for an archive member, given the method
+    `compress_type` chosen for the archive: `zipfile.ZIP_STORED` if the member is already
+    compressed, as per `PRECOMPRESSED_EXTENSIONS`, otherwise `compress_type`.
+    """
+    if os.path.splitext(arcname)[1].lower() in PRECOMPRESSED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+    return compress_type
+
+
+def unzip_directory(archive: str, directory: str, members: Optional[list] = None):
+    """
+    Extracts an archive created by `zip_directory` into a directory.
+
+    The modification times recorded in the manifest, if any, are restored, so that saving the
+    directory again with the archive as `base_archive` does not need to hash unchanged files.
+
+    Parameters
+    ----------
+    archive
+        The archive to be extracted.
+    directory
+        The directory to extract the archive into.
+    members
+        The names of the archive members to extract. If `None`, all members are extracted.
+    """
+    with zipfile.ZipFile(archive) as zipper:
+        manifest = read_manifest(zipper)
+        infos = zipper.infolist() if members is None else map(zipper.getinfo, members)
+        for info in infos:
+            if info.filename != MANIFEST_NAME:
+                extract_member(zipper, info, directory, manifest)
+
+
+def extract_member(zipper: zipfile.ZipFile, member, directory: str,
+                   manifest: Optional[dict] = None) -> str:
+    """
+    Extracts a member of an open archive created by `zip_directory` into a directory,
+    restoring its modification time recorded in the manifest, if any.
+
+    To extract many members one at a time, e.g. on demand, open the archive and read its
+    manifest once, rather than calling `unzip_directory` for each member.
+
+    Parameters
+    ----------
+    zipper
+        The archive, opened for reading.
+    member
+        The name or `zipfile.ZipInfo` of the member.
+    directory
+        The directory to extract the member into.
+    manifest
+        The manifest of the archive, as returned by `read_manifest`. If `None`, it is read
+        from the archive.
+
+    Returns
+    -------
+    str
+        The path of the extracted file.
+    """
+    info = member if isinstance(member, zipfile.ZipInfo) else zipper.getinfo(member)
+    if manifest is None:
+        manifest = read_manifest(zipper)
+    path = zipper.extract(info, directory)
+    entry = manifest.get(info.filename)
+    if entry is not None and entry['size'] == info.file_size:
+        os.utime(path, ns=(entry['mtime_ns'], entry['mtime_ns']))
+    return path
+
+
+def read_manifest(zipper: zipfile.ZipFile) -> dict:
+    """
+    Returns the manifest stored in an open archive by `zip_directory`, or an empty dictionary
+    if there is none.
+
+    Returns
+    -------
+    dict
+        Format: {arcname: {'size': int, 'mtime_ns': int, 'sha256': str}}.
+    """
+    try:
+        return json.loads(zipper.read(MANIFEST_NAME))
+    except KeyError:
+        return {}
+
+
+def map_member(archive: str, arcname: str) -> memoryview:
+    """
+    Returns a read-only view of the contents of an uncompressed archive member, memory-mapped
+    from the archive file without extracting or copying it.
+
+    The archive file stays mapped until the view and any views derived from it, e.g. NumPy
+    arrays created with `numpy.frombuffer`, are released.
+
+    Parameters
+    ----------
+    archive
+        The archive containing the member, e.g. created by `zip_directory` with `compress=False`.
+    arcname
+        The name of the member.
+
+    Raises
+    ------
+    ValueError
+        If the member is compressed or encrypted.
+    """
+    with open(archive, 'rb') as fd:
+        with zipfile.ZipFile(fd) as zipper:
+            info = zipper.getinfo(arcname)
+        if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+            raise ValueError(f'{arcname} is not stored uncompressed in {archive}')
+        if info.file_size == 0:
+            return memoryview(b'')
+        offset = _seek_member_data(fd, info)
+        # mappings must start at a multiple of the allocation granularity
+        start = offset - offset % mmap.ALLOCATIONGRANULARITY
+        mapped = mmap.mmap(fd.fileno(), offset - start + info.file_size, access=mmap.ACCESS_READ,
+                           offset=start)
+    return memoryview(mapped)[offset - start:]
+
+
+def index_sessions(directory: str) -> dict:
+    """
+    Returns the index of the session archives in a directory, and stores it in the directory
+    as `SESSION_INDEX_NAME`.
+
+    Only the top level of the directory is scanned, so extracted session folders are never
+    walked. The entries of archives whose size and modification time have not changed since
+    the index was stored are reused.
+
+    Parameters
+    ----------
+    directory
+        The directory containing the session archives.
+
+    Returns
+    -------
+    dict
+        Format: {archive: {'name': str | None, 'timestamp': str | None, 'size': int,
+        'mtime_ns': int}}, where `archive` is the filename of the archive in the directory.
+        `name` and `timestamp` are parsed from filenames of the form `<name>_<timestamp>.zip`,
+        and are `None` for other archives.
+    """
+    index_path = os.path.join(directory, SESSION_INDEX_NAME)
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+
+    sessions = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.endswith('.zip') or not entry.is_file():
+                continue
+            stat = entry.stat()
+            session = index.get(entry.name)
+            if (session is None or session['size'] != stat.st_size
+                    or session['mtime_ns'] != stat.st_mtime_ns):
+                name, sep, timestamp = entry.name[:-len('.zip')].rpartition('_')
+                session = {
+                    'name': name if sep else None, 'timestamp': timestamp if sep else None,
+                    'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+            sessions[entry.name] = session
+
+    if sessions != index:
+        try:
+            write_file_atomically(index_path, json.dumps(sessions).encode())
+        except OSError:
+            pass   # the directory may be read-only, so the index is rebuilt next time
+    return sessions
+
+
+def move_directory(source: str, destination: str, workers: Optional[int] = None,
+                   progress_callback=None, cancel_event=None) -> str:
+    """
+    Moves a directory, like `shutil.move`.
+
+    If the destination is on the same filesystem, the directory is simply renamed. Otherwise,
+    e.g. when moving from local scratch space to a network share, `shutil.move` would copy the
+    files one at a time with no way of knowing how long it will take. Instead, the files are
+    copied concurrently in chunks, reporting the progress, before the source is removed.
+
+    Parameters
+    ----------
+    source
+        The directory to be moved.
+    destination
+        The new path of the directory. If it is an existing directory, the source is moved
+        into it.
+    workers
+        The number of threads used to copy files across filesystems. If `None`, the default
+        of `concurrent.futures.ThreadPoolExecutor` is used.
+    progress_callback
+        An object with an `emit` method, which is passed the percentage of the total size of the
+        files copied so far whenever it changes. It is not used if the directory is renamed.
+    cancel_event
+        An object with an `is_set` method, which is checked between chunks. Once it is set,
+        the files copied so far are removed and `concurrent.futures.CancelledError` is raised,
+        leaving the source untouched.
+
+    Returns
+    -------
+    str
+        The new path of the directory.
+    """
+    if os.path.isdir(destination):
+        destination = os.path.join(destination, os.path.basename(os.path.normpath(source)))
+    if is_same_filesystem(source, os.path.dirname(os.path.abspath(destination))):
+        return shutil.move(source, destination)
+
+    files, total = [], 0
+    os.mkdir(destination)
+    try:
+        for r, d, f in os.walk(source):
+            target = os.path.join(destination, os.path.relpath(r, source))
+            for name in d + f:
+                path = os.path.join(r, name)
+                if os.path.islink(path):
+                    os.symlink(os.readlink(path), os.path.join(target, name))
+                elif name in d:
+                    os.mkdir(os.path.join(target, name))
+                else:
+                    files.append((path, os.path.join(target, name)))
+                    total += os.path.getsize(path)
+        progress = _Progress(total, progress_callback, cancel_event)
+        with ThreadPoolExecutor(workers) as pool:
+            for future in [pool.submit(_copy_file, *paths, progress) for paths in files]:
+                future.result()
+        for r, d, _ in os.walk(source):
+            for name in d:
+                if not os.path.islink(os.path.join(r, name)):
+                    shutil.copystat(os.path.join(r, name),
+                                    os.path.join(destination, os.path.relpath(r, source), name))
+        shutil.copystat(source, destination)
+    except BaseException:
+        shutil.rmtree(destination, ignore_errors=True)
+        raise
+    shutil.rmtree(source)
+    return destination
+
+
+def autosave_journal_name(host: Optional[str] = None, pid: Optional[int] = None) -> str:
+    """
+    Returns the name of the autosave journal of a process, so that applications sharing a
+    sessions directory, possibly from different hosts, never overwrite each other's journal.
+
+    Parameters
+    ----------
+    host
+        The name of the host the process runs on. Defaults to the current host.
+    pid
+        The process ID. Defaults to the current process.
+    """
+    if host is None:
+        host = socket.gethostname()
+    if pid is None:
+        pid = os.getpid()
+    return f'{AUTOSAVE_JOURNAL_PREFIX}{host}-{pid}.json'
+
+
+def is_process_running(pid: int) -> bool:
+    """Returns whether a process of the current host is running."""
+    if pid == os.getpid():
+        return True
+    if sys.platform == 'win32':
+        # `os.kill` would terminate the process on Windows
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(_PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return kernel32.GetLastError() == _ERROR_ACCESS_DENIED
+        try:
+            exit_code = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+            return exit_code.value == _STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # the process exists, but belongs to another user
+        return True
+    return True
+
+
+def is_in_directory(path: str, directory: str) -> bool:
+    """Returns whether a path is inside a directory, after resolving symbolic links."""
+    path, directory = os.path.realpath(path), os.path.realpath(directory)
+    try:
+        return path != directory and os.path.commonpath([path, directory]) == directory
+    except ValueError:
+        # e.g. on different drives on Windows
+        return False
+
+
+def is_same_filesystem(path: str, other_path: str) -> bool:
+    """Returns whether two existing paths are on the same filesystem (device)."""
+    return os.stat(path).st_dev == os.stat(other_path).st_dev
+
+
+def write_file_atomically(path: str, data: bytes):
+    """
+    Writes a file so that it is never left partially written, e.g. if the application crashes:
+    the data is written to a temporary file, synced to disk, and then replaces the file.
+
+    Parameters
+    ----------
+    path
+        The file to be written.
+    data
+        The contents of the file.
+    """
+    with _atomic_write(path) as tmp:
+        tmp.write(data)
+
+
+@contextmanager
+def _atomic_write(path):
+    """
+    Yields a temporary file in the directory of `path`, which replaces `path` once it has been
+    written and synced to disk. The temporary file is removed if an exception is raised.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    _remove_stale_temporary_files(directory, name)
+    host, pid = socket.gethostname(), os.getpid()
+    while True:
+        tmpname = os.path.join(directory,
+                               f'.{name}.{host}.{pid}.{os.urandom(4).hex()}{ATOMIC_WRITE_SUFFIX}')
+        try:
+            # created with the permissions of a new file, as restricted by the umask
+            fd = os.open(tmpname,
+                         os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+        except FileExistsError:
+            continue
+        break
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            yield tmp
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        # the permissions of the file it replaces are kept
+        try:
+            os.chmod(tmpname, os.stat(path).st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+        os.replace(tmpname, path)
+    except BaseException:
+        os.remove(tmpname)
+        raise
+
+
+def _remove_stale_temporary_files(directory, name):
+    """
+    Removes the temporary files written by `_atomic_write` to replace `name` in `directory` by
+    processes of the current host which are no longer running.
+    """
+    prefix, host = f'.{name}.', socket.gethostname()
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not (entry.name.startswith(prefix) and entry.name.endswith(ATOMIC_WRITE_SUFFIX)):
+                continue
+            # the name of the host may contain dots, but the process ID & random part do not
+            owner = entry.name[len(prefix):-len(ATOMIC_WRITE_SUFFIX)].rsplit('.', 2)
+            if (len(owner) == 3 and owner[0] == host and owner[1].isdigit()
+                    and not is_process_running(int(owner[1]))):
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+
+def _check_compress_type(compress_type):
+    """
+    Raises `NotImplementedError` if the compression method is not supported by `zipfile`, or
+    `RuntimeError` if the module it needs is not available.
+    """
+    try:
+        module = _COMPRESSION_MODULES[compress_type]
+    except KeyError:
+        raise NotImplementedError(f'Unsupported compression method {compress_type}') from None
+    if module is not None:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            raise RuntimeError(f'Compression requires the (missing) {module} module') from None
+
+
+@contextmanager
+def _open_base_archive(path):
+    """Yields the archive at `path` opened for reading, or `None` if it is not a valid archive."""
+    try:
+        base = zipfile.ZipFile(path)
+    except (OSError, zipfile.BadZipFile):
+        yield None
+        return
+    with base:
+        yield base
+
+
+class _Progress:
+    """
+    Tracks the number of bytes processed out of `total`, emitting the percentage through
+    `callback`, and raises `CancelledError` once `cancel_event` is set. It may be advanced from
+    several threads.
+    """
+    def __init__(self, total, callback=None, cancel_event=None):
+        self.total = total
+        self.done = 0
+        self.percentage = None
+        self.callback = callback
+        self.cancel_event = cancel_event
+        self.lock = threading.Lock()
+
+    def advance(self, nbytes):
+        """Adds `nbytes` to the bytes processed, after checking whether to cancel."""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise CancelledError('Cancelled')
+        with self.lock:
+            self.done += nbytes
+            percentage = 100 * self.done // self.total if self.total else 100
+            if percentage == self.percentage:
+                return
+            self.percentage = percentage
+        if self.callback is not None:
+            self.callback.emit(percentage)
+
+
+def _copy_file(source, destination, progress):
+    """Copies a file in chunks of `BLOCK_SIZE` bytes, with its permissions and times."""
+    with open(source, 'rb') as fsrc, open(destination, 'wb') as fdst:
+        while True:
+            data = fsrc.read(BLOCK_SIZE)
+            if not data:
+                break
+            fdst.write(data)
+            progress.advance(len(data))
+    shutil.copystat(source, destination)
+
+
+def _hash_file(filepath, progress):
+    """Returns the SHA-256 hex digest of the contents of a file."""
+    digest = hashlib.sha256()
+    for data, _ in _iter_file_blocks(filepath):
+        progress.advance(0)
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def _write_manifest(zipper, entries):
+    zipper.writestr(MANIFEST_NAME, json.dumps(entries), compress_type=zipfile.ZIP_DEFLATED)
+
+
+def _unchanged_entry(base, base_manifest, filepath, arcname, compress_type, compresslevel,
+                     progress):
+    """
+    Returns the manifest entry of a file if it can be copied from the `base` archive as it is,
+    or `None` if it has to be written again.
+    """
+    entry = base_manifest.get(arcname)
+    if entry is None or arcname not in base.NameToInfo:
+        return None
+    stat = os.stat(filepath)
+    if stat.st_size != entry['size'] or base.getinfo(arcname).compress_type != compress_type:
+        return None
+    if _member_compresslevel(compress_type, compresslevel) != entry.get('compresslevel'):
+        return None
+    if stat.st_mtime_ns != entry['mtime_ns']:
+        if _hash_file(filepath, progress) != entry['sha256']:
+            return None
+        entry = dict(entry, mtime_ns=stat.st_mtime_ns)
+    return entry
+
+
+def _write_members(zipper, members, compresslevel, workers, manifest, progress):
+    """
+    Compresses and writes the files `members`, a list of `(filepath, arcname, compress_type)`,
+    to `zipper`.
+
+    Returns
+    -------
+    dict
+        The manifest entries of the members, if `manifest` is true, otherwise empty.
+    """
+    if workers == 1:
+        blocks = _iter_compressed_blocks(members, compresslevel)
+        return _write_member_blocks(zipper, members, blocks, compresslevel, manifest, progress)
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(workers) as pool:
+        blocks = _iter_parallel_compressed_blocks(pool, members, compresslevel, MAX_PENDING_BYTES)
+        return _write_member_blocks(zipper, members, blocks, compresslevel, manifest, progress)
+
+
+def _write_member_blocks(zipper, members, blocks, compresslevel, manifest, progress):
+    """Writes `members`, taking their compressed data from `blocks`."""
+    entries = {}
+    for filepath, arcname, compress_type in members:
+        stat = os.stat(filepath)
+        zinfo = zipfile.ZipInfo.from_file(filepath, arcname)
+        zinfo.compress_type = compress_type
+        digest = hashlib.sha256() if manifest else None
+        _write_member(zipper, zinfo, blocks, digest, progress)
+        if manifest:
+            entries[zinfo.filename] = {
+                'size': zinfo.file_size, 'mtime_ns': stat.st_mtime_ns,
+                'sha256': digest.hexdigest(),
+                'compresslevel': _member_compresslevel(compress_type, compresslevel)}
+    return entries
+
+
+def _member_compresslevel(compress_type, compresslevel):
+    """Returns the compression level which applies to a member, or `None` if it has no effect."""
+    if compress_type in (zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2):
+        return compresslevel
+    return None
+
+
+def _iter_file_blocks(filepath):
+    """Yields `(data, is_last_block)` for each `BLOCK_SIZE` block of the file."""
+    with open(filepath, 'rb') as src:
+        data = src.read(BLOCK_SIZE)
+        while True:
+            next_data = src.read(BLOCK_SIZE)
+            yield data, not next_data
+            if not next_data:
+                return
+            data = next_data
+
+
+def _iter_member_blocks(filepath, compress_type, compresslevel):
+    """
+    Yields `(data, compressed_data, is_last_block)` for each block of a file,
+    using a single compressor.
+    """
+    compressor = zipfile._get_compressor(compress_type, compresslevel)
+    for data, is_last_block in _iter_file_blocks(filepath):
+        if compressor is None:
+            yield data, data, is_last_block
+            continue
+        compressed_data = compressor.compress(data)
+        if is_last_block:
+            compressed_data += compressor.flush()
+        yield data, compressed_data, is_last_block
+
+
+def _iter_compressed_blocks(members, compresslevel):
+    """Yields `(data, compressed_data, is_last_block)` for each block of each member, in order."""
+    for filepath, _, compress_type in members:
+        yield from _iter_member_blocks(filepath, compress_type, compresslevel)
+
+
+def _deflate_block(data, is_last_block, compresslevel=None):
+    """
+    Compresses a block into a raw deflate stream. The stream of a block which is not the last
+    one is byte-aligned and not final, so the blocks of a file can simply be concatenated.
+    """
+    if compresslevel is None:
+        compresslevel = zlib.Z_DEFAULT_COMPRESSION
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -15)
+    flush_mode = zlib.Z_FINISH if is_last_block else zlib.Z_FULL_FLUSH
+    return compressor.compress(data) + compressor.flush(flush_mode)
+
+
+def _iter_parallel_compressed_blocks(pool, members, compresslevel, max_pending_bytes):
+    """
+    Yields `(data, compressed_data, is_last_block)` for each block of each member, in order.
+    The blocks of deflated members are compressed on `pool`, holding at most
+    `max_pending_bytes` of data read ahead, or a single block if it is larger. Other members
+    are compressed as they are read.
+    """
+    pending, pending_bytes = deque(), 0
+    for filepath, _, compress_type in members:
+        if compress_type == zipfile.ZIP_DEFLATED:
+            blocks = ((data, pool.submit(_deflate_block, data, is_last_block,
+                                         compresslevel), is_last_block)
+                      for data, is_last_block in _iter_file_blocks(filepath))
+        else:
+            blocks = ((data, _completed(compressed_data), is_last_block)
+                      for data, compressed_data, is_last_block in _iter_member_blocks(
+                          filepath, compress_type, compresslevel))
+        for block in blocks:
+            pending.append(block)
+            pending_bytes += len(block[0])
+            # leaves room for the next block to be read
+            while pending and pending_bytes + BLOCK_SIZE > max_pending_bytes:
+                data, future, is_last_block = pending.popleft()
+                pending_bytes -= len(data)
+                yield data, future.result(), is_last_block
+    while pending:
+        data, future, is_last_block = pending.popleft()
+        yield data, future.result(), is_last_block
+
+
+def _completed(result):
+    """Returns a future which is already done with the given result."""
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def _seek_member_data(fp, info):
+    """
+    Seeks the archive file `fp` to the data of the member `info`, and returns its offset.
+
+    The central directory gives the offset of the local file header, which is followed by the
+    file name and extra field, whose lengths can differ from those in the central directory.
+    """
+    fp.seek(info.header_offset)
+    header = _LOCAL_FILE_HEADER.unpack(fp.read(_LOCAL_FILE_HEADER.size))
+    if header[0] != _LOCAL_FILE_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile(f'Bad magic number for file header of {info.filename}')
+    # the last two fields are the lengths of the file name and extra field
+    return fp.seek(header[-2] + header[-1], os.SEEK_CUR)
+
+
+# `zipfile` has no public API to write precompressed data, so the local file headers of such
+# members are written directly.
+
+
+def _begin_member(zipper, zinfo, zip64):
+    zinfo.header_offset = zipper.fp.tell()
+    zipper._writecheck(zinfo)
+    zipper._didModify = True
+    zipper.fp.write(zinfo.FileHeader(zip64))
+
+
+def _end_member(zipper, zinfo):
+    zipper.start_dir = zipper.fp.tell()
+    zipper.filelist.append(zinfo)
+    zipper.NameToInfo[zinfo.filename] = zinfo
+
+
+def _write_member(zipper, zinfo, blocks, digest=None, progress=None):
+    """
+    Writes the member `zinfo` to `zipper`, taking the already compressed blocks from `blocks`
+    up to and including the last block of the member. The local file header is patched with
+    the CRC and compressed size once they are known. The uncompressed data is also fed to
+    `digest` and its size to `progress`, if given.
+    """
+    fp = zipper.fp
+    zip64 = zinfo.file_size * 1.05 > zipfile.ZIP64_LIMIT
+    zinfo.CRC = zinfo.compress_size = 0
+    if zinfo.compress_type == zipfile.ZIP_LZMA:
+        # as set by `zipfile`, since the LZMA stream ends with an end marker
+        zinfo.flag_bits |= _LZMA_EOS_FLAG
+    _begin_member(zipper, zinfo, zip64)
+
+    crc, file_size, compress_size = 0, 0, 0
+    for data, compressed_data, is_last_block in blocks:
+        crc = zlib.crc32(data, crc)
+        if digest is not None:
+            digest.update(data)
+        file_size += len(data)
+        compress_size += len(compressed_data)
+        fp.write(compressed_data)
+        if progress is not None:
+            progress.advance(len(data))
+        if is_last_block:
+            break
+    zinfo.CRC, zinfo.file_size, zinfo.compress_size = crc, file_size, compress_size
+
+    end = fp.tell()
+    fp.seek(zinfo.header_offset)
+    fp.write(zinfo.FileHeader(zip64))
+    fp.seek(end)
+    _end_member(zipper, zinfo)
+
+
+def _copy_member(zipper, base, info, progress):
+    """Copies the member `info` of the archive `base` to `zipper`, without recompressing it."""
+    _seek_member_data(base.fp, info)
+
+    zinfo = zipfile.ZipInfo(info.filename, info.date_time)
+    zinfo.compress_type = info.compress_type
+    # the sizes & CRC are written in the local file header instead of a data descriptor
+    zinfo.flag_bits = info.flag_bits & ~_DATA_DESCRIPTOR_FLAG
+    zinfo.create_system = info.create_system
+    zinfo.external_attr = info.external_attr
+    zinfo.CRC = info.CRC
+    zinfo.file_size = info.file_size
+    zinfo.compress_size = info.compress_size
+    _begin_member(zipper, zinfo, max(zinfo.file_size, zinfo.compress_size) > zipfile.ZIP64_LIMIT)
+    remaining = info.compress_size
+    while remaining:
+        data = base.fp.read(min(remaining, BLOCK_SIZE))
+        if not data:
+            raise zipfile.BadZipFile(f'Truncated member {info.filename} in {base.filename}')
+        zipper.fp.write(data)
+        remaining -= len(data)
+        progress.advance(0)
+    progress.advance(info.file_size)
+    _end_member(zipper, zinfo)
@@ -0,0 +1,208 @@
+import threading
+import traceback
+from concurrent.futures import CancelledError, Future
+from functools import partial
+
+from qtpy import QtCore
+
+from .QtThreading import Worker, get_threadpool, submit
+
+
+class BatchMap(QtCore.QObject):
+    """
+    Calls a function on each item of an iterable on a thread pool, like the builtin `map`.
+
+    The items are split into chunks, and each chunk is run by a single `Worker`, so that many
+    small jobs (e.g. preprocessing each projection of a dataset) do not each pay for a Worker,
+    its signals and a slot in the thread pool queue. For example::
+
+        batch = BatchMap(preprocess, projections, threadpool=self.threadpool)
+        batch.progress.connect(self.progress_bar.setValue)
+        batch.resultsReady.connect(self.showPreprocessed)
+        batch.start().add_done_callback(...)
+
+    The results are returned in the order of the items, either in bulk, through `future`, or
+    as a stream: through the `resultsReady` signal, or by iterating over `iterResults` in
+    another thread.
+
+    If the function raises an exception, the remaining chunks are cancelled.
+
+    Signals
+    -------
+    progress
+        `int` percentage of the items done.
+    resultsReady
+        `int` index of the first item, and `list` of the results of consecutive items starting
+        there. Emitted in order, as soon as all the preceding results are ready.
+    error
+        `tuple` (exctype, value, formatted traceback) of the first exception raised by the
+        function.
+    finished
+        No Data. Emitted once no more chunks will run.
+
+    Attributes
+    ----------
+    future : concurrent.futures.Future
+        The `list` of results, the exception raised by the function, or
+        `concurrent.futures.CancelledError` if the map was cancelled.
+    """
+    progress = QtCore.Signal(int)
+    resultsReady = QtCore.Signal(int, list)
+    error = QtCore.Signal(tuple)
+    finished = QtCore.Signal()
+
+    def __init__(self, fn, iterable, chunksize=None, threadpool=None, priority=0, parent=None):
+        '''
+        :param fn: The function to call on each item. It is called with the item only.
+        :param iterable: The items.
+        :param chunksize: The number of items per chunk. Defaults to splitting the items into
+            about 4 chunks per thread of the thread pool.
+        :param threadpool: The QThreadPool to run the chunks on, or the name of a thread pool
+            returned by `get_threadpool`. Defaults to the global instance.
+        :param priority: The priority of the chunks in the queue of the thread pool.
+        :param parent: The parent QObject.
+        '''
+        super(BatchMap, self).__init__(parent)
+        if threadpool is None or isinstance(threadpool, str):
+            threadpool = get_threadpool(threadpool)
+        self.fn = fn
+        self.items = list(iterable)
+        self.threadpool = threadpool
+        self.priority = priority
+        if chunksize is None:
+            chunksize = -(-len(self.items) // (4 * max(threadpool.maxThreadCount(), 1)))
+        if chunksize < 1 and self.items:
+            raise ValueError('chunksize must be at least 1')
+        self.chunksize = max(chunksize, 1)
+        self.workers = []
+        self.future = Future()
+        self._results = {}
+        self._next_chunk = 0
+        self._done = 0
+        self._running = 0
+        self._percentage = None
+        self._started = False
+        self._finished = False
+        self._lock = threading.RLock()
+        self._condition = threading.Condition(self._lock)
+
+    def start(self):
+        '''Starts running the chunks, and returns `future`.'''
+        with self._lock:
+            if self._started:
+                raise RuntimeError('BatchMap has already been started')
+            self._started = True
+            if not self.items:
+                self.future.set_result([])
+            elif not self.future.cancelled():
+                for index in range(0, len(self.items), self.chunksize):
+                    worker = Worker(self._runChunk, self.items[index:index + self.chunksize])
+                    worker.name = f'{getattr(self.fn, "__qualname__", repr(self.fn))}[{index}]'
+                    # owned by the BatchMap, so `cancel` can take them from the thread pool
+                    # whether or not they have run
+                    worker.setAutoDelete(False)
+                    worker.future.add_done_callback(partial(self._onChunkDone, index))
+                    self.workers.append(worker)
+                self._running = len(self.workers)
+        for worker in self.workers:
+            submit(worker, self.threadpool, self.priority)
+        self._finishIfDone()
+        return self.future
+
+    def cancel(self):
+        '''Cancels the chunks. The function is not called on the items not started yet.'''
+        with self._condition:
+            self.future.cancel()
+            for worker in self.workers:
+                if self.threadpool.tryTake(worker):
+                    worker.future.cancel()
+                else:
+                    worker.cancel()
+            self._condition.notify_all()
+
+    def iterResults(self, timeout=None):
+        '''
+        Yields the results in order, as soon as they are ready. This blocks, so it should not
+        be used in the GUI thread.
+
+        :param timeout: The maximum time in seconds to wait for each result.
+        :raises: The exception raised by the function, `concurrent.futures.CancelledError` if
+            the map was cancelled, or `TimeoutError`.
+        '''
+        index = 0
+        while index < len(self.items):
+            with self._condition:
+                if not self._condition.wait_for(partial(self._isReady, index), timeout):
+                    raise TimeoutError
+                results = self._results.get(index)
+            if results is None:
+                # raises the exception, or CancelledError
+                self.future.result()
+                raise CancelledError
+            yield from results
+            index += len(results)
+
+    def _isReady(self, index):
+        '''Returns whether the results of the chunk starting at an index are ready.'''
+        return index in self._results or self.future.done()
+
+    def _runChunk(self, chunk, cancel_token, **kwargs):
+        '''Calls the function on each item of a chunk, and returns the list of results.'''
+        results = []
+        for item in chunk:
+            if cancel_token.is_set():
+                raise CancelledError
+            results.append(self.fn(item))
+            self._onItemDone()
+        return results
+
+    def _onItemDone(self):
+        '''Emits the percentage of the items done, if it has changed.'''
+        with self._lock:
+            self._done += 1
+            percentage = 100 * self._done // len(self.items)
+            if percentage != self._percentage:
+                self._percentage = percentage
+                # emitted in the lock so that the percentage never decreases
+                self.progress.emit(percentage)
+
+    def _onChunkDone(self, index, future):
+        '''Stores the results of a chunk, and emits the results which are ready in order.'''
+        error = None
+        with self._condition:
+            self._running -= 1
+            if future.cancelled():
+                self.future.cancel()
+            else:
+                try:
+                    self._results[index] = future.result()
+                except CancelledError:
+                    self.future.cancel()
+                except BaseException as exc:              # NOQA: B036
+                    if not self.future.done():
+                        self.future.set_exception(exc)
+                        error = (type(exc), exc, ''.join(
+                            traceback.format_exception(type(exc), exc, exc.__traceback__)))
+
+            # emitted in the lock to keep them in order
+            while not self.future.done() and self._next_chunk in self._results:
+                start = self._next_chunk
+                results = self._results[start]
+                self._next_chunk += len(results)
+                self.resultsReady.emit(start, results)
+            if self._next_chunk >= len(self.items) and not self.future.done():
+                self.future.set_result([
+                    result for start in sorted(self._results) for result in self._results[start]])
+            self._condition.notify_all()
+        if error is not None:
+            self.error.emit(error)
+            self.cancel()
+        self._finishIfDone()
+
+    def _finishIfDone(self):
+        '''Emits finished once no chunk is running or left to run.'''
+        with self._lock:
+            if self._running or self._finished:
+                return
+            self._finished = True
+        self.finished.emit()
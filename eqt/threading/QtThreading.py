@@ -2,15 +2,177 @@
 Basic classes for Threading a Qt application
 Created on Wed Feb  6 11:10:36 2019
 """
+import asyncio
+import inspect
+import multiprocessing
+import queue
 import sys
+import threading
+import time
 
 # https://www.geeksforgeeks.org/migrate-pyqt5-app-to-pyside2
 import traceback
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List
 
 from qtpy import QtCore
 from qtpy.QtCore import Slot
 
 
+class CancellationToken:
+    """
+    Requests a function run by a `Worker` to stop. The function is passed the token as the
+    `cancel_token` keyword argument, if it accepts it, and should check it regularly, e.g.
+    between iterations.
+
+    It has the same `is_set` and `wait` methods as `threading.Event`, so it can be passed as
+    the `cancel_event` of e.g. `eqt.io.zip_directory`.
+
+    If the worker has a timeout (see `Worker.setTimeout`), the token is also set once its
+    `deadline`, a `time.monotonic` timestamp, has passed.
+    """
+    def __init__(self):
+        self._event = threading.Event()
+        self.deadline = None
+
+    def cancel(self):
+        """Requests cancellation. This may be called from any thread."""
+        self._event.set()
+
+    def is_set(self):
+        """Returns whether cancellation has been requested, or the deadline has passed."""
+        return self._event.is_set() or self.timed_out()
+
+    def is_cancelled(self):
+        """Returns whether cancellation has been requested."""
+        return self._event.is_set()
+
+    def timed_out(self):
+        """Returns whether the deadline has passed."""
+        deadline = self.deadline
+        return deadline is not None and time.monotonic() >= deadline
+
+    def wait(self, timeout=None):
+        """
+        Waits until cancellation is requested, the deadline passes, or `timeout` seconds have
+        passed. Returns whether the token is set, so it can be used instead of `time.sleep` in
+        a loop.
+        """
+        deadline = self.deadline
+        if deadline is not None:
+            remaining = max(deadline - time.monotonic(), 0)
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return self._event.wait(timeout) or self.timed_out()
+
+
+class ThrottledCallback:
+    """
+    Wraps a signal, emitting at most one value every `interval` seconds. The values emitted in
+    between are coalesced: only the latest is kept, and it is emitted once `interval` has passed
+    since the last value was emitted, by the next call to `emit`, by `flush` or else by a
+    single-shot timer. Calling `emit` more often therefore only costs a clock read, instead of
+    queuing a signal to the GUI thread each time.
+
+    The timer runs in the thread of the Qt application, as the threads of a `QThreadPool` have
+    no event loop, or in a `threading.Timer` if there is no application, e.g. in the process of
+    a `ProcessWorker`. The values are emitted in order.
+    """
+    def __init__(self, signal, interval):
+        self.signal = signal
+        self.interval = interval
+        self._last_emit = None
+        self._pending = None
+        self._timer_scheduled = False
+        self._lock = threading.Lock()
+
+    def emit(self, *args):
+        with self._lock:
+            now = time.monotonic()
+            if self._last_emit is None or now - self._last_emit >= self.interval:
+                self._last_emit = now
+                self._pending = None
+                self.signal.emit(*args)
+                return
+            self._pending = args
+            if self._timer_scheduled:
+                return
+            self._timer_scheduled = True
+            delay = self.interval - (now - self._last_emit)
+        _call_later(delay, self._onTimeout)
+
+    def flush(self):
+        """Emits the latest value which has not been emitted yet, if any."""
+        with self._lock:
+            if self._pending is not None:
+                args, self._pending = self._pending, None
+                self._last_emit = time.monotonic()
+                self.signal.emit(*args)
+
+    def _onTimeout(self):
+        with self._lock:
+            self._timer_scheduled = False
+        self.flush()
+
+
+class _TimerScheduler(QtCore.QObject):
+    """Starts single-shot timers in the thread it lives in, when asked from any thread."""
+    schedule = QtCore.Signal(int, object)
+
+    def __init__(self):
+        super().__init__()
+        self.schedule.connect(self._start)
+
+    @Slot(int, object)
+    def _start(self, msec, callback):
+        QtCore.QTimer.singleShot(msec, callback)
+
+
+_timer_scheduler = None
+_timer_scheduler_lock = threading.Lock()
+
+
+def _call_later(delay, callback):
+    """Calls `callback` in `delay` seconds, from the thread of the Qt application if any."""
+    global _timer_scheduler
+    app = QtCore.QCoreApplication.instance()
+    if app is None:
+        timer = threading.Timer(delay, callback)
+        timer.daemon = True
+        timer.start()
+        return
+    with _timer_scheduler_lock:
+        if _timer_scheduler is None:
+            _timer_scheduler = _TimerScheduler()
+            _timer_scheduler.moveToThread(app.thread())
+    _timer_scheduler.schedule.emit(max(round(delay * 1000), 0), callback)
+
+
+def _accepts_keyword(fn, name):
+    '''
+    Returns whether a function accepts the keyword argument `name`, so that it is only passed
+    to functions written to use it. Functions whose signature is unknown are assumed not to.
+    '''
+    try:
+        parameters = inspect.signature(fn).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(
+        parameter.kind == parameter.VAR_KEYWORD or (parameter.name == name and parameter.kind in (
+            parameter.POSITIONAL_OR_KEYWORD, parameter.KEYWORD_ONLY)) for parameter in parameters)
+
+
+class _DeadlineCallback:
+    """Raises `TimeoutError` when a value is emitted after the deadline of a token."""
+    def __init__(self, callback, cancel_token):
+        self.callback = callback
+        self.cancel_token = cancel_token
+
+    def emit(self, *args):
+        if self.cancel_token.timed_out():
+            raise TimeoutError
+        self.callback.emit(*args)
+
+
 class Worker(QtCore.QRunnable):
     """Executes a function asynchronously. Handles worker thread setup, signals, and wrapup."""
     def __init__(self, fn, *args, **kwargs):
@@ -20,7 +182,13 @@ class Worker(QtCore.QRunnable):
         :param args: positional arguments to pass to the function
         :param kwargs: keyword arguments to pass to the function
 
-        The creator will add progress_callback, message_callback and status_callback to the kwargs.
+        The creator will add progress_callback, message_callback and status_callback to the
+        kwargs. If the function accepts a cancel_token keyword argument (or any keyword
+        arguments), cancel_token is added too: a CancellationToken, which is set by calling
+        cancel().
+
+        The outcome of the function is also set on the `concurrent.futures.Future` self.future,
+        see `submit`. Cancelling the future before the worker starts cancels the worker.
         '''
         super(Worker, self).__init__()
 
@@ -33,6 +201,79 @@ class Worker(QtCore.QRunnable):
         self.kwargs['progress_callback'] = self.signals.progress
         self.kwargs['message_callback'] = self.signals.message
         self.kwargs['status_callback'] = self.signals.status
+        self.cancel_token = CancellationToken()
+        if _accepts_keyword(fn, 'cancel_token'):
+            self.kwargs['cancel_token'] = self.cancel_token
+        self.throttle_interval = None
+        self.timeout = None
+        self.retries = 0
+        self.retry_backoff = 1.0
+        self.retry_on = (OSError, TimeoutError)
+        self.attempts = 0
+        self.name = getattr(fn, '__qualname__', type(fn).__name__)
+        self.enqueued = time.time()
+        self.future = Future()
+        self.future.add_done_callback(lambda future: self.cancel() if future.cancelled() else None)
+        # emits the result, see `LatestWorkerQueue`
+        self._result_callback = self.signals.result
+
+    def cancel(self):
+        '''
+        Requests the function to stop, by setting its cancel_token.
+        If the worker has not started yet, the function is not run at all.
+        '''
+        self.cancel_token.cancel()
+
+    def setThrottle(self, max_rate):
+        '''
+        Limits how often progress_callback, message_callback and status_callback emit their
+        signals, so that a function reporting progress in a tight loop does not flood the GUI
+        event queue. Values emitted in between are coalesced, keeping the latest, and the
+        latest value is always delivered once the function returns, before result.
+        This must be called before the worker is started.
+
+        :param max_rate: maximum number of times per second each signal is emitted,
+            or None to emit every value (the default).
+        '''
+        self.throttle_interval = None if max_rate is None else 1 / max_rate
+        for name in ('progress', 'message', 'status'):
+            signal = getattr(self.signals, name)
+            self.kwargs[f'{name}_callback'] = (signal if max_rate is None else ThrottledCallback(
+                signal, self.throttle_interval))
+
+    def setTimeout(self, seconds):
+        '''
+        Limits how long each attempt at running the function may take. The limit is enforced
+        cooperatively: once it has passed, cancel_token is set, and the callbacks raise
+        `TimeoutError` when the function next emits a value. The timeout signal is then
+        emitted, followed by error with a `TimeoutError`, unless the function is retried
+        (see `setRetry`).
+
+        :param seconds: The time limit, or None for no limit (the default).
+        '''
+        self.timeout = seconds
+
+    def setRetry(self, retries, backoff=1.0, retry_on=(OSError, TimeoutError)):
+        '''
+        Retries the function if it raises one of the exceptions `retry_on`, e.g. when saving to
+        flaky network storage. Before each retry, the retry signal is emitted and the worker
+        waits, for `backoff` seconds and then twice as long each time. Cancelling the worker
+        stops retrying. The function must be safe to call again after failing.
+
+        :param retries: The maximum number of retries (default 0).
+        :param backoff: The delay before the first retry, in seconds.
+        :param retry_on: The exception types to retry on. A timeout counts as `TimeoutError`.
+        '''
+        self.retries = retries
+        self.retry_backoff = backoff
+        self.retry_on = tuple(retry_on)
+
+    def _flushCallbacks(self):
+        '''Emits the values held back by throttled callbacks.'''
+        for name in ('progress', 'message', 'status'):
+            callback = self.kwargs[f'{name}_callback']
+            if isinstance(callback, ThrottledCallback):
+                callback.flush()
 
     @Slot()
     def run(self):
@@ -43,19 +284,426 @@ class Worker(QtCore.QRunnable):
         -------
         - Error: An exception is thrown in the workers function.
         - Result: Contains the return value of a function that has just completed successfully.
+        - Cancelled: The worker was cancelled, or its function raised
+          `concurrent.futures.CancelledError`. This is emitted instead of Result.
         - Finished: Worker thread has completed.
+
+        self.future is set accordingly, before Finished is emitted.
+        If metrics sinks have been added with `add_metrics_sink`, they are then passed
+        a record of the run.
         """
+        started = time.time()
+        outcome, exception = 'result', None
         try:
-            result = self.fn(*self.args, **self.kwargs)
-        except BaseException: # NOQA: B036
+            if not self.future.set_running_or_notify_cancel() or self.cancel_token.is_cancelled():
+                raise CancelledError
+            result = self._runAttempts()
+        except CancelledError as exc:
+            outcome = 'cancelled'
+            self.signals.cancelled.emit()
+            if not self.future.cancelled():
+                self.future.set_exception(exc)
+        except BaseException as exc: # NOQA: B036
+            outcome, exception = 'error', type(exc).__qualname__
             traceback.print_exc()
             exctype, value = sys.exc_info()[:2]
             self.signals.error.emit((exctype, value, traceback.format_exc()))
+            self.future.set_exception(exc)
         else:
-            self.signals.result.emit(result)
+            if self.cancel_token.is_cancelled():
+                outcome = 'cancelled'
+                self.signals.cancelled.emit()
+                self.future.set_exception(CancelledError())
+            else:
+                self._result_callback.emit(result)
+                self.future.set_result(result)
         finally:
+            if _metrics_sinks:
+                self._recordMetrics(started, outcome, exception)
             self.signals.finished.emit()
 
+    def _runAttempts(self):
+        '''
+        Calls the function, enforcing the timeout and retrying according to the retry policy,
+        and returns its result.
+        '''
+        kwargs = self.kwargs
+        if self.timeout is not None:
+            kwargs = dict(kwargs)
+            for name in ('progress', 'message', 'status'):
+                kwargs[f'{name}_callback'] = _DeadlineCallback(kwargs[f'{name}_callback'],
+                                                               self.cancel_token)
+        self.attempts = 0
+        while True:
+            self.attempts += 1
+            if self.timeout is not None:
+                self.cancel_token.deadline = time.monotonic() + self.timeout
+            try:
+                try:
+                    return self.fn(*self.args, **kwargs)
+                finally:
+                    self._flushCallbacks()
+            except BaseException as exc:                                             # NOQA: B036
+                if self.cancel_token.is_cancelled():
+                    raise
+                error = exc
+                if self.cancel_token.timed_out():
+                    self.signals.timeout.emit()
+                    error = TimeoutError(f'{self.name} timed out after {self.timeout}s')
+                    error.__cause__ = exc
+                if self.attempts > self.retries or not isinstance(error, self.retry_on):
+                    if error is exc:
+                        raise
+                    raise error
+                self.signals.retry.emit(self.attempts, (type(error), error, ''.join(
+                    traceback.format_exception_only(type(error), error))))
+            finally:
+                self.cancel_token.deadline = None
+            if self.cancel_token.wait(self.retry_backoff * 2**(self.attempts - 1)):
+                raise CancelledError
+
+    def _recordMetrics(self, started, outcome, exception):
+        '''Passes a record of the run to the metrics sinks.'''
+        ended = time.time()
+        thread = threading.current_thread()
+        record = {
+            'name': self.name, 'enqueued': self.enqueued, 'started': started, 'ended': ended,
+            'wait': started - self.enqueued, 'duration': ended - started,
+            'thread_id': thread.ident, 'thread_name': thread.name, 'outcome': outcome,
+            'exception': exception, 'attempts': self.attempts}
+        for sink in list(_metrics_sinks):
+            try:
+                sink(record)
+            except Exception: # NOQA: B902
+                traceback.print_exc()
+
+
+_metrics_sinks: List[Callable[[dict], Any]] = []
+
+
+def add_metrics_sink(sink):
+    """
+    Adds a sink which every Worker passes a record of its run to, in the worker's thread,
+    once its function has returned or raised. See `eqt.threading.WorkerMetrics` for sinks.
+
+    The record is a dict: {'name': str, 'enqueued': float, 'started': float, 'ended': float,
+    'wait': float, 'duration': float, 'thread_id': int, 'thread_name': str,
+    'outcome': 'result' | 'error' | 'cancelled', 'exception': str | None, 'attempts': int}.
+    `name` is the qualified name of the function, or the `name` attribute of the worker.
+    The times are `time.time()` timestamps, and durations in seconds. `enqueued` is when the
+    worker was submitted with `submit`, or otherwise created. `exception` is the name of the
+    type of the exception raised by the function, if any, and `attempts` the number of times
+    it was called, see `Worker.setRetry`.
+
+    :param sink: A callable taking the record, e.g. a `RingBufferSink`.
+    """
+    _metrics_sinks.append(sink)
+
+
+def remove_metrics_sink(sink):
+    """Removes a sink added with `add_metrics_sink`."""
+    _metrics_sinks.remove(sink)
+
+
+_threadpools: Dict[str, QtCore.QThreadPool] = {}
+_threadpools_lock = threading.Lock()
+
+
+def get_threadpool(name=None, max_thread_count=None):
+    """
+    Returns the thread pool shared across the application under a name, creating it if needed.
+    Separate pools let e.g. latency-sensitive work, such as recomputing a preview, run without
+    queuing behind bulk I/O, such as saving, while bounding the number of threads of each.
+
+    :param name: The name of the thread pool. If None, `QThreadPool.globalInstance()` is
+        returned.
+    :param max_thread_count: If given, sets the maximum number of threads of the pool.
+        Otherwise, a new pool has `QThread.idealThreadCount()` threads.
+    """
+    if name is None:
+        threadpool = QtCore.QThreadPool.globalInstance()
+    else:
+        with _threadpools_lock:
+            threadpool = _threadpools.get(name)
+            if threadpool is None:
+                threadpool = _threadpools[name] = QtCore.QThreadPool()
+                threadpool.setObjectName(name)
+    if max_thread_count is not None:
+        threadpool.setMaxThreadCount(max_thread_count)
+    return threadpool
+
+
+def submit(worker, threadpool=None, priority=0):
+    """
+    Starts a worker on a thread pool, and returns a `concurrent.futures.Future` of the return
+    value of its function. The future raises the exception raised by the function, or
+    `concurrent.futures.CancelledError` if the worker was cancelled.
+
+    This allows chaining steps without connecting to the worker's signals, e.g.
+    `submit(Worker(save)).add_done_callback(...)`, or waiting for several workers with
+    `concurrent.futures.wait`. Note that done callbacks are called in the worker's thread.
+
+    :param worker: The Worker to start.
+    :param threadpool: The QThreadPool to start it on, or the name of a thread pool returned by
+        `get_threadpool`. Defaults to the global instance.
+    :param priority: The priority of the worker in the queue of the thread pool: workers with
+        a higher priority are started first.
+    """
+    if threadpool is None or isinstance(threadpool, str):
+        threadpool = get_threadpool(threadpool)
+    worker.enqueued = time.time()
+    threadpool.start(worker, priority)
+    return worker.future
+
+
+def submit_async(worker, threadpool=None, loop=None, priority=0):
+    """
+    Starts a worker on a thread pool, like `submit`, and returns an `asyncio.Future` of the
+    return value of its function, which can be awaited in a coroutine running on `loop`.
+
+    The event loop must be integrated with Qt, e.g. using `qasync`, for the worker's signals
+    to be delivered while coroutines await it. For example::
+
+        async def saveAndClose(self):
+            await submit_async(Worker(self.saveSession, name, compress), self.threadpool)
+            self.removeTempAndClose(process_name)
+
+    :param worker: The Worker to start.
+    :param threadpool: The QThreadPool to start it on, or the name of a thread pool returned by
+        `get_threadpool`. Defaults to the global instance.
+    :param loop: The event loop. Defaults to the current event loop.
+    :param priority: The priority of the worker in the queue of the thread pool.
+    """
+    return asyncio.wrap_future(submit(worker, threadpool, priority), loop=loop)
+
+
+class LatestWorkerQueue:
+    """
+    Submits workers so that only the latest one submitted under each key matters, e.g. to
+    recompute a preview whenever a slider moves while the user drags it.
+
+    Submitting a worker supersedes the previous one with the same key: if it has not started
+    yet, it is removed from the queue of its thread pool, and otherwise it is cancelled. A
+    superseded worker whose function has not returned yet emits `cancelled` instead of
+    `result`, followed by `finished` as usual, and its future raises
+    `concurrent.futures.CancelledError`. A worker removed from the queue emits them in the
+    thread which superseded it.
+
+    The `result` signal of a worker is emitted in the thread the queue was created in, e.g. the
+    GUI thread, once it is certain that the worker has not been superseded: a result which was
+    on its way when a newer worker was submitted is dropped.
+    """
+    def __init__(self):
+        self._workers = {}
+        # number of workers submitted or cancelled per key, identifying the latest one
+        self._generations = {}
+        # reentrant, as cancelling a future calls `_discard`
+        self._lock = threading.RLock()
+        self._relay = _LatestResultRelay()
+
+    def submit(self, key, worker, threadpool=None, priority=0):
+        """
+        Starts a worker, superseding the previous worker submitted with the same key.
+        Returns a `concurrent.futures.Future` of its result, like `submit`.
+
+        :param key: Any hashable value identifying the work, e.g. the name of a preview.
+        :param worker: The Worker to start.
+        :param threadpool: The QThreadPool to start it on, or the name of a thread pool
+            returned by `get_threadpool`. Defaults to the global instance.
+        :param priority: The priority of the worker in the queue of the thread pool.
+        """
+        if threadpool is None or isinstance(threadpool, str):
+            threadpool = get_threadpool(threadpool)
+        with self._lock:
+            dequeued = self._supersede(key)
+            self._workers[key] = (worker, threadpool)
+            worker._result_callback = _LatestResultCallback(self, key, self._generations[key],
+                                                            worker)
+        _emitDequeued(dequeued)
+        worker.future.add_done_callback(lambda _: self._discard(key, worker))
+        return submit(worker, threadpool, priority)
+
+    def cancel(self, key):
+        """Cancels the latest worker submitted with a key, if it has not finished."""
+        with self._lock:
+            dequeued = self._supersede(key)
+        _emitDequeued(dequeued)
+
+    def _supersede(self, key):
+        """
+        Dequeues or cancels the worker submitted with a key. Must hold the lock.
+        Returns the worker if it was dequeued, so that its signals are emitted without the lock.
+        """
+        self._generations[key] = self._generations.get(key, 0) + 1
+        worker, threadpool = self._workers.pop(key, (None, None))
+        if worker is None:
+            return None
+        if threadpool.tryTake(worker):
+            worker.future.cancel()
+            return worker
+        worker.cancel()
+        return None
+
+    def _discard(self, key, worker):
+        """Forgets a worker once it is done, unless it has been superseded."""
+        with self._lock:
+            if self._workers.get(key, (None,))[0] is worker:
+                del self._workers[key]
+
+    def _isLatest(self, key, generation):
+        """Returns whether no worker was submitted or cancelled with a key since `generation`."""
+        with self._lock:
+            return self._generations.get(key) == generation
+
+
+def _emitDequeued(worker):
+    '''Emits the signals of a worker removed from the queue of its thread pool, if any.'''
+    if worker is not None:
+        worker.signals.cancelled.emit()
+        worker.signals.finished.emit()
+
+
+class _LatestResultCallback:
+    """Sends the result of a worker of a `LatestWorkerQueue` to the thread of the queue."""
+    def __init__(self, queue, key, generation, worker):
+        self.queue = queue
+        self.key = key
+        self.generation = generation
+        # not the worker itself, which the thread pool deletes once it has run
+        self.signals = worker.signals
+
+    def emit(self, result):
+        self.queue._relay.resultReady.emit(self, result)
+
+
+class _LatestResultRelay(QtCore.QObject):
+    """
+    Emits the results of the workers of a `LatestWorkerQueue` in its thread, dropping those of
+    workers which were superseded or cancelled while their result was queued.
+    """
+    resultReady = QtCore.Signal(object, object)
+
+    def __init__(self):
+        super(_LatestResultRelay, self).__init__()
+        self.resultReady.connect(self.deliver)
+
+    @Slot(object, object)
+    def deliver(self, callback, result):
+        if callback.queue._isLatest(callback.key, callback.generation):
+            callback.signals.result.emit(result)
+
+
+class ProcessWorker(Worker):
+    """
+    Executes a function in a separate process, so that CPU-bound code holding the GIL does not
+    block the GUI. Otherwise it is used like a `Worker`: it is started on a `QThreadPool`, and
+    has the same signals, callbacks and cancellation.
+
+    The function, its arguments and its return value must be picklable, e.g. the function must be
+    defined at the top level of a module. The progress_callback, message_callback and
+    status_callback passed to it send their values through a queue, from which the worker's
+    thread emits them. The cancel_token passed to it, if it accepts one, is a
+    `multiprocessing.Event`, which has the same `is_set` and `wait` methods as a
+    CancellationToken.
+
+    The functions of all ProcessWorkers run in one shared `ProcessPoolExecutor`, created when
+    the first one starts, with `ProcessWorker.max_workers` processes (default: the number of
+    CPUs). Call `ProcessWorker.shutdown()` to stop its processes. The processes are started with
+    the 'spawn' method on all platforms, as forking a process running Qt & other threads can
+    deadlock, so the module of the function must be importable without side effects.
+    """
+    max_workers = None
+    _executor = None
+    _manager = None
+    _lock = threading.Lock()
+
+    def __init__(self, fn, *args, **kwargs):
+        '''Worker creator
+
+        :param fn: The picklable function to be run by this Worker in a different process.
+        :param args: positional arguments to pass to the function
+        :param kwargs: keyword arguments to pass to the function
+        '''
+        super(ProcessWorker, self).__init__(self._runInProcess, *args, **kwargs)
+        self.process_fn = fn
+        self.name = getattr(fn, '__qualname__', type(fn).__name__)
+
+    @classmethod
+    def _getExecutor(cls):
+        '''Returns the shared process pool and the manager of the queues & events.'''
+        with cls._lock:
+            if cls._executor is None:
+                context = multiprocessing.get_context('spawn')
+                cls._manager = context.Manager()
+                cls._executor = ProcessPoolExecutor(cls.max_workers, mp_context=context)
+            return cls._executor, cls._manager
+
+    @classmethod
+    def shutdown(cls, wait=True):
+        '''Stops the processes of the shared process pool, which is recreated if needed.'''
+        with cls._lock:
+            if cls._executor is not None:
+                cls._executor.shutdown(wait)
+                cls._manager.shutdown()
+                cls._executor = cls._manager = None
+
+    def _runInProcess(self, *args, progress_callback, message_callback, status_callback,
+                      cancel_token, **kwargs):
+        '''
+        Runs process_fn in the process pool, relaying the values it passes to its callbacks
+        until it returns, and setting its cancel event once cancel_token is set.
+        '''
+        executor, manager = self._getExecutor()
+        values, cancel_event = manager.Queue(), manager.Event()
+        future = executor.submit(_callInProcess, self.process_fn, args, kwargs, values,
+                                 cancel_event, self.throttle_interval)
+        callbacks = {
+            'progress': progress_callback, 'message': message_callback, 'status': status_callback}
+        while True:
+            if cancel_token.is_set() and not cancel_event.is_set():
+                cancel_event.set()
+            try:
+                name, value = values.get(timeout=0.05)
+            except queue.Empty:
+                if future.done():
+                    break
+            else:
+                callbacks[name].emit(*value)
+        # the values put before the function returned
+        while not values.empty():
+            name, value = values.get()
+            callbacks[name].emit(*value)
+        return future.result()
+
+
+class _QueueCallback:
+    """Sends the values emitted by the function of a `ProcessWorker` to its thread."""
+    def __init__(self, values, name):
+        self.values = values
+        self.name = name
+
+    def emit(self, *args):
+        self.values.put((self.name, args))
+
+
+def _callInProcess(fn, args, kwargs, values, cancel_event, throttle_interval):
+    """Calls the function of a `ProcessWorker` in a process of the pool."""
+    callbacks = {}
+    for name in ('progress', 'message', 'status'):
+        callback = _QueueCallback(values, name)
+        if throttle_interval is not None:
+            # avoid sending values which would be coalesced anyway
+            callback = ThrottledCallback(callback, throttle_interval)
+        callbacks[f'{name}_callback'] = callback
+    if _accepts_keyword(fn, 'cancel_token'):
+        kwargs = dict(kwargs, cancel_token=cancel_event)
+    try:
+        return fn(*args, **callbacks, **kwargs)
+    finally:
+        for callback in callbacks.values():
+            if isinstance(callback, ThrottledCallback):
+                callback.flush()
+
 
 class WorkerSignals(QtCore.QObject):
     """
@@ -67,6 +715,16 @@ class WorkerSignals(QtCore.QObject):
     error
         `tuple` (exctype, value, traceback.format_exc() )
 
+    cancelled
+        No Data
+
+    timeout
+        No Data, emitted when an attempt at running the function times out
+
+    retry
+        `int` number of the attempt which failed, and `tuple` (exctype, value, formatted
+        exception), emitted before the function is retried
+
     result
         `object` data returned from processing, anything
 
@@ -81,6 +739,9 @@ class WorkerSignals(QtCore.QObject):
 
     finished = QtCore.Signal()
     error = QtCore.Signal(tuple)
+    cancelled = QtCore.Signal()
+    timeout = QtCore.Signal()
+    retry = QtCore.Signal(int, tuple)
     result = QtCore.Signal(object)
 
     progress = QtCore.Signal(int)
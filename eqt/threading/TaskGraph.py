@@ -0,0 +1,213 @@
+import threading
+import traceback
+from concurrent.futures import CancelledError
+from functools import partial
+
+from qtpy import QtCore
+
+from .QtThreading import submit
+
+
+class TaskGraph(QtCore.QObject):
+    """
+    Runs `Worker` tasks on a thread pool as soon as the tasks they depend on have finished, so
+    that independent tasks run concurrently.
+
+    For example, to compress several files concurrently once they have been written, and
+    then clean up::
+
+        graph = TaskGraph(self.threadpool)
+        graph.addTask('write', Worker(write_files))
+        for name in names:
+            graph.addTask(name, Worker(compress, name), depends_on=['write'])
+        graph.addTask('cleanup', Worker(cleanup), depends_on=names)
+        graph.finished.connect(...)
+        graph.start()
+
+    If a task raises an exception or is cancelled, the tasks depending on it, directly or
+    indirectly, are not run. The other tasks still run.
+
+    Signals
+    -------
+    progress
+        `int` percentage of the graph done: the average of the percentages emitted through
+        the `progress_callback` of each task, counting finished tasks as 100%.
+    taskFinished
+        `str` name of a task which returned successfully.
+    error
+        `str` name of a task which raised an exception, and a `tuple` like the `error`
+        signal of a Worker: (exctype, value, formatted traceback).
+    finished
+        No Data. Emitted once no more tasks will run.
+
+    Attributes
+    ----------
+    results : dict
+        The return value of each task which returned successfully, by name. Tasks can read
+        the results of the tasks they depend on from it.
+    failed : set
+        The names of the tasks which raised an exception or were cancelled.
+    skipped : set
+        The names of the tasks which were not run, because a task they depend on failed
+        or the graph was cancelled.
+    """
+    progress = QtCore.Signal(int)
+    taskFinished = QtCore.Signal(str)
+    error = QtCore.Signal(str, tuple)
+    finished = QtCore.Signal()
+
+    def __init__(self, threadpool=None, parent=None):
+        '''
+        :param threadpool: The QThreadPool to run the tasks on. Defaults to the global instance.
+        :param parent: The parent QObject.
+        '''
+        super(TaskGraph, self).__init__(parent)
+        self.threadpool = QtCore.QThreadPool.globalInstance() if threadpool is None else threadpool
+        self.workers = {}
+        self.dependencies = {}
+        self.priorities = {}
+        self.results = {}
+        self.skipped = set()
+        self._percentages = {}
+        self._percentage = None
+        self._pending = set()
+        self._running = set()
+        self.failed = set()
+        self._finished = False
+        self._lock = threading.RLock()
+
+    def addTask(self, name, worker, depends_on=(), priority=0):
+        '''
+        Adds a task to the graph. This must be called before `start`.
+
+        :param name: A unique name for the task.
+        :param worker: The Worker running the task.
+        :param depends_on: The names of the tasks which must finish before this one starts.
+        :param priority: The priority of the task in the queue of the thread pool.
+        '''
+        if name in self.workers:
+            raise ValueError(f'There is already a task called {name}')
+        self.workers[name] = worker
+        self.dependencies[name] = tuple(depends_on)
+        self.priorities[name] = priority
+        self._percentages[name] = 0
+        worker.signals.progress.connect(partial(self._onTaskProgress, name))
+
+    def start(self):
+        '''Starts the tasks which do not depend on other tasks.'''
+        self._checkDependencies()
+        with self._lock:
+            self._pending = set(self.workers)
+            self._startReadyTasks()
+        self._finishIfDone()
+
+    def cancel(self):
+        '''Cancels the running tasks, and skips the tasks which have not started yet.'''
+        with self._lock:
+            self.skipped.update(self._pending)
+            self._pending.clear()
+            running = list(self._running)
+        for name in running:
+            self.workers[name].cancel()
+        self._finishIfDone()
+
+    def _checkDependencies(self):
+        '''Raises a ValueError if a dependency is missing or the dependencies form a cycle.'''
+        visited, visiting = set(), set()
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f'The dependencies of task {name} form a cycle')
+            visiting.add(name)
+            for dependency in self.dependencies[name]:
+                if dependency not in self.workers:
+                    raise ValueError(f'Task {name} depends on unknown task {dependency}')
+                visit(dependency)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.workers:
+            visit(name)
+
+    def _startReadyTasks(self):
+        '''Starts the pending tasks whose dependencies have all returned successfully.'''
+        with self._lock:
+            ready = [
+                name for name in self._pending
+                if all(dependency in self.results for dependency in self.dependencies[name])]
+            for name in ready:
+                self._pending.discard(name)
+                self._running.add(name)
+                worker = self.workers[name]
+                # called in the worker's thread as soon as it is done
+                worker.future.add_done_callback(partial(self._onTaskDone, name))
+                submit(worker, self.threadpool, self.priorities[name])
+
+    def _onTaskDone(self, name, future):
+        '''Records the outcome of a task, then starts or skips the tasks depending on it.'''
+        with self._lock:
+            self._running.discard(name)
+            error = None
+            if future.cancelled():
+                failed = True
+            else:
+                try:
+                    self.results[name] = future.result()
+                except CancelledError:
+                    failed = True
+                except BaseException as exc:                                    # NOQA: B036
+                    failed = True
+                    error = (type(exc), exc,
+                             ''.join(traceback.format_exception(type(exc), exc,
+                                                                exc.__traceback__)))
+                else:
+                    failed = False
+            self._percentages[name] = 100
+            if failed:
+                self.failed.add(name)
+                self._skipDependents(name)
+            self._startReadyTasks()
+        if error is not None:
+            self.error.emit(name, error)
+        if not failed:
+            self.taskFinished.emit(name)
+        self._emitProgress()
+        self._finishIfDone()
+
+    def _skipDependents(self, failed_name):
+        '''Skips the pending tasks which depend, directly or indirectly, on a failed task.'''
+        with self._lock:
+            dependents = [name for name in self._pending if failed_name in self.dependencies[name]]
+            for name in dependents:
+                self._pending.discard(name)
+                self.skipped.add(name)
+                self._percentages[name] = 100
+                self._skipDependents(name)
+
+    def _onTaskProgress(self, name, value):
+        with self._lock:
+            if name not in self._running:
+                # delivered after the task was done
+                return
+            self._percentages[name] = value
+        self._emitProgress()
+
+    def _emitProgress(self):
+        '''Emits the aggregate percentage, if it has changed.'''
+        with self._lock:
+            percentages = self._percentages.values()
+            percentage = sum(percentages) // len(percentages) if percentages else 100
+            if percentage == self._percentage:
+                return
+            self._percentage = percentage
+        self.progress.emit(percentage)
+
+    def _finishIfDone(self):
+        '''Emits finished once no task is running or left to run.'''
+        with self._lock:
+            if self._running or self._pending or self._finished:
+                return
+            self._finished = True
+        self.finished.emit()
@@ -0,0 +1,84 @@
+"""
+Sinks for the records of Worker runs, see `eqt.threading.add_metrics_sink`.
+"""
+import json
+import os
+import threading
+from collections import deque
+
+
+class RingBufferSink:
+    """Keeps the latest records in memory."""
+    def __init__(self, maxlen=1000):
+        '''
+        :param maxlen: The maximum number of records kept, dropping the oldest.
+        '''
+        self._records = deque(maxlen=maxlen)
+
+    def __call__(self, record):
+        self._records.append(record)
+
+    def records(self):
+        '''Returns a list of the records kept, oldest first.'''
+        return list(self._records)
+
+    def summary(self):
+        '''
+        Returns statistics of the records kept for each worker name.
+
+        Returns
+        -------
+        dict
+            Format: {name: {'count': int, 'errors': int, 'cancelled': int,
+            'mean_wait': float, 'mean_duration': float}}
+        '''
+        summary = {}
+        for record in self.records():
+            stats = summary.setdefault(
+                record['name'],
+                {'count': 0, 'errors': 0, 'cancelled': 0, 'mean_wait': 0.0, 'mean_duration': 0.0})
+            stats['count'] += 1
+            stats['errors'] += record['outcome'] == 'error'
+            stats['cancelled'] += record['outcome'] == 'cancelled'
+            # running means
+            stats['mean_wait'] += (record['wait'] - stats['mean_wait']) / stats['count']
+            stats['mean_duration'] += (record['duration'] -
+                                       stats['mean_duration']) / stats['count']
+        return summary
+
+
+class JSONLinesSink:
+    """Appends each record to a file, as one line of JSON."""
+    def __init__(self, path):
+        '''
+        :param path: The file to append the records to.
+        '''
+        self.path = os.fspath(path)
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        line = json.dumps(record) + '\n'
+        with self._lock, open(self.path, 'a') as f:
+            f.write(line)
+
+
+class ChromeTraceSink(RingBufferSink):
+    """
+    Keeps the latest records in memory, to be saved in the Chrome trace event format, which
+    can be viewed with e.g. https://ui.perfetto.dev or chrome://tracing. Each run is shown as
+    a slice in the row of its thread.
+    """
+    def traceEvents(self):
+        '''Returns the records as a list of complete ('X') trace events.'''
+        pid = os.getpid()
+        return [{
+            'name': record['name'], 'cat': 'Worker', 'ph': 'X', 'ts': record['started'] * 1e6,
+            'dur': record['duration'] * 1e6, 'pid': pid, 'tid': record['thread_id'], 'args': {
+                'wait': record['wait'], 'outcome': record['outcome'],
+                'exception': record['exception'], 'thread_name': record['thread_name']}}
+                for record in self.records()]
+
+    def save(self, path):
+        '''Saves the trace to a JSON file.'''
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.traceEvents(), 'displayTimeUnit': 'ms'}, f)
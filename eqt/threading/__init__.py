@@ -1,3 +1,21 @@
-from .QtThreading import Worker, WorkerSignals
+from .BatchMap import BatchMap
+from .QtThreading import (
+    CancellationToken,
+    LatestWorkerQueue,
+    ProcessWorker,
+    ThrottledCallback,
+    Worker,
+    WorkerSignals,
+    add_metrics_sink,
+    get_threadpool,
+    remove_metrics_sink,
+    submit,
+    submit_async,
+)
+from .TaskGraph import TaskGraph
+from .WorkerMetrics import ChromeTraceSink, JSONLinesSink, RingBufferSink
 
-__all__ = ['Worker', 'WorkerSignals']
+__all__ = [
+    'BatchMap', 'CancellationToken', 'ChromeTraceSink', 'JSONLinesSink', 'LatestWorkerQueue',
+    'ProcessWorker', 'RingBufferSink', 'TaskGraph', 'ThrottledCallback', 'Worker', 'WorkerSignals',
+    'add_metrics_sink', 'get_threadpool', 'remove_metrics_sink', 'submit', 'submit_async']
@@ -117,6 +117,26 @@ class FormDialog(QtWidgets.QDialog):
             raise ValueError(
                 f"layout {layout} is not recognised, must be set to 'form' or 'vertical'")
 
+    def addWidgets(self, widgets):
+        '''
+        Adds several widgets at the end of the form layout, with the updates of the form disabled
+        (see `deferUpdates`).
+
+        Parameters
+        ----------
+        widgets : iterable of tuples
+            (qwidget, qlabel, name) for each widget, as passed to `addWidget`. If qlabel is
+            `None` the widget spans the full width of the form, as with `addSpanningWidget`.
+        '''
+        self.formWidget.addWidgets(widgets)
+
+    def deferUpdates(self):
+        '''
+        Returns a context manager which disables the updates of the form while many widgets are
+        added or removed, and saves their default states in one pass at the end.
+        '''
+        return self.formWidget.deferUpdates()
+
     def insertWidget(self, row, name, qwidget, qlabel=None):
         '''
         Inserts a labelled widget, or a spanning widget, to the form layout.
@@ -329,6 +349,47 @@ class FormDialog(QtWidgets.QDialog):
         '''
         return self.formWidget.applyWidgetStates(states)
 
+    def getChangedWidgetStates(self):
+        '''
+        Returns the current states of the widgets whose state differs from the saved state, or
+        from the default state if no states were saved. Only the widgets which changed since the
+        states were last saved or restored are read.
+
+        Returns
+        -------
+        dict
+            Format: {'name_field': {'value': str | bool | int, 'enabled': bool,
+            'visible': bool, 'widget_row': int}, ...}, like `getAllWidgetStates`.
+        '''
+        return self.formWidget.getChangedWidgetStates()
+
+    def applyWidgetStateChanges(self, states):
+        '''
+        Applies the given states to some of the form's widgets, e.g. those returned by
+        `getChangedWidgetStates`. Unlike `applyWidgetStates`, the other widgets are left as
+        they are.
+
+        Parameters
+        ----------
+        states : dict
+            Format: {'name_field': {'value': str | bool | int, 'enabled': bool, 'visible': bool,
+            'widget_row' : int}, ...}, with a subset of the keys of the widgets dictionary.
+        '''
+        return self.formWidget.applyWidgetStateChanges(states)
+
+    def getNonDefaultSavedWidgetStates(self):
+        '''
+        Returns the saved states of the widgets which differ from their default states.
+
+        Returns
+        -------
+        dict
+            Format: {'name_field': {'value': str | bool | int, 'enabled': bool,
+            'visible': bool, 'widget_row': int} | None, ...}, like
+            `UIFormWidget.getNonDefaultSavedWidgetStates`.
+        '''
+        return self.formWidget.getNonDefaultSavedWidgetStates()
+
 
 class AdvancedFormDialog(FormDialog):
     def __init__(self, parent=None, title=None, parent_button_name=None):
@@ -380,7 +441,7 @@ class AdvancedFormDialog(FormDialog):
         super()._onOk()
         self.formWidget.setDefaultWidgetStatesVisibleTrue()
         if self.display_on_parent:
-            if self.getSavedWidgetStates() == self.getDefaultWidgetStates():
+            if not self.formWidget.getNonDefaultSavedWidgetStates():
                 self._removeWidgetsFromParent()
             else:
                 self._addOrUpdateWidgetsInParent()
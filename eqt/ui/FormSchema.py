@@ -0,0 +1,292 @@
+import hashlib
+import json
+import numbers
+from typing import Dict
+
+from qtpy import QtCore, QtWidgets
+
+from .FormDialog import FormDialog
+from .UIFormWidget import FormDockWidget, FormWidget, _get_widget_value_accessors
+from .UISliderWidget import UISliderWidget
+
+_compiled_schemas: Dict[str, 'FormSchema'] = {}
+
+
+def _str_value(field, value):
+    if not isinstance(value, str):
+        raise TypeError(f'expected a str, got {value!r}')
+
+
+def _bool_value(field, value):
+    if not isinstance(value, bool):
+        raise TypeError(f'expected a bool, got {value!r}')
+
+
+def _index_value(field, value):
+    if isinstance(value, bool) or not isinstance(value, numbers.Integral):
+        raise TypeError(f'expected an int, got {value!r}')
+    if not 0 <= value < len(field.options.get('items', ())):
+        raise ValueError(f'{value!r} is not the index of an item')
+
+
+def _number_value(number_type, minimum, maximum):
+    '''
+    Returns a check of a number of type `number_type` between the `minimum` & `maximum` options
+    of a field, which default to the given values.
+    '''
+    def check(field, value):
+        if isinstance(value, bool) or not isinstance(value, number_type):
+            raise TypeError(f'expected a {number_type.__name__}, got {value!r}')
+        low = field.options.get('minimum', minimum)
+        high = field.options.get('maximum', maximum)
+        if low is not None and value < low or high is not None and value > high:
+            raise ValueError(f'{value!r} is not between {low} and {high}')
+
+    return check
+
+
+class _Field:
+    '''A field of a compiled schema: how to create its widget and validate its value.'''
+    def __init__(self, spec):
+        self.name = spec['name']
+        self.type = spec['type']
+        self.label = spec.get('label')
+        self.visible = spec.get('visible', True)
+        self.enabled = spec.get('enabled', True)
+        self.default = spec.get('default')
+        options = {
+            key: value
+            for key, value in spec.items()
+            if key not in ('name', 'type', 'label', 'visible', 'enabled', 'default')}
+        try:
+            create, check, allowed = _FIELD_TYPES[self.type]
+        except KeyError:
+            raise ValueError(f"Field '{self.name}' has unknown type '{self.type}': expected "
+                             f"any of {sorted(_FIELD_TYPES)}") from None
+        unknown = set(options) - set(allowed)
+        if unknown:
+            raise ValueError(f"Field '{self.name}' of type '{self.type}' has unknown options "
+                             f"{sorted(unknown)}")
+        if self.type == 'UISliderWidget' and not {'minimum', 'maximum'} <= set(options):
+            raise ValueError(f"Field '{self.name}' of type '{self.type}' needs a minimum and "
+                             "a maximum")
+        self.options = options
+        self._create = create
+        self._check = check
+        if self.default is not None:
+            self.check(self.default)
+
+    @property
+    def has_value(self):
+        '''Whether the field has a value in the form states.'''
+        return self._check is not None
+
+    def check(self, value):
+        '''Raises a ValueError if `value` is not valid for the field.'''
+        if self._check is None:
+            raise ValueError(f"Field '{self.name}' of type '{self.type}' has no value")
+        try:
+            self._check(self, value)
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"Invalid value for field '{self.name}': {exc}") from None
+
+    def create(self, parent):
+        '''Returns a new (qwidget, qlabel, name) for `UIFormWidget.addWidgets`.'''
+        qwidget = self._create(parent, **self.options)
+        if self.default is not None:
+            _get_widget_value_accessors(type(qwidget))[1](qwidget, self.default)
+        qwidget.setEnabled(self.enabled)
+        qlabel = None
+        if self.label is not None:
+            qlabel = QtWidgets.QLabel(self.label, parent)
+            qlabel.setEnabled(self.enabled)
+            if not self.visible:
+                qlabel.setVisible(False)
+        if not self.visible:
+            qwidget.setVisible(False)
+        return qwidget, qlabel, self.name
+
+
+def _create_title(parent, text=''):
+    qlabel = QtWidgets.QLabel(text, parent)
+    qlabel.setStyleSheet("font-weight: bold")
+    return qlabel
+
+
+def _create_separator(parent):
+    frame = QtWidgets.QFrame(parent)
+    frame.setFrameShape(QtWidgets.QFrame.HLine)
+    frame.setFrameShadow(QtWidgets.QFrame.Raised)
+    return frame
+
+
+def _create_with_text(widget_type):
+    '''Returns a function creating a widget with an optional `text` option.'''
+    def create(parent, text=''):
+        return widget_type(text, parent)
+
+    return create
+
+
+def _create_with_range(widget_type):
+    '''Returns a function creating a widget with `minimum`, `maximum`... options.'''
+    def create(parent, minimum=None, maximum=None, step=None, decimals=None):
+        if widget_type is QtWidgets.QSlider:
+            qwidget = widget_type(QtCore.Qt.Horizontal, parent)
+        else:
+            qwidget = widget_type(parent)
+        if decimals is not None:
+            qwidget.setDecimals(decimals)
+        if minimum is not None:
+            qwidget.setMinimum(minimum)
+        if maximum is not None:
+            qwidget.setMaximum(maximum)
+        if step is not None:
+            qwidget.setSingleStep(step)
+        return qwidget
+
+    return create
+
+
+def _create_combobox(parent, items=()):
+    qwidget = QtWidgets.QComboBox(parent)
+    qwidget.addItems(list(items))
+    return qwidget
+
+
+def _create_uislider(parent, minimum, maximum, **kwargs):
+    return UISliderWidget(minimum, maximum, **kwargs)
+
+
+_RANGE_OPTIONS = ('minimum', 'maximum', 'step')
+# type: (create(parent, **options), check(field, value) or None if it has no value, options)
+_FIELD_TYPES = {
+    name: (create, check, options)
+    for name, create, check, options in (
+        ('title', _create_title, None, ('text',)),
+        ('separator', _create_separator, None, ()),
+        ('QLabel', _create_with_text(QtWidgets.QLabel), _str_value, ('text',)),
+        ('QCheckBox', _create_with_text(QtWidgets.QCheckBox), _bool_value, ('text',)),
+        ('QRadioButton', _create_with_text(QtWidgets.QRadioButton), _bool_value, ('text',)),
+        ('QPushButton', _create_with_text(QtWidgets.QPushButton), _bool_value, ('text',)),
+        ('QComboBox', _create_combobox, _index_value, ('items',)),
+        ('QSpinBox', _create_with_range(QtWidgets.QSpinBox),
+         _number_value(numbers.Integral, 0, 99), _RANGE_OPTIONS),
+        ('QDoubleSpinBox', _create_with_range(QtWidgets.QDoubleSpinBox),
+         _number_value(numbers.Real, 0.0, 99.99), _RANGE_OPTIONS + ('decimals',)),
+        ('QSlider', _create_with_range(QtWidgets.QSlider), _number_value(numbers.Integral, 0, 99),
+         _RANGE_OPTIONS),
+        ('UISliderWidget', _create_uislider, _number_value(numbers.Real, None, None),
+         ('minimum', 'maximum', 'decimals', 'number_of_steps', 'number_of_ticks')),
+        ('QLineEdit', _create_with_text(QtWidgets.QLineEdit), _str_value, ('text',)),
+        ('QTextEdit', QtWidgets.QTextEdit, _str_value, ()),
+        ('QPlainTextEdit', QtWidgets.QPlainTextEdit, _str_value, ()),
+    )}
+
+
+class FormSchema:
+    '''
+    A declarative description of a form, compiled into a builder which creates the form's
+    widgets, and validates and serialises its states.
+
+    A schema is a dict, which can be loaded from JSON, e.g.::
+
+        {'fields': [
+            {'name': 'title', 'type': 'title', 'text': 'Reconstruction'},
+            {'name': 'algorithm', 'type': 'QComboBox', 'label': 'Algorithm: ',
+             'items': ['FDK', 'SIRT'], 'default': 0},
+            {'name': 'iterations', 'type': 'QSpinBox', 'label': 'Iterations: ',
+             'minimum': 1, 'maximum': 1000, 'default': 10, 'visible': False}]}
+
+    Each field has a `name` and a `type`: 'title', 'separator', or the name of a widget class
+    ('QLabel', 'QCheckBox', 'QRadioButton', 'QPushButton', 'QComboBox', 'QSpinBox',
+    'QDoubleSpinBox', 'QSlider', 'UISliderWidget', 'QLineEdit', 'QTextEdit' or
+    'QPlainTextEdit'). Optional keys are `label` (without a label, the widget spans the form),
+    `default`, `visible` & `enabled`, and the options of the type: `text`, `items`, `minimum`,
+    `maximum`, `step`, `decimals`, `number_of_steps` & `number_of_ticks`.
+
+    Use `FormSchema.compile` rather than the constructor, so that the builder is cached and
+    shared by all the forms created from the same schema.
+    '''
+    def __init__(self, schema):
+        '''
+        Validates and compiles a schema. Raises a ValueError if the schema is invalid.
+
+        :param schema: The schema dict, or the list of its fields.
+        '''
+        fields = schema['fields'] if isinstance(schema, dict) else schema
+        self.fields = {}
+        for spec in fields:
+            if spec['name'] in self.fields:
+                raise ValueError(f"Field name ({spec['name']}) is defined more than once")
+            self.fields[spec['name']] = _Field(spec)
+
+    @staticmethod
+    def hash(schema):
+        '''Returns a hash of a schema, which does not depend on the order of dict keys.'''
+        return hashlib.sha256(json.dumps(schema, sort_keys=True).encode()).hexdigest()
+
+    @classmethod
+    def compile(cls, schema):
+        '''Returns the FormSchema of a schema, compiled once per schema hash.'''
+        key = cls.hash(schema)
+        try:
+            return _compiled_schemas[key]
+        except KeyError:
+            pass
+        return _compiled_schemas.setdefault(key, cls(schema))
+
+    def build(self, form):
+        '''
+        Adds the widgets of the fields to a form.
+
+        :param form: A FormWidget, FormDockWidget or FormDialog.
+        '''
+        parent = form.groupBox if hasattr(form, 'groupBox') else form.widget().groupBox
+        form.addWidgets([field.create(parent) for field in self.fields.values()])
+        return form
+
+    def createFormWidget(self, parent=None):
+        '''Returns a new FormWidget with the fields of the schema.'''
+        return self.build(FormWidget(parent))
+
+    def createFormDockWidget(self, parent=None, title=None):
+        '''Returns a new FormDockWidget with the fields of the schema.'''
+        return self.build(FormDockWidget(parent, title))
+
+    def createFormDialog(self, parent=None, title=None):
+        '''Returns a new FormDialog with the fields of the schema.'''
+        return self.build(FormDialog(parent, title))
+
+    def validate(self, values):
+        '''
+        Raises a ValueError if `values` does not match the schema.
+
+        :param values: A dict of field name to value, as returned by `getValues`. Fields
+            without a value in the dict are not checked.
+        '''
+        for name, value in values.items():
+            try:
+                field = self.fields[name]
+            except KeyError:
+                raise ValueError(f"Unknown field '{name}'") from None
+            field.check(value)
+
+    def getValues(self, form):
+        '''
+        Returns the values of the fields of a form built from the schema, as a dict which can be
+        serialised to JSON.
+        '''
+        return {
+            name: form.getWidgetState(name, 'field')['value']
+            for name, field in self.fields.items() if field.has_value}
+
+    def applyValues(self, form, values):
+        '''
+        Validates values against the schema, then applies them to a form built from the schema.
+
+        :param values: A dict of field name to value, as returned by `getValues`.
+        '''
+        self.validate(values)
+        for name, value in values.items():
+            form.applyWidgetState(name, {'value': value}, 'field')
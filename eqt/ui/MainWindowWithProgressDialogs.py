@@ -5,6 +5,7 @@ from qtpy.QtCore import QSettings, QThreadPool
 from qtpy.QtGui import QKeySequence
 from qtpy.QtWidgets import QAction, QMainWindow
 
+from ..threading import LatestWorkerQueue, submit
 from .ProgressTimerDialog import ProgressTimerDialog
 from .SessionDialogs import AppSettingsDialog
 
@@ -24,6 +25,8 @@ class MainWindowWithProgressDialogs(QMainWindow):
     self.progress_windows
         This is a dictionary of ProgressTimerDialog objects, where the key is
         the name of the progress window.
+    self.threadpool
+        The QThreadPool which workers are started on by default, see `startWorker`.
     '''
     def __init__(self, title, app_name, settings_name=None, organisation_name=None, **kwargs):
 
@@ -32,6 +35,7 @@ class MainWindowWithProgressDialogs(QMainWindow):
         self.setWindowTitle(title)
         self.app_name = app_name
         self.threadpool = QThreadPool()
+        self.latest_workers = LatestWorkerQueue()
 
         if settings_name is None:
             settings_name = app_name
@@ -132,9 +136,39 @@ class MainWindowWithProgressDialogs(QMainWindow):
         self.setAppStyle()
         dialog.close()
 
+    # Workers ------------------------------------------------------------------
+
+    def startWorker(self, worker, priority=0, threadpool=None, key=None):
+        '''
+        Starts a worker, and returns a `concurrent.futures.Future` of its result.
+        If a `key` is given, only the latest worker started with that key matters: the
+        previous one is dequeued or cancelled, see `eqt.threading.LatestWorkerQueue`.
+
+        Parameters
+        ----------
+        worker : eqt.threading.Worker
+            The worker to start.
+        priority : int
+            The priority of the worker in the queue of the thread pool: workers with a higher
+            priority are started first, e.g. so that interactive work does not wait for bulk
+            I/O to finish.
+        threadpool : QThreadPool or str, optional
+            The thread pool to start the worker on, or the name of a thread pool shared across
+            the application, see `eqt.threading.get_threadpool`. Defaults to self.threadpool.
+        key : hashable, optional
+            Identifies work superseded by newer work, e.g. recomputing a preview after
+            a slider moves.
+        '''
+        if threadpool is None:
+            threadpool = self.threadpool
+        if key is None:
+            return submit(worker, threadpool, priority)
+        return self.latest_workers.submit(key, worker, threadpool, priority)
+
     # Progress Bar -------------------------------------------------------------
 
-    def createUnknownProgressWindow(self, process_name, title=None, detailed_text=None):
+    def createUnknownProgressWindow(self, process_name, title=None, detailed_text=None,
+                                    cancel_method=None):
         '''
         Creates a progress bar with an unknown duration
 
@@ -152,9 +186,13 @@ class MainWindowWithProgressDialogs(QMainWindow):
             The title of the progress bar
         detailed_text : str
             The detailed text of the progress bar
+        cancel_method : callable, optional
+            If given, a cancel button is shown which calls it, e.g. the `cancel` method of
+            the `Worker` running the process
         '''
 
-        progress_window = ProgressTimerDialog(process_name, parent=self)
+        progress_window = ProgressTimerDialog(process_name, parent=self,
+                                              cancel_method=cancel_method)
         self.saveReferenceToProgressWindow(progress_window, process_name)
         progress_window.show()
 
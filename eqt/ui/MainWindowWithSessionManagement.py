@@ -1,18 +1,37 @@
 import json
 import os
 import shutil
+import socket
+import threading
+import zipfile
 from datetime import datetime
 from functools import partial
 
+from qtpy.QtCore import QTimer
 from qtpy.QtGui import QCloseEvent, QKeySequence
 from qtpy.QtWidgets import QAction
 
-from ..io import zip_directory
+from ..io import (
+    AUTOSAVE_JOURNAL_PREFIX,
+    MANIFEST_NAME,
+    autosave_journal_name,
+    extract_member,
+    index_sessions,
+    is_in_directory,
+    is_process_running,
+    is_same_filesystem,
+    map_member,
+    move_directory,
+    read_manifest,
+    write_file_atomically,
+    zip_directory,
+)
 from ..threading import Worker
 from .MainWindowWithProgressDialogs import MainWindowWithProgressDialogs
 from .SessionDialogs import (
     ErrorDialog,
     LoadSessionDialog,
+    RecoverSessionDialog,
     SaveSessionDialog,
     SessionDirectorySelectionDialog,
 )
@@ -48,6 +67,30 @@ class MainWindowWithSessionManagement(MainWindowWithProgressDialogs):
         the session folders are saved.
         So self.sessions_directory will be:
         <user selected directory>/<self.sessions_directory_name>
+    self.session_zip_workers
+        The number of threads used to compress the session when saving it, and to copy it
+        if it has to be moved to a sessions directory on another filesystem (default 4).
+        If `None`, the number of CPUs is used.
+    self.incremental_session_saves
+        Whether sessions are saved incrementally (default `True`). The session archive then
+        stores a manifest of its files, and saving the session again only compresses the files
+        which changed since the archive it was loaded from or last saved to.
+    self.session_archive
+        The path of the archive the current session was loaded from or last saved to,
+        or `None` for a new session.
+    self.lazy_session_loading
+        Whether loading a session only reads its session.json before calling
+        `finishLoadConfig` (default `False`). The other files are then extracted in the
+        background, and `getSessionFile` must be used to access them, which extracts
+        them on demand.
+    self.autosave_timer
+        A QTimer which autosaves the session config to a journal in the sessions directory,
+        every minute by default. Use `self.autosave_timer.setInterval` to change this, or
+        `self.autosave_timer.stop` to disable autosaving. When the application is next
+        opened, the user is offered to recover the session if it was not saved or discarded.
+    self.autosave_delay
+        The delay in milliseconds (default 2000) after a call to `scheduleAutosave`
+        before the session is autosaved.
     '''
     def __init__(self, title, app_name, settings_name=None, organisation_name=None, **kwargs):
 
@@ -69,10 +112,32 @@ class MainWindowWithSessionManagement(MainWindowWithProgressDialogs):
         # <user selected directory>/<self.sessions_directory_name>
         self.sessions_directory_name = self.app_name.replace(" ", "-") + "-Sessions"
         self.sessions_directory = None
+        self.session_zip_workers = 4
+        self.incremental_session_saves = True
+        self.session_archive = None
+        self.lazy_session_loading = False
+        self._unextracted_session_files = set()
+        self._session_extraction_lock = threading.Lock()
+
+        self.autosave_delay = 2000
+        self._autosave_lock = threading.Lock()
+        self._autosave_write_lock = threading.Lock()
+        self._autosave_generation = 0
+        self._autosave_last = None
+        self._autosave_pending = None
+        self._autosave_running = False
+        self._saved_session_config = None
+        self._autosave_debounce_timer = QTimer(self)
+        self._autosave_debounce_timer.setSingleShot(True)
+        self._autosave_debounce_timer.timeout.connect(self.autosave)
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.setInterval(60000)
+        self.autosave_timer.timeout.connect(self.autosave)
 
         self.setupSession()
 
         self.should_really_close = False
+        self.autosave_timer.start()
 
     # Create the menu ----------------------------------------------------------
 
@@ -154,6 +219,10 @@ class MainWindowWithSessionManagement(MainWindowWithProgressDialogs):
         a session to load, if any sessions are present in the directory saved in the settings.
         If they select a session, it will be loaded. If they select "New Session",
         a new session will be created.
+
+        If the sessions directory contains the journal of a session which was autosaved but
+        not saved by an application which is no longer running, e.g. because it crashed, the
+        user is first asked whether to recover it.
         '''
 
         if self.settings.value('sessions_folder') is None:
@@ -166,24 +235,25 @@ class MainWindowWithSessionManagement(MainWindowWithProgressDialogs):
                 self.createSessionsDirectorySelectionDialog(new_session=True)
             else:
                 self.sessions_directory = session_folder_name
-                self.createSessionSelector()
+                journal = self.readAutosave()
+                if journal is None:
+                    self.createSessionSelector()
+                else:
+                    self.RecoverSessionWindow = self.createRecoverSessionDialog(journal)
 
     def createSessionSelector(self):
         ''''
         Create a LoadSessionDialog, populated with the names of the sessions
         saved in the current working directory.
+        The sessions are listed from the index of the sessions directory, see
+        `eqt.io.index_sessions`, which only scans its top level.
 
         If no sessions exist, create a new session
         '''
-        zip_folders = []
-        for _, _, f in os.walk(self.sessions_directory):
-            for _file in f:
-                if '.zip' in _file:
-                    array = _file.split("_")
-                    if (len(array) > 1):
-                        date = _file.split("_")[-1]
-                        name = _file.replace("_" + date, "") + " " + date.strip(".zip")
-                        zip_folders.append(name)
+        sessions = index_sessions(self.sessions_directory)
+        zip_folders = [
+            f"{session['name']} {session['timestamp']}" for session in sessions.values()
+            if session['name'] is not None]
 
         if len(zip_folders) == 0:
             self.loadSessionNew()
@@ -326,6 +396,7 @@ class MainWindowWithSessionManagement(MainWindowWithProgressDialogs):
         self.createUnknownProgressWindow(process_name)
         config_worker = Worker(self.loadSessionConfig, folder=folder_name)
         config_worker.signals.finished.connect(lambda: self.finishLoadConfig(process_name))
+        config_worker.signals.finished.connect(self.startSessionExtraction)
         self.threadpool.start(config_worker)
         self.SessionSelectionWindow.close()
 
@@ -340,11 +411,16 @@ class MainWindowWithSessionManagement(MainWindowWithProgressDialogs):
         if not os.path.isdir(session_folder_path):
             os.mkdir(session_folder_path)
         self.current_session_folder = os.path.abspath(session_folder_path)
+        self.session_archive = None
+        self._unextracted_session_files = set()
 
     def loadSessionConfig(self, folder, **kwargs):
         '''
         Unzips a session folder and saves the contents of the .json session file to
         self.config.
+        The session.json file is read straight from the archive. If
+        `self.lazy_session_loading` is `True`, the other files are not extracted yet:
+        see `startSessionExtraction` and `getSessionFile`.
 
 
         Parameters
@@ -357,20 +433,100 @@ class MainWindowWithSessionManagement(MainWindowWithProgressDialogs):
         date_and_time = selected_text.split(' ')[-1]
         selected_folder = ""
 
-        for _, _, f in os.walk(self.sessions_directory):
-            for _file in f:
-                if date_and_time + '.zip' in _file:
-                    selected_folder = os.path.join(self.sessions_directory, _file)
-                    break
+        for archive in index_sessions(self.sessions_directory):
+            if date_and_time + '.zip' in archive:
+                selected_folder = os.path.join(self.sessions_directory, archive)
+                break
 
-        shutil.unpack_archive(selected_folder, selected_folder[:-4])
         loaded_folder = selected_folder[:-4]
+        os.makedirs(loaded_folder, exist_ok=True)
         self.current_session_folder = loaded_folder
+        self.session_archive = selected_folder
+
+        with zipfile.ZipFile(selected_folder) as zipper:
+            self.config = json.loads(zipper.read("session.json"))
+            self._unextracted_session_files = self._listSessionFiles(zipper)
+
+        if not self.lazy_session_loading:
+            self.extractSessionFiles()
 
-        json_filename = os.path.join(self.current_session_folder, "session.json")
+    def _listSessionFiles(self, zipper):
+        '''Returns the names of the session files in an open session archive.'''
+        return {
+            info.filename
+            for info in zipper.infolist() if not info.is_dir() and info.filename != MANIFEST_NAME}
 
-        with open(json_filename) as tmp:
-            self.config = json.load(tmp)
+    def startSessionExtraction(self):
+        '''
+        Extracts the files of the loaded session which have not been extracted yet
+        in a thread. This is called after `finishLoadConfig` when loading a session.
+        '''
+        if self._unextracted_session_files:
+            # behind any other work, as `getSessionFile` extracts files as soon as needed
+            self.startWorker(Worker(self.extractSessionFiles), priority=-1)
+
+    def extractSessionFiles(self, arcnames=None, **kwargs):
+        '''
+        Extracts files of the loaded session from `self.session_archive` into
+        `self.current_session_folder`, unless they have already been extracted.
+        This may be called from any thread.
+
+        Parameters
+        ----------
+        arcnames : list of str, optional
+            The names of the files in the archive, relative to the session folder.
+            If `None`, all the files are extracted.
+        '''
+        if arcnames is None:
+            arcnames = sorted(self._unextracted_session_files)
+        if not self._unextracted_session_files.intersection(arcnames):
+            return
+        # the archive is opened and its manifest read once for all the files
+        with zipfile.ZipFile(self.session_archive) as zipper:
+            manifest = read_manifest(zipper)
+            for arcname in arcnames:
+                # one file at a time, so that `getSessionFile` does not wait for all of them
+                with self._session_extraction_lock:
+                    if arcname in self._unextracted_session_files:
+                        extract_member(zipper, arcname, self.current_session_folder, manifest)
+                        self._unextracted_session_files.discard(arcname)
+
+    def getSessionFile(self, arcname):
+        '''
+        Returns the path of a file in the current session folder, extracting it from the
+        session archive first if needed.
+
+        Parameters
+        ----------
+        arcname : str
+            The name of the file, relative to the session folder, e.g. 'session.json'.
+        '''
+        self.extractSessionFiles([arcname])
+        return os.path.join(self.current_session_folder, arcname)
+
+    def mapSessionFile(self, arcname):
+        '''
+        Returns a read-only `memoryview` of a file in the session archive, memory-mapped from
+        `self.session_archive` without extracting it. The file must have been saved
+        uncompressed, e.g. with `compress=False` or because its extension is in
+        `eqt.io.PRECOMPRESSED_EXTENSIONS`.
+        For example, raw volume data can be viewed as an array with `numpy.frombuffer`,
+        without copying it into memory.
+
+        Parameters
+        ----------
+        arcname : str
+            The name of the file, relative to the session folder.
+
+        Raises
+        ------
+        RuntimeError
+            If the current session has not been saved to or loaded from an archive yet.
+        '''
+        if self.session_archive is None:
+            raise RuntimeError(
+                f'Cannot map {arcname}: the current session has no archive until it is saved')
+        return map_member(self.session_archive, arcname)
 
     def finishLoadConfig(self, process_name):
         '''
@@ -448,10 +604,10 @@ class MainWindowWithSessionManagement(MainWindowWithProgressDialogs):
         Called when the user clicks 'Save' in the save dialog.
         This saves the session and then closes the dialog.
         '''
-        compress = dialog.widgets['compress_field'].isChecked()
+        compress, compresslevel = dialog.getCompression()
         dialog.close()
         session_name = dialog.widgets['session_name_field'].text()
-        self.runSaveSessionWorker(session_name, compress, None)
+        self.runSaveSessionWorker(session_name, compress, None, compresslevel)
 
     def saveDialogRejected(self, dialog):
         '''
@@ -466,10 +622,10 @@ class MainWindowWithSessionManagement(MainWindowWithProgressDialogs):
         This saves the session and then closes the app.
         '''
         self.should_really_close = True
-        compress = dialog.widgets['compress_field'].isChecked()
+        compress, compresslevel = dialog.getCompression()
         session_name = dialog.widgets['session_name_field'].text()
         dialog.close()
-        self.runSaveSessionWorker(session_name, compress, QCloseEvent())
+        self.runSaveSessionWorker(session_name, compress, QCloseEvent(), compresslevel)
 
     def saveQuitDialogRejected(self, dialog):
         '''
@@ -481,7 +637,7 @@ class MainWindowWithSessionManagement(MainWindowWithProgressDialogs):
         self.should_really_close = True
         self.close()
 
-    def runSaveSessionWorker(self, session_name, compress, event):
+    def runSaveSessionWorker(self, session_name, compress, event, compresslevel=None):
         '''
         Runs self.saveSession in a thread.
 
@@ -493,29 +649,71 @@ class MainWindowWithSessionManagement(MainWindowWithProgressDialogs):
 
         If the event is anything else, then the app will not be closed, by calling
         self.closeSaveWindow.
+
+        The save can be cancelled from the progress window, in which case
+        self.saveSessionCancelled is called instead, and the app is not closed.
         '''
         process_name = 'Save Session'
 
         self.process_finished = False
-        self.createUnknownProgressWindow(process_name, "Saving", "Saving Session")
-
-        saveSession_worker = Worker(self.saveSession, session_name, compress)
+        saveSession_worker = Worker(self.saveSession, session_name, compress,
+                                    compresslevel=compresslevel)
+        self.createUnknownProgressWindow(process_name, "Saving", "Saving Session",
+                                         cancel_method=saveSession_worker.cancel)
+
+        saveSession_worker.signals.progress.connect(
+            self.progress_windows[process_name].update_percentage)
+        saveSession_worker.signals.cancelled.connect(
+            lambda: self.saveSessionCancelled(process_name))
         if isinstance(event, QCloseEvent):
-            saveSession_worker.signals.finished.connect(
+            saveSession_worker.signals.result.connect(
                 lambda: self.removeTempAndClose(process_name))
+            saveSession_worker.signals.error.connect(lambda: self.removeTempAndClose(process_name))
         else:
-            saveSession_worker.signals.finished.connect(lambda: self.closeSaveWindow(process_name))
+            saveSession_worker.signals.result.connect(lambda: self.closeSaveWindow(process_name))
+            saveSession_worker.signals.error.connect(lambda: self.closeSaveWindow(process_name))
         self.threadpool.start(saveSession_worker)
 
-    def saveSession(self, session_name, compress, **kwargs):
+    def saveSessionCancelled(self, process_name):
+        '''
+        Called when saving the session has been cancelled. Closes the progress window,
+        leaving the app open. Any previous archive of the session is left untouched.
+        '''
+        self.should_really_close = False
+        self.finishProcess(process_name)
+
+    def saveSession(self, session_name, compress, compresslevel=None, **kwargs):
         '''
         Save the session to a zip file
         The zip file contains the session.json file and the nxs files, and any files
-        already in the session folder
-        '''
-        self.moveSessionFolder(session_name)
+        already in the session folder.
+        `compress` and `compresslevel` are passed to `eqt.io.zip_directory`: files which are
+        already compressed, such as .nxs files, are stored as they are.
+        If run by a `Worker`, the percentage of the session saved so far is emitted through
+        its `progress_callback`, and cancelling the worker stops saving by raising
+        `concurrent.futures.CancelledError`. If the session folder has to be copied to the
+        sessions directory on another filesystem, copying it takes the first half of the
+        progress and zipping it the second half.
+        If `self.incremental_session_saves` is `True`, files which are unchanged since
+        `self.session_archive` was saved are copied from it rather than compressed again.
+        '''
+        self.extractSessionFiles()
+        move_progress = zip_progress = kwargs.get('progress_callback')
+        if move_progress is not None and not is_same_filesystem(self.current_session_folder,
+                                                                self.sessions_directory):
+            move_progress = _ProgressPhase(zip_progress, 0, 50)
+            zip_progress = _ProgressPhase(zip_progress, 50, 100)
+        self.moveSessionFolder(session_name, progress_callback=move_progress,
+                               cancel_event=kwargs.get('cancel_token'))
         self.saveSessionConfigToJson()
-        zip_directory(self.current_session_folder, compress)
+        incremental = self.incremental_session_saves
+        zip_directory(self.current_session_folder, compress, workers=self.session_zip_workers,
+                      manifest=incremental,
+                      base_archive=self.session_archive if incremental else None,
+                      compresslevel=compresslevel, progress_callback=zip_progress,
+                      cancel_event=kwargs.get('cancel_token'))
+        self.session_archive = f'{self.current_session_folder}.zip'
+        self.discardAutosave(self._saved_session_config)
 
     def getSessionConfig(self):
         '''
@@ -527,18 +725,26 @@ class MainWindowWithSessionManagement(MainWindowWithProgressDialogs):
         '''
         return {}
 
-    def moveSessionFolder(self, session_name):
+    def moveSessionFolder(self, session_name, progress_callback=None, cancel_event=None):
         '''
         Creates a new session folder, and moves the current session folder to it.
         Saves new session folder as self.current_session_folder
         Moves into the new session folder
+
+        If the current session folder is on another filesystem than the sessions directory,
+        its files are copied concurrently, and the percentage copied is emitted through
+        `progress_callback`. Copying stops once `cancel_event` is set, see
+        `eqt.io.move_directory`.
         '''
 
         now_string = datetime.now().strftime("%d-%m-%Y-%H-%M")
         new_folder_to_save_to = os.path.join(self.sessions_directory,
                                              session_name + "_" + now_string)
-        shutil.move(self.current_session_folder, new_folder_to_save_to)
-        self.current_session_folder = new_folder_to_save_to
+        self.current_session_folder = move_directory(self.current_session_folder,
+                                                     new_folder_to_save_to,
+                                                     workers=self.session_zip_workers,
+                                                     progress_callback=progress_callback,
+                                                     cancel_event=cancel_event)
 
     def saveSessionConfigToJson(self):
         '''
@@ -547,6 +753,8 @@ class MainWindowWithSessionManagement(MainWindowWithProgressDialogs):
         session_file = os.path.join(self.current_session_folder, "session.json")
 
         self.config = self.getSessionConfig()
+        # the config which is saved, so that it is not autosaved again until it changes
+        self._saved_session_config = json.dumps(self.config)
 
         self.config['datetime'] = datetime.now().strftime("%d-%m-%Y-%H-%M")
 
@@ -569,6 +777,12 @@ class MainWindowWithSessionManagement(MainWindowWithProgressDialogs):
         '''
         Removes the temp directory for this session.
         '''
+        with self._session_extraction_lock:
+            # stop extracting files into the folder
+            self._unextracted_session_files.clear()
+        self.autosave_timer.stop()
+        self._autosave_debounce_timer.stop()
+        self.discardAutosave()
         if hasattr(self, 'current_session_folder'):
             try:
                 shutil.rmtree(self.current_session_folder)
@@ -585,3 +799,209 @@ class MainWindowWithSessionManagement(MainWindowWithProgressDialogs):
         # out of it for zipping etc. :
         self.finishProcess(process_name)
         self.SaveWindow.close()
+
+    # Autosaving and Recovering Sessions ---------------------------------------
+
+    def scheduleAutosave(self):
+        '''
+        Autosaves the session after `self.autosave_delay` milliseconds. This can be called
+        whenever the session changes: calling it again before then postpones the autosave,
+        so that a burst of changes is only autosaved once.
+        '''
+        self._autosave_debounce_timer.start(self.autosave_delay)
+
+    def autosave(self):
+        '''
+        Autosaves the session config to the journal in the sessions directory, if it has
+        changed since it was last autosaved or saved.
+        The config is snapshotted by calling `getSessionConfig` on the GUI thread, and the
+        journal is written in a thread. While a journal is being written, only the latest
+        snapshot is kept to be written next.
+        '''
+        self._autosave_debounce_timer.stop()
+        if (self.sessions_directory is None or not hasattr(self, 'current_session_folder')
+                or not getattr(self, 'process_finished', True)
+                or not os.path.isdir(self.current_session_folder)):
+            # there is no session, or it is being loaded or saved
+            return
+        config = json.dumps(self.getSessionConfig())
+        with self._autosave_lock:
+            if config == self._autosave_last:
+                return
+            self._autosave_last = config
+            journal = {
+                'host': socket.gethostname(), 'pid': os.getpid(),
+                'session_folder': self.current_session_folder,
+                'session_archive': self.session_archive,
+                'autosaved': datetime.now().strftime("%d-%m-%Y-%H-%M-%S"), 'config': config}
+            autosave = (journal, self._autosave_generation)
+        if self._autosave_running:
+            self._autosave_pending = autosave
+        else:
+            self._startAutosaveWorker(autosave)
+
+    def _startAutosaveWorker(self, autosave):
+        '''Writes an autosave journal in a thread.'''
+        self._autosave_running = True
+        worker = Worker(self._writeAutosave, *autosave)
+        worker.signals.finished.connect(self._finishAutosave)
+        self.startWorker(worker, priority=-1)
+
+    def _writeAutosave(self, journal, generation, **kwargs):
+        '''Writes an autosave journal, unless the autosave was discarded since.'''
+        data = json.dumps(dict(journal, config=json.loads(journal['config']))).encode()
+        # the GUI thread only waits for `_autosave_lock`, which is not held while writing
+        with self._autosave_write_lock:
+            with self._autosave_lock:
+                if generation != self._autosave_generation:
+                    return
+            write_file_atomically(self._autosaveJournalPath(), data)
+
+    def _finishAutosave(self):
+        '''Writes the latest snapshot taken while the previous journal was being written.'''
+        self._autosave_running = False
+        autosave, self._autosave_pending = self._autosave_pending, None
+        if autosave is not None:
+            self._startAutosaveWorker(autosave)
+
+    def _autosaveJournalPath(self):
+        '''Returns the path of this application's autosave journal in the sessions directory.'''
+        return os.path.join(self.sessions_directory, autosave_journal_name())
+
+    def discardAutosave(self, saved_config=None):
+        '''
+        Removes the autosave journal of this application, e.g. when the session is saved, and
+        cancels any autosave in progress. This may be called from any thread.
+
+        Parameters
+        ----------
+        saved_config : str, optional
+            The JSON of the session config which was saved, which is not autosaved again.
+        '''
+        with self._autosave_write_lock, self._autosave_lock:
+            self._autosave_generation += 1
+            self._autosave_last = saved_config
+            if self.sessions_directory is not None:
+                try:
+                    os.remove(self._autosaveJournalPath())
+                except FileNotFoundError:
+                    pass
+
+    def readAutosave(self):
+        '''
+        Returns the most recent autosave journal in the sessions directory which can be
+        recovered, or `None` if there is none.
+        Each application autosaves to its own journal, so the journals of applications which
+        are still running are skipped, as well as those written on other hosts, as whether
+        they are still running cannot be checked.
+
+        Returns
+        -------
+        dict
+            Format: {'host': str, 'pid': int, 'session_folder': str,
+            'session_archive': str | None, 'autosaved': str, 'config': dict,
+            'journal': str}, where `journal` is the path of the journal file.
+        '''
+        host = socket.gethostname()
+        journals = []
+        try:
+            with os.scandir(self.sessions_directory) as entries:
+                for entry in entries:
+                    if not (entry.name.startswith(AUTOSAVE_JOURNAL_PREFIX)
+                            and entry.name.endswith('.json')):
+                        continue
+                    try:
+                        with open(entry.path) as f:
+                            journal = json.load(f)
+                        mtime_ns = entry.stat().st_mtime_ns
+                    except (OSError, ValueError):
+                        continue
+                    if journal.get('host') == host and not is_process_running(journal['pid']):
+                        journals.append((mtime_ns, dict(journal, journal=entry.path)))
+        except OSError:
+            return None
+        return max(journals, key=lambda journal: journal[0])[1] if journals else None
+
+    def createRecoverSessionDialog(self, journal):
+        '''
+        Create a RecoverSessionDialog, which asks the user whether to recover the session
+        autosaved in `journal`, or to discard it and select a session as usual.
+        '''
+        dialog = RecoverSessionDialog(parent=self, session_folder=journal['session_folder'],
+                                      autosaved=journal['autosaved'])
+        dialog.Ok.clicked.connect(lambda: self.recoverSessionDialogAccepted(dialog, journal))
+        dialog.Cancel.clicked.connect(lambda: self.recoverSessionDialogRejected(dialog, journal))
+        dialog.open()
+
+        return dialog
+
+    def recoverSessionDialogAccepted(self, dialog, journal):
+        '''
+        Called when the user clicks 'Recover' in the recover session dialog.
+        '''
+        dialog.close()
+        self.recoverSession(journal)
+
+    def recoverSessionDialogRejected(self, dialog, journal):
+        '''
+        Called when the user clicks 'Discard' in the recover session dialog.
+        This removes the autosaved session folder, if it is in the sessions directory, and
+        the journal, then creates the session selector.
+        '''
+        dialog.close()
+        if is_in_directory(journal['session_folder'], self.sessions_directory):
+            shutil.rmtree(journal['session_folder'], ignore_errors=True)
+        try:
+            os.remove(journal['journal'])
+        except FileNotFoundError:
+            pass
+        self.createSessionSelector()
+
+    def recoverSession(self, journal):
+        '''
+        Recovers the session autosaved in `journal`: its session folder is used as the
+        current session folder, and its config is loaded as when loading a session.
+        Files of the session archive which are missing from the session folder, e.g.
+        because they had not been extracted yet, are extracted.
+        The journal becomes the journal of this application, and is kept until the session
+        is saved or discarded.
+        '''
+        try:
+            os.replace(journal['journal'], self._autosaveJournalPath())
+        except FileNotFoundError:
+            pass
+        process_name = "Recovering Session"
+        self.process_finished = False
+        self.createUnknownProgressWindow(process_name)
+
+        self.current_session_folder = journal['session_folder']
+        self.session_archive = journal['session_archive']
+        os.makedirs(self.current_session_folder, exist_ok=True)
+        self._unextracted_session_files = set()
+        if self.session_archive is not None and os.path.isfile(self.session_archive):
+            with zipfile.ZipFile(self.session_archive) as zipper:
+                self._unextracted_session_files = {
+                    arcname
+                    for arcname in self._listSessionFiles(zipper)
+                    if not os.path.exists(os.path.join(self.current_session_folder, arcname))}
+        if not self.lazy_session_loading:
+            self.extractSessionFiles()
+
+        self.config = journal['config']
+        self._autosave_last = json.dumps(self.config)
+        self.finishLoadConfig(process_name)
+        self.startSessionExtraction()
+
+
+class _ProgressPhase:
+    '''
+    Emits the percentages of a phase of a process through `callback`, scaled to the range
+    `start` to `end` of the percentage of the whole process.
+    '''
+    def __init__(self, callback, start, end):
+        self.callback = callback
+        self.start = start
+        self.end = end
+
+    def emit(self, percentage):
+        self.callback.emit(self.start + percentage * (self.end - self.start) // 100)
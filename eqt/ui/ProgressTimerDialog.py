@@ -1,16 +1,26 @@
 import time
-from time import sleep
+from concurrent import futures
 
 from qtpy import QtCore
-from qtpy.QtCore import Qt, QThreadPool
+from qtpy.QtCore import Qt
 from qtpy.QtWidgets import QProgressDialog
 
-from ..threading import Worker
+from ..threading import Worker, get_threadpool
 
 
 class ProgressTimerDialog(QProgressDialog):
     def __init__(self, process_name, cancelText="Cancel", parent=None, flags=None,
                  cancel_method=None):
+        '''
+        A progress dialog which displays the time elapsed since it was shown.
+        The timers of all progress dialogs run on the shared thread pool named
+        'ProgressTimerDialog', see `eqt.threading.get_threadpool`, which grows so that
+        the timers of all the dialogs shown at once run.
+
+        If `cancel_method` is given, a cancel button is shown which calls it. To stop a process
+        run by a `eqt.threading.Worker`, pass `worker.cancel`, which sets the `cancel_token`
+        passed to the worker's function.
+        '''
         if flags is None:
             flags = Qt.WindowFlags()
         labelText = f"Running {process_name}"
@@ -28,32 +38,55 @@ class ProgressTimerDialog(QProgressDialog):
         else:
             self.canceled.connect(cancel_method)
 
-        self.threadpool = QThreadPool()
+        self.threadpool = get_threadpool('ProgressTimerDialog')
         self.process_name = process_name
         self.run_cancelled = False
 
     def update_progress_bar(self, value):
         self.setLabelText(f"Running {self.process_name} ... {value}s")
 
+    def update_percentage(self, value):
+        '''
+        Shows the percentage of the process which is done, turning the busy indicator
+        into a progress bar. The elapsed time is still displayed in the label.
+        '''
+        if self.maximum() != 100:
+            # the dialog is closed by `close`, not when the value first reaches the maximum
+            self.setAutoReset(False)
+            self.setAutoClose(False)
+            self.setRange(0, 100)
+        self.setValue(value)
+
     def show(self):
         QProgressDialog.show(self)
         worker = Worker(self.timing_process)
+        # owned by the dialog, so it can still be taken from or waited for once it has run
+        worker.setAutoDelete(False)
         worker.signals.progress.connect(self.update_progress_bar)
         self.worker = worker
-        self.threadpool.start(worker)
+        # each timer runs until its dialog is closed, so it must not wait for a free thread
+        if not self.threadpool.tryStart(worker):
+            self.threadpool.setMaxThreadCount(self.threadpool.maxThreadCount() + 1)
+            self.threadpool.start(worker)
 
     def timing_process(self, **kwargs):
         progress_callback = kwargs.get('progress_callback')
+        cancel_token = kwargs.get('cancel_token')
         t0 = time.time()
         while not self.run_cancelled:
             progress_callback.emit(round(time.time() - t0))
-            sleep(1)
+            cancel_token.wait(1)
 
     def close(self):
         # If we don't cause timing_process to stop
         # running then it continues forever,
         # even after the progress window closes.
         self.run_cancelled = True
-        # need to wait for the thread to finish:
-        self.threadpool.waitForDone()
+        if hasattr(self, 'worker'):
+            self.worker.cancel()
+            # need to wait for the thread to finish, unless it has not started yet:
+            if self.threadpool.tryTake(self.worker):
+                self.worker.future.cancel()
+            else:
+                futures.wait([self.worker.future])
         QProgressDialog.close(self)
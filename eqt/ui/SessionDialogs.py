@@ -1,4 +1,5 @@
 import os
+import zipfile
 
 from qtpy import QtWidgets
 from qtpy.QtWidgets import (
@@ -9,8 +10,10 @@ from qtpy.QtWidgets import (
     QLineEdit,
     QMessageBox,
     QPushButton,
+    QSpinBox,
 )
 
+from ..io import COMPRESSION_TYPES
 from . import FormDialog
 
 
@@ -19,6 +22,8 @@ class SaveSessionDialog(FormDialog):
         '''
         A dialog to save a session.
         Prompts the user for a name for the session, and whether to compress the files.
+        If so, the compression method and level can be chosen, trading off save time
+        against disk usage.
 
         Parameters
         ----------
@@ -42,10 +47,48 @@ class SaveSessionDialog(FormDialog):
         qwidget.setText("Compress Files")
         qwidget.setEnabled(True)
         qwidget.setChecked(False)
+        qwidget.toggled.connect(self._updateCompressionWidgets)
         self.addSpanningWidget(qwidget, 'compress')
 
+        qwidget = QComboBox(self.groupBox)
+        qwidget.addItems(list(COMPRESSION_TYPES))
+        qwidget.currentTextChanged.connect(self._updateCompressionWidgets)
+        self.addWidget(qwidget, "Compression method:", 'compress_type')
+
+        qwidget = QSpinBox(self.groupBox)
+        qwidget.setRange(1, 9)
+        qwidget.setValue(6)
+        qwidget.setToolTip("1: fastest, 9: smallest")
+        self.addWidget(qwidget, "Compression level:", 'compress_level')
+
+        self._updateCompressionWidgets()
         self.Ok.setText('Save')
 
+    def _updateCompressionWidgets(self):
+        '''Enables the compression method and level widgets only when they apply.'''
+        compress = self.widgets['compress_field'].isChecked()
+        self.widgets['compress_type_field'].setEnabled(compress)
+        self.widgets['compress_level_field'].setEnabled(
+            compress and self.getCompression()[0] != zipfile.ZIP_LZMA)
+
+    def getCompression(self):
+        '''
+        Returns the compression selected by the user.
+
+        Returns
+        -------
+        tuple
+            `(compress, compresslevel)` to be passed to `eqt.io.zip_directory`. `compress` is
+            `False` if the files are not to be compressed, otherwise the `zipfile` compression
+            method. `compresslevel` is `None` if it does not apply.
+        '''
+        if not self.widgets['compress_field'].isChecked():
+            return False, None
+        compress_type = COMPRESSION_TYPES[self.widgets['compress_type_field'].currentText()]
+        if compress_type == zipfile.ZIP_LZMA:
+            return compress_type, None
+        return compress_type, self.widgets['compress_level_field'].value()
+
 
 class SessionDirectorySelectionDialog(FormDialog):
     def __init__(self, parent=None, app_name=None):
@@ -132,6 +175,37 @@ class LoadSessionDialog(FormDialog):
         self.Cancel.setText('New Session')
 
 
+class RecoverSessionDialog(FormDialog):
+    def __init__(self, parent=None, title="Recover Session", session_folder=None, autosaved=None):
+        '''
+        A dialog to recover a session which was autosaved but not saved before the application
+        was closed, e.g. because it crashed.
+        Prompts the user to recover the session or to discard it.
+
+        Parameters
+        ----------
+        parent : QWidget
+            The parent widget.
+        title : str
+            The title of the dialog.
+        session_folder : str
+            The folder of the autosaved session.
+        autosaved : str
+            The date and time when the session was last autosaved.
+        '''
+        FormDialog.__init__(self, parent, title)
+        self.parent = parent
+
+        self.addSpanningWidget(
+            QLabel('A session was not saved before the application was last closed.'),
+            'recover_title')
+        self.addWidget(QLabel(os.path.basename(str(session_folder))), 'Session:', 'session')
+        self.addWidget(QLabel(str(autosaved)), 'Last autosaved:', 'autosaved')
+
+        self.Ok.setText('Recover')
+        self.Cancel.setText('Discard')
+
+
 class WarningDialog(QMessageBox):
     def __init__(self, parent=None, window_title=None, message=None, detailed_text=None):
         '''
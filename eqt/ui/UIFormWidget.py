@@ -1,9 +1,95 @@
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Tuple
 from warnings import warn
 
 from qtpy import QtWidgets
 
 from .UISliderWidget import UISliderWidget
 
+# widget type: (getter, setter, name of the change signal or None)
+_WidgetValueAccessors = Tuple[Callable[..., Any], Callable[..., Any], Optional[str]]
+_widget_value_accessors: Dict[type, _WidgetValueAccessors] = {}
+_widget_value_accessor_cache: Dict[type, Optional[_WidgetValueAccessors]] = {}
+
+
+def _method(name):
+    '''Returns a function calling the method `name` of a widget, so overrides are respected.'''
+    def call(widget, *args):
+        return getattr(widget, name)(*args)
+
+    call.__name__ = name
+    return call
+
+
+def register_widget_state(widget_type, getter, setter, signal=None):
+    '''
+    Registers how to get and set the 'value' in the state of a type of widget, used by
+    `getWidgetState` and `applyWidgetState`. The registration also applies to subclasses of
+    `widget_type`, unless they are registered themselves.
+
+    For example, to save the date of a QDateEdit::
+
+        register_widget_state(QtWidgets.QDateEdit, 'date', 'setDate', 'dateChanged')
+
+    Parameters
+    ----------
+    widget_type : type
+        The class of the widgets.
+    getter : str or callable
+        The name of the method returning the value, or a function taking the widget and
+        returning the value.
+    setter : str or callable
+        The name of the method setting the value, or a function taking the widget and the value.
+    signal : str, optional
+        The name of the signal emitted when the value changes, used by the form to track which
+        widgets changed (see `getChangedWidgetStates`). Without it, the value of the widgets is
+        compared every time.
+    '''
+    _widget_value_accessors[widget_type] = (_method(getter) if isinstance(getter, str) else getter,
+                                            _method(setter) if isinstance(setter, str) else setter,
+                                            signal)
+    _widget_value_accessor_cache.clear()
+
+
+def unregister_widget_state(widget_type):
+    '''Removes the registration of a type of widget made with `register_widget_state`.'''
+    del _widget_value_accessors[widget_type]
+    _widget_value_accessor_cache.clear()
+
+
+def _get_widget_value_accessors(widget_type):
+    '''
+    Returns the (getter, setter, signal) registered for the closest class in the MRO of
+    `widget_type`, or None. The result is cached per class.
+    '''
+    try:
+        return _widget_value_accessor_cache[widget_type]
+    except KeyError:
+        pass
+    accessors = next((_widget_value_accessors[cls]
+                      for cls in widget_type.__mro__ if cls in _widget_value_accessors), None)
+    _widget_value_accessor_cache[widget_type] = accessors
+    return accessors
+
+
+for _widget_type, _getter, _setter, _signal in (
+    (QtWidgets.QLabel, 'text', 'setText', None),
+    (QtWidgets.QCheckBox, 'isChecked', 'setChecked', 'toggled'),
+    (QtWidgets.QPushButton, 'isChecked', 'setChecked', 'toggled'),
+    (QtWidgets.QRadioButton, 'isChecked', 'setChecked', 'toggled'),
+    (QtWidgets.QComboBox, 'currentIndex', 'setCurrentIndex', 'currentIndexChanged'),
+    (QtWidgets.QSlider, 'value', 'setValue', 'valueChanged'),
+    (UISliderWidget, 'value', 'setValue', None),
+    (QtWidgets.QSpinBox, 'value', 'setValue', 'valueChanged'),
+    (QtWidgets.QDoubleSpinBox, 'value', 'setValue', 'valueChanged'),
+    (QtWidgets.QLineEdit, 'text', 'setText', 'textChanged'),
+    (QtWidgets.QTextEdit, 'toPlainText', 'setPlainText', 'textChanged'),
+    (QtWidgets.QPlainTextEdit, 'toPlainText', 'setPlainText', 'textChanged'),
+):
+    register_widget_state(_widget_type, _getter, _setter, _signal)
+del _widget_type, _getter, _setter, _signal
+
 
 class UIFormWidget:
     '''
@@ -47,6 +133,23 @@ class UIFormWidget:
         self.widgets = {}
         self.widget_states = {}
         self.default_widget_states = {}
+        # reverse index of `widgets`, by widget identity
+        self._widget_keys = {}
+        # cache of the row of each widget name in the form layout
+        self._widget_rows = {}
+        # keys of the widgets whose default states are saved at the end of `deferUpdates`
+        self._deferred_state_keys = None
+        # keys of the widgets whose value changed since the states were saved or restored
+        self._dirty_keys = set()
+        # accessors of the widgets whose change signal is connected, see `register_widget_state`
+        self._tracked_accessors = {}
+        # (enabled, visible, accessors, untracked value) of each widget when the states were saved
+        # or restored
+        self._widget_flags = None
+        self._layout_changed = True
+        # keys of the widgets whose saved state differs from their default state, or None if
+        # they have to be compared again
+        self._non_default_keys = None
 
     @property
     def num_widgets(self):
@@ -93,14 +196,114 @@ class UIFormWidget:
                 if formLayout.indexOf(qlabel) != -1:
                     raise KeyError(
                         f"The widget {qlabel} is already in use. Create another QLabel.")
+        num_rows = formLayout.rowCount()
+        if 0 <= row < num_rows:
+            self._shiftWidgetRows(row, 1)
+        else:
+            row = num_rows
+        self._widget_rows[name] = row
+        if qlabel is not None:
             formLayout.insertRow(row, qlabel, qwidget)
-            self.widgets[f'{name}_label'] = qlabel
-            self.default_widget_states[f'{name}_label'] = self.getWidgetState(name, 'label')
+            self._addWidgetKey(f'{name}_label', qlabel)
+            self._saveDefaultWidgetState(f'{name}_label')
         else:
             formLayout.insertRow(row, qwidget)
 
-        self.widgets[f'{name}_field'] = qwidget
-        self.default_widget_states[f'{name}_field'] = self.getWidgetState(name, 'field')
+        self._addWidgetKey(f'{name}_field', qwidget)
+        self._saveDefaultWidgetState(f'{name}_field')
+
+    def _saveDefaultWidgetState(self, key):
+        '''Saves the default state of a widget, or defers it until the end of `deferUpdates`.'''
+        if self._deferred_state_keys is not None:
+            self._deferred_state_keys.append(key)
+        else:
+            self.default_widget_states[key] = self.getWidgetState(key)
+            self._non_default_keys = None
+
+    @contextmanager
+    def deferUpdates(self):
+        '''
+        Returns a context manager which disables the updates of the form while many widgets are
+        added or removed, and saves their default states in one pass at the end, e.g.::
+
+            with form.deferUpdates():
+                for name, qwidget in widgets.items():
+                    form.addWidget(qwidget, name, name)
+
+        If the form is visible, its group box is hidden inside the context, so that the new
+        widgets are shown and laid out together at the end instead of one at a time. The
+        default states of the new widgets are not available inside the context.
+        '''
+        if self._deferred_state_keys is not None:
+            # nested
+            yield
+            return
+        groupBox = self.uiElements['groupBox']
+        updates_enabled = self.updatesEnabled()
+        visible = groupBox.isVisible()
+        self.setUpdatesEnabled(False)
+        if visible:
+            groupBox.hide()
+        self._deferred_state_keys = []
+        try:
+            yield
+        finally:
+            keys, self._deferred_state_keys = self._deferred_state_keys, None
+            self.default_widget_states.update(
+                (key, self.getWidgetState(key)) for key in keys if key in self.widgets)
+            self._non_default_keys = None
+            if visible:
+                groupBox.show()
+            self.setUpdatesEnabled(updates_enabled)
+
+    def addWidgets(self, widgets):
+        '''
+        Adds several widgets at the end of the form layout, with the updates of the form disabled
+        (see `deferUpdates`).
+
+        Parameters
+        ----------
+        widgets : iterable of tuples
+            (qwidget, qlabel, name) for each widget, as passed to `addWidget`. If qlabel is
+            `None` the widget spans the full width of the form, as with `addSpanningWidget`.
+        '''
+        with self.deferUpdates():
+            for qwidget, qlabel, name in widgets:
+                self.insertWidget(-1, name, qwidget, qlabel)
+
+    def _addWidgetKey(self, key, qwidget):
+        '''
+        Adds a widget to the widgets dictionary and its reverse index, and tracks the changes
+        of its value.
+        '''
+        self.widgets[key] = qwidget
+        self._widget_keys[qwidget] = key
+        self._layout_changed = True
+        self._trackWidget(key, qwidget)
+
+    def _trackWidget(self, key, qwidget):
+        '''
+        Connects the change signal registered for the type of a widget, if any and not connected
+        yet, and returns the accessors of the widget.
+        '''
+        accessors = _get_widget_value_accessors(type(qwidget))
+        if (accessors is not None and accessors[2] is not None
+                and self._tracked_accessors.get(key) is not accessors):
+            getattr(qwidget, accessors[2]).connect(partial(self._markWidgetDirty, key))
+            self._tracked_accessors[key] = accessors
+        return accessors
+
+    def _markWidgetDirty(self, key, *args):
+        self._dirty_keys.add(key)
+
+    def _shiftWidgetRows(self, row, shift):
+        '''
+        Updates the cached rows of the widgets after inserting (`shift=1`) or removing
+        (`shift=-1`) the row `row` of the form layout.
+        '''
+        for name, widget_row in self._widget_rows.items():
+            if widget_row >= row:
+                self._widget_rows[name] = widget_row + shift
 
     def _popWidget(self, dictionary, name):
         '''
@@ -192,12 +395,21 @@ class UIFormWidget:
         '''
         widget_row = self.getWidgetRow(name)
         self.getWidget(name, 'field').setParent(None)
+        self._widget_rows.pop(name, None)
+        self._layout_changed = True
+        for role in ('field', 'label'):
+            self._dirty_keys.discard(f'{name}_{role}')
+            self._tracked_accessors.pop(f'{name}_{role}', None)
+        self._shiftWidgetRows(widget_row + 1, -1)
         if f'{name}_label' in self.widgets:
             self.getWidget(name, 'label').setParent(None)
             qwidget, qlabel = self._popWidget(self.widgets, name)
+            self._widget_keys.pop(qwidget, None)
+            self._widget_keys.pop(qlabel, None)
             self.uiElements['groupBoxFormLayout'].removeRow(widget_row)
             return qwidget, qlabel
         qwidget = self._popWidget(self.widgets, name)
+        self._widget_keys.pop(qwidget, None)
         self.uiElements['groupBoxFormLayout'].removeRow(widget_row)
         return qwidget
 
@@ -218,8 +430,19 @@ class UIFormWidget:
         Returns the widget row in the form layout by the widget name.
         This is the row of the widget in the form layout.
         '''
-        return self.uiElements['groupBoxFormLayout'].getWidgetPosition(self.getWidget(name,
-                                                                                      role))[0]
+        widget = self.getWidget(name, role)
+        formLayout = self.uiElements['groupBoxFormLayout']
+        row = self._widget_rows.get(name)
+        if row is not None:
+            # check the cached row, in case rows were added to the layout directly
+            for item_role in (QtWidgets.QFormLayout.FieldRole, QtWidgets.QFormLayout.LabelRole,
+                              QtWidgets.QFormLayout.SpanningRole):
+                item = formLayout.itemAt(row, item_role)
+                if item is not None and item.widget() is widget:
+                    return row
+        row = formLayout.getWidgetPosition(widget)[0]
+        self._widget_rows[name] = row
+        return row
 
     def setWidgetVisible(self, name, visible):
         '''
@@ -264,7 +487,9 @@ class UIFormWidget:
         Sets all of the entries 'visible' in the `default_widget_states` dictionary to be `True`.
         '''
         for state in self.default_widget_states.values():
-            state['visible'] = True
+            if not state['visible']:
+                state['visible'] = True
+                self._non_default_keys = None
 
     def getAllWidgetStates(self):
         '''
@@ -319,24 +544,9 @@ class UIFormWidget:
         else:
             name, role = self._getNameAndRoleFromWidget(widget)
         widget_state = {}
-        if isinstance(widget, QtWidgets.QLabel):
-            widget_state['value'] = widget.text()
-        elif isinstance(widget, (QtWidgets.QCheckBox, QtWidgets.QPushButton)):
-            widget_state['value'] = widget.isChecked()
-        elif isinstance(widget, QtWidgets.QComboBox):
-            widget_state['value'] = widget.currentIndex()
-        elif isinstance(widget, QtWidgets.QSlider):
-            widget_state['value'] = widget.value()
-        elif isinstance(widget, UISliderWidget):
-            widget_state['value'] = widget.value()
-        elif isinstance(widget, (QtWidgets.QDoubleSpinBox, QtWidgets.QSpinBox)):
-            widget_state['value'] = widget.value()
-        elif isinstance(widget, QtWidgets.QLineEdit):
-            widget_state['value'] = widget.text()
-        elif isinstance(widget, QtWidgets.QRadioButton):
-            widget_state['value'] = widget.isChecked()
-        elif isinstance(widget, (QtWidgets.QTextEdit, QtWidgets.QPlainTextEdit)):
-            widget_state['value'] = widget.toPlainText()
+        accessors = _get_widget_value_accessors(type(widget))
+        if accessors is not None:
+            widget_state['value'] = accessors[0](widget)
         widget_state['enabled'] = widget.isEnabled()
         widget_state['visible'] = widget.isVisible()
         widget_state['widget_row'] = self.getWidgetRow(name, role)
@@ -366,8 +576,13 @@ class UIFormWidget:
         -------------
         widget : qwidget
         '''
+        key = self._widget_keys.get(widget)
+        if key is not None and self.widgets.get(key) is widget:
+            return self._getNameAndRoleFromKey(key)
+        # the widgets dictionary was changed directly
         for key, value in self.widgets.items():
             if value == widget:
+                self._widget_keys[widget] = key
                 return self._getNameAndRoleFromKey(key)
         raise KeyError(f'There is no widget {widget} in the form.')
 
@@ -404,26 +619,9 @@ class UIFormWidget:
             elif key == 'visible':
                 widget.setVisible(value)
             elif key == 'value':
-                if isinstance(widget, QtWidgets.QLabel):
-                    widget.setText(value)
-                elif isinstance(widget, QtWidgets.QCheckBox):
-                    widget.setChecked(value)
-                elif isinstance(widget, QtWidgets.QComboBox):
-                    widget.setCurrentIndex(value)
-                elif isinstance(widget, (QtWidgets.QSlider)):
-                    widget.setValue(value)
-                elif isinstance(widget, (UISliderWidget)):
-                    widget.setValue(value)
-                elif isinstance(widget, (QtWidgets.QDoubleSpinBox, QtWidgets.QSpinBox)):
-                    widget.setValue(value)
-                elif isinstance(widget, QtWidgets.QPushButton):
-                    widget.setChecked(value)
-                elif isinstance(widget, QtWidgets.QLineEdit):
-                    widget.setText(value)
-                elif isinstance(widget, QtWidgets.QRadioButton):
-                    widget.setChecked(value)
-                elif isinstance(widget, (QtWidgets.QTextEdit, QtWidgets.QPlainTextEdit)):
-                    widget.setPlainText(value)
+                accessors = _get_widget_value_accessors(type(widget))
+                if accessors is not None:
+                    accessors[1](widget, value)
 
     def applyWidgetStates(self, states):
         '''
@@ -450,8 +648,114 @@ class UIFormWidget:
         '''
         Saves the state of all widgets currently present in the form.
         To later restore the states, use `restoreAllSavedWidgetStates()`.
+        If states were saved before, only the states of the widgets which changed since are
+        read (see `getChangedWidgetStates`).
         '''
-        self.widget_states = self.getAllWidgetStates()
+        if self._canTrackChanges():
+            states = self.getChangedWidgetStates()
+            self._updateSavedStates(states)
+        else:
+            states = self.widget_states = self.getAllWidgetStates()
+            self._non_default_keys = None
+        self._resetChangedWidgets(states)
+
+    def _updateSavedStates(self, states):
+        '''Updates the saved states of some widgets, and whether they differ from the defaults.'''
+        self.widget_states = {**self.widget_states, **states}
+        if self._non_default_keys is not None:
+            for key, state in states.items():
+                if state == self.default_widget_states.get(key):
+                    self._non_default_keys.discard(key)
+                else:
+                    self._non_default_keys.add(key)
+
+    def _canTrackChanges(self):
+        '''
+        Returns whether the changes since the states were saved can be tracked, i.e. states were
+        saved or restored since widgets were last added or removed.
+        '''
+        return (bool(self.widget_states) and not self._layout_changed
+                and self._widget_flags is not None
+                and self.widget_states.keys() == self.widgets.keys())
+
+    def _getWidgetFlags(self, key, widget, state=None):
+        '''
+        Returns whether a widget is enabled and visible, as in its state, the accessors of its
+        type, and its value if its changes are not tracked with a change signal. They are taken
+        from `state`, if it was just read, instead of reading the widget again.
+        '''
+        accessors = _get_widget_value_accessors(type(widget))
+        value = None
+        if accessors is not None and self._tracked_accessors.get(key) is not accessors:
+            # e.g. the type was registered after the widget was added, or has no change signal
+            value = accessors[0](widget) if state is None else state.get('value')
+        if state is None:
+            return widget.isEnabled(), widget.isVisible(), accessors, value
+        return state['enabled'], state['visible'], accessors, value
+
+    def _resetChangedWidgets(self, states=None):
+        '''
+        Starts tracking changes from the current states of the widgets, some of which may be
+        given in `states`, as just read.
+        '''
+        states = states or {}
+        self._dirty_keys.clear()
+        self._layout_changed = False
+        for key, widget in self.widgets.items():
+            self._trackWidget(key, widget)
+        self._widget_flags = {
+            key: self._getWidgetFlags(key, widget, states.get(key))
+            for key, widget in self.widgets.items()}
+
+    def getChangedWidgetStates(self):
+        '''
+        Returns the current states of the widgets whose state differs from the saved state, or
+        from the default state if no states were saved.
+
+        Only the widgets which changed since the states were last saved or restored are read:
+        the widgets whose value changed, which is tracked with the change signal of the widget
+        (see `register_widget_state`) or else by comparing values, and the widgets which were
+        enabled, disabled, shown or hidden. Changes made while the signals of a widget are
+        blocked are not tracked.
+
+        Returns
+        -------
+        dict
+            Format: {'name_field': {'value': str | bool | int, 'enabled': bool,
+            'visible': bool, 'widget_row': int}, ...}, like `getAllWidgetStates`.
+        '''
+        reference = self.widget_states or self.default_widget_states
+        if self._layout_changed or self._widget_flags is None:
+            keys = list(self.widgets)
+        else:
+            keys = [
+                key for key, widget in self.widgets.items() if key in self._dirty_keys
+                or self._widget_flags.get(key) != self._getWidgetFlags(key, widget)]
+        changed = {}
+        for key in keys:
+            state = self.getWidgetState(key)
+            if state != reference.get(key):
+                changed[key] = state
+        return changed
+
+    def applyWidgetStateChanges(self, states):
+        '''
+        Applies the given states to some of the form's widgets, e.g. those returned by
+        `getChangedWidgetStates`. Unlike `applyWidgetStates`, the other widgets are left as
+        they are.
+
+        Parameters
+        ----------
+        states : dict
+            Format: {'name_field': {'value': str | bool | int, 'enabled': bool, 'visible': bool,
+            'widget_row' : int}, ...}, with a subset of the keys of the widgets dictionary.
+        '''
+        unknown = set(states) - set(self.widgets)
+        if unknown:
+            raise KeyError(f"states={unknown} are not form widgets ({set(self.widgets)})")
+        for key, widget_state in states.items():
+            name, role = self._getNameAndRoleFromKey(key)
+            self.applyWidgetState(name, widget_state, role)
 
     def getWidgetStates(self):
         '''Deprecated. Use `getSavedWidgetStates`.'''
@@ -467,17 +771,54 @@ class UIFormWidget:
         '''Returns the saved default widget states.'''
         return self.default_widget_states
 
+    def getNonDefaultSavedWidgetStates(self):
+        '''
+        Returns the saved states of the widgets which differ from their default states, e.g. to
+        check whether the saved states are the defaults. Once the saved states have been
+        compared with the defaults, only the widgets saved again since are compared.
+
+        Returns
+        -------
+        dict
+            Format: {'name_field': {'value': str | bool | int, 'enabled': bool,
+            'visible': bool, 'widget_row': int} | None, ...}, where the state is `None` for
+            widgets without a saved state.
+        '''
+        if self._non_default_keys is None or self._layout_changed:
+            self._non_default_keys = {
+                key
+                for key in self.widgets
+                if self.widget_states.get(key) != self.default_widget_states.get(key)}
+        return {key: self.widget_states.get(key) for key in self._non_default_keys}
+
     def restoreAllSavedWidgetStates(self):
         '''
         All widgets in the form are restored to the saved states. There are saved states only if
         `saveAllWidgetStates` was previously invoked. If there are no previously saved states,
         `default_widget_states` are used instead, after being made visible.
+        The widgets restored are then read back, and their saved states are updated to the
+        states they actually have, so that they match `getAllWidgetStates`.
         '''
-        if not self.widget_states:
+        saved = bool(self.widget_states)
+        if not saved:
             self.setDefaultWidgetStatesVisibleTrue()
-            self.applyWidgetStates(self.default_widget_states)
+            applied = self.default_widget_states
+            self.applyWidgetStates(applied)
+        elif self._canTrackChanges():
+            applied = {key: self.widget_states[key] for key in self.getChangedWidgetStates()}
+            self.applyWidgetStateChanges(applied)
         else:
-            self.applyWidgetStates(self.widget_states)
+            applied = self.widget_states
+            self.applyWidgetStates(applied)
+        # a widget does not always end up in the state applied, e.g. the only checked button of
+        # an exclusive group cannot be unchecked, and a widget in a hidden parent is not visible
+        states = {key: self.getWidgetState(key) for key in applied}
+        if saved:
+            self._updateSavedStates(states)
+        self._resetChangedWidgets(states)
+        if not saved:
+            self._dirty_keys.update(key for key, state in states.items()
+                                    if state != self.default_widget_states.get(key))
 
 
 class FormWidget(QtWidgets.QWidget, UIFormWidget):
@@ -528,6 +869,26 @@ class FormDockWidget(QtWidgets.QDockWidget):
         '''
         self.widget().addSpanningWidget(qwidget, name)
 
+    def addWidgets(self, widgets):
+        '''
+        Adds several widgets at the end of the form layout, with the updates of the form disabled
+        (see `deferUpdates`).
+
+        Parameters
+        ----------
+        widgets : iterable of tuples
+            (qwidget, qlabel, name) for each widget, as passed to `addWidget`. If qlabel is
+            `None` the widget spans the full width of the form, as with `addSpanningWidget`.
+        '''
+        self.widget().addWidgets(widgets)
+
+    def deferUpdates(self):
+        '''
+        Returns a context manager which disables the updates of the form while many widgets are
+        added or removed, and saves their default states in one pass at the end.
+        '''
+        return self.widget().deferUpdates()
+
     def insertWidget(self, row, name, qwidget, qlabel=None):
         '''
         Inserts a labelled widget, or a spanning widget, to the form layout.
@@ -707,6 +1068,47 @@ class FormDockWidget(QtWidgets.QDockWidget):
         '''
         return self.widget().applyWidgetStates(states)
 
+    def getChangedWidgetStates(self):
+        '''
+        Returns the current states of the widgets whose state differs from the saved state, or
+        from the default state if no states were saved. Only the widgets which changed since the
+        states were last saved or restored are read.
+
+        Returns
+        -------
+        dict
+            Format: {'name_field': {'value': str | bool | int, 'enabled': bool,
+            'visible': bool, 'widget_row': int}, ...}, like `getAllWidgetStates`.
+        '''
+        return self.widget().getChangedWidgetStates()
+
+    def applyWidgetStateChanges(self, states):
+        '''
+        Applies the given states to some of the form's widgets, e.g. those returned by
+        `getChangedWidgetStates`. Unlike `applyWidgetStates`, the other widgets are left as
+        they are.
+
+        Parameters
+        ----------
+        states : dict
+            Format: {'name_field': {'value': str | bool | int, 'enabled': bool, 'visible': bool,
+            'widget_row' : int}, ...}, with a subset of the keys of the widgets dictionary.
+        '''
+        return self.widget().applyWidgetStateChanges(states)
+
+    def getNonDefaultSavedWidgetStates(self):
+        '''
+        Returns the saved states of the widgets which differ from their default states.
+
+        Returns
+        -------
+        dict
+            Format: {'name_field': {'value': str | bool | int, 'enabled': bool,
+            'visible': bool, 'widget_row': int} | None, ...}, like
+            `UIFormWidget.getNonDefaultSavedWidgetStates`.
+        '''
+        return self.widget().getNonDefaultSavedWidgetStates()
+
 
 class UIFormFactory(QtWidgets.QWidget):
     # def generateUIFormView(QtWidgets.QWidget):
@@ -1,6 +1,8 @@
 from .UIFormWidget import UIFormFactory # isort:skip (prereq for FormDialog)
 from .FormDialog import FormDialog
+from .FormSchema import FormSchema
 from .ProgressTimerDialog import ProgressTimerDialog
 from .UIMultiStepWidget import UIMultiStepFactory
 
-__all__ = ['FormDialog', 'ProgressTimerDialog', 'UIFormFactory', 'UIMultiStepFactory']
+__all__ = [
+    'FormDialog', 'FormSchema', 'ProgressTimerDialog', 'UIFormFactory', 'UIMultiStepFactory']
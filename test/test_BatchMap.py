@@ -0,0 +1,123 @@
+import threading
+from concurrent.futures import CancelledError
+from unittest import mock
+
+from pytest import fixture, raises
+from qtpy.QtCore import Qt, QThreadPool
+
+from eqt.threading import BatchMap
+
+
+@fixture
+def threadpool():
+    threadpool = QThreadPool()
+    threadpool.setMaxThreadCount(4)
+    yield threadpool
+    threadpool.waitForDone()
+
+
+def connect(batch):
+    """Returns mocks connected to the signals of a batch."""
+    slots = {name: mock.MagicMock() for name in ('progress', 'resultsReady', 'error', 'finished')}
+    for name, slot in slots.items():
+        # called in the emitting thread, so that no event loop is needed
+        getattr(batch, name).connect(slot, Qt.DirectConnection)
+    return slots
+
+
+def square(value):
+    return value * value
+
+
+def test_map(threadpool):
+    batch = BatchMap(square, iter(range(100)), threadpool=threadpool)
+    assert batch.chunksize == 7
+    slots = connect(batch)
+    assert batch.start().result(timeout=10) == [value * value for value in range(100)]
+    threadpool.waitForDone()
+    assert len(batch.workers) == 15
+    slots['progress'].assert_called_with(100)
+    percentages = [call.args[0] for call in slots['progress'].call_args_list]
+    assert percentages == sorted(percentages)
+    # streamed in order
+    starts = [call.args[0] for call in slots['resultsReady'].call_args_list]
+    assert starts == list(range(0, 100, 7))
+    assert sum((call.args[1] for call in slots['resultsReady'].call_args_list),
+               []) == batch.future.result()
+    slots['error'].assert_not_called()
+    slots['finished'].assert_called_once_with()
+    # the workers are owned by the batch, so cancelling it once they have run is safe
+    assert not any(worker.autoDelete() for worker in batch.workers)
+    batch.cancel()
+    assert batch.future.result() == [value * value for value in range(100)]
+
+
+def test_map_empty(threadpool):
+    batch = BatchMap(square, [], threadpool=threadpool)
+    slots = connect(batch)
+    assert batch.start().result() == []
+    assert list(batch.iterResults()) == []
+    slots['finished'].assert_called_once_with()
+
+
+def test_map_iterResults(threadpool):
+    release = threading.Event()
+
+    def wait(value):
+        if value >= 5:
+            release.wait(10)
+        return value
+
+    batch = BatchMap(wait, range(10), chunksize=5, threadpool=threadpool)
+    batch.start()
+    results = batch.iterResults(timeout=10)
+    # the first chunk is streamed before the second one is done
+    assert [next(results) for _ in range(5)] == list(range(5))
+    release.set()
+    assert list(results) == list(range(5, 10))
+
+    with raises(ValueError):
+        BatchMap(wait, range(10), chunksize=0)
+
+
+def test_map_error(threadpool):
+    def fail(value):
+        if value == 3:
+            raise ValueError(value)
+        return value
+
+    batch = BatchMap(fail, range(10), chunksize=2, threadpool=threadpool)
+    slots = connect(batch)
+    with raises(ValueError):
+        batch.start().result(timeout=10)
+    with raises(ValueError):
+        list(batch.iterResults(timeout=10))
+    threadpool.waitForDone()
+    slots['error'].assert_called_once()
+    assert slots['error'].call_args.args[0][0] is ValueError
+    slots['finished'].assert_called_once_with()
+
+
+def test_map_cancel(threadpool):
+    started, release = threading.Event(), threading.Event()
+
+    def wait(value):
+        started.set()
+        release.wait(10)
+        return value
+
+    threadpool.setMaxThreadCount(1)
+    batch = BatchMap(wait, range(10), chunksize=2, threadpool=threadpool)
+    slots = connect(batch)
+    batch.start()
+    assert started.wait(10)
+    batch.cancel()
+    release.set()
+    threadpool.waitForDone()
+    assert batch.future.cancelled()
+    with raises(CancelledError):
+        list(batch.iterResults(timeout=10))
+    # only the first item of the running chunk was processed
+    slots['progress'].assert_called_once_with(10)
+    slots['resultsReady'].assert_not_called()
+    slots['finished'].assert_called_once_with()
@@ -0,0 +1,86 @@
+import json
+import unittest
+
+from qtpy import QtWidgets
+
+from eqt.ui import FormSchema
+from eqt.ui.FormDialog import FormDialog
+from eqt.ui.UIFormWidget import FormDockWidget, FormWidget
+
+from . import skip_ci
+
+SCHEMA = {
+    'fields': [{'name': 'title', 'type': 'title', 'text': 'Reconstruction'}, {
+        'name': 'algorithm', 'type': 'QComboBox', 'label': 'Algorithm: ', 'items': ['FDK', 'SIRT'],
+        'default': 1}, {
+            'name': 'iterations', 'type': 'QSpinBox', 'label': 'Iterations: ', 'minimum': 1,
+            'maximum': 1000, 'default': 10, 'visible': False},
+               {'name': 'separator', 'type': 'separator'}, {
+                   'name': 'output', 'type': 'QLineEdit', 'label': 'Output: ', 'default': 'recon',
+                   'enabled': False}, {'name': 'gpu', 'type': 'QCheckBox', 'text': 'Use GPU'}, {
+                       'name': 'alpha', 'type': 'UISliderWidget', 'label': 'Alpha: ',
+                       'minimum': 0.0, 'maximum': 1.0, 'default': 0.5}]}
+
+
+@skip_ci
+class TestFormSchema(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    def test_compile_is_cached(self):
+        schema = FormSchema.compile(SCHEMA)
+        self.assertIs(FormSchema.compile(json.loads(json.dumps(SCHEMA))), schema)
+        self.assertIsNot(FormSchema.compile(SCHEMA['fields'][:2]), schema)
+
+    def test_build(self):
+        schema = FormSchema.compile(SCHEMA)
+        for form in (schema.createFormWidget(), schema.createFormDockWidget(),
+                     schema.createFormDialog(title='Schema')):
+            self.assertEqual(form.getNumWidgets(), len(SCHEMA['fields']))
+            self.assertEqual(form.getWidget('algorithm').currentText(), 'SIRT')
+            self.assertEqual(form.getWidget('iterations').maximum(), 1000)
+            self.assertEqual(form.getWidget('gpu').text(), 'Use GPU')
+            self.assertNotIn('gpu_label', form.getWidgets())
+            self.assertFalse(form.getWidget('output').isEnabled())
+            self.assertFalse(form.getWidget('output', 'label').isEnabled())
+            defaults = form.getDefaultWidgetStates()
+            self.assertEqual(defaults['iterations_field']['value'], 10)
+            self.assertFalse(defaults['iterations_field']['visible'])
+            self.assertFalse(defaults['iterations_label']['visible'])
+        self.assertIsInstance(schema.build(FormWidget()), FormWidget)
+        self.assertIsInstance(form, FormDialog)
+        self.assertIsInstance(schema.createFormDockWidget(), FormDockWidget)
+
+    def test_values(self):
+        schema = FormSchema.compile(SCHEMA)
+        form = schema.createFormWidget()
+        values = schema.getValues(form)
+        self.assertEqual(
+            values,
+            {'algorithm': 1, 'iterations': 10, 'output': 'recon', 'gpu': False, 'alpha': 0.5})
+        values = json.loads(json.dumps({**values, 'iterations': 20, 'gpu': True}))
+        other = schema.createFormWidget()
+        schema.applyValues(other, values)
+        self.assertEqual(schema.getValues(other), values)
+
+    def test_validate(self):
+        schema = FormSchema.compile(SCHEMA)
+        schema.validate({'iterations': 1000, 'alpha': 1})
+        for values in ({'iterations': 0}, {'iterations': 1.5}, {'algorithm': 2}, {'gpu': 1},
+                       {'output': None}, {'alpha': 2.0}, {'unknown': 1}, {'title': 'text'}):
+            with self.assertRaises(ValueError):
+                schema.validate(values)
+        form = schema.createFormWidget()
+        with self.assertRaises(ValueError):
+            schema.applyValues(form, {'output': 'new', 'iterations': -1})
+        self.assertEqual(form.getWidget('output').text(), 'recon')
+
+    def test_invalid_schema(self):
+        for fields in ([{'name': 'a', 'type': 'QSpinBox',
+                         'default': 100}], [{'name': 'a', 'type': 'QUnknown'}],
+                       [{'name': 'a', 'type': 'QSpinBox',
+                         'items': []}], [{'name': 'a', 'type': 'UISliderWidget'}],
+                       [{'name': 'a', 'type': 'QLabel'}, {'name': 'a', 'type': 'QLabel'}]):
+            with self.assertRaises(ValueError):
+                FormSchema(fields)
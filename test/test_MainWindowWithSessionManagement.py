@@ -1,16 +1,17 @@
 import json
 import os
 import shutil
+import tempfile
 import unittest
 from datetime import datetime
 from unittest import mock
 from unittest.mock import patch
 
-from qtpy.QtCore import QSettings, QThreadPool
+from qtpy.QtCore import QCoreApplication, QSettings, QThreadPool
 from qtpy.QtWidgets import QMenuBar
 
 import eqt
-from eqt.io import zip_directory
+from eqt.io import autosave_journal_name, read_manifest, zip_directory
 from eqt.ui.MainWindowWithSessionManagement import MainWindowWithSessionManagement
 
 from . import skip_ci
@@ -206,10 +207,11 @@ class TestMainWindowWithSessionManagementCreateSessionSelector(unittest.TestCase
 
     def test_createSessionSelector_when_session_zips_exist(self):
         # Make 2 zip files in the sessions directory:
-        os.chdir("Session Folder")
-        shutil.make_archive("_session1_08-02-22", "zip")
-        shutil.make_archive("session_2_08-02-22", "zip")
-        os.chdir("..")
+        shutil.make_archive("_session1_08-02-22", "zip", "Session Folder")
+        shutil.make_archive("session_2_08-02-22", "zip", "Session Folder")
+        # Zip files within session folders are not sessions:
+        shutil.make_archive(os.path.join("Session Folder", "session_3_08-02-22"), "zip",
+                            "Session Folder")
 
         zip_folders = ["_session1 08-02-22", "session_2 08-02-22"]
 
@@ -320,6 +322,53 @@ class TestLoadSessionConfig(unittest.TestCase):
         self.smw.loadSessionConfig(self.session_folder)
         self.assertEqual(self.config, self.smw.config)
 
+    def test_loadSessionConfig_lazy(self):
+        data_file = os.path.join(self.session_folder, "data.txt")
+        with open(data_file, "w") as f:
+            f.write("data")
+        zip_directory(self.session_folder, compress=False)
+        shutil.rmtree(self.session_folder)
+        self.smw.lazy_session_loading = True
+        self.smw.loadSessionConfig(self.session_folder)
+        self.assertEqual(self.config, self.smw.config)
+        self.assertFalse(os.path.exists(data_file))
+
+        self.assertEqual(os.path.abspath(self.smw.getSessionFile("data.txt")),
+                         os.path.abspath(data_file))
+        with open(data_file) as f:
+            self.assertEqual(f.read(), "data")
+        self.assertFalse(os.path.exists(os.path.join(self.session_folder, "session.json")))
+
+        self.smw.extractSessionFiles()
+        self.assertTrue(os.path.exists(os.path.join(self.session_folder, "session.json")))
+
+    def test_loadSessionConfig_many_files(self):
+        os.mkdir(os.path.join(self.session_folder, "data"))
+        for i in range(300):
+            with open(os.path.join(self.session_folder, "data", f"{i}.txt"), "w") as f:
+                f.write(str(i))
+        zip_directory(self.session_folder, manifest=True)
+        shutil.rmtree(self.session_folder)
+        with mock.patch('eqt.ui.MainWindowWithSessionManagement.read_manifest',
+                        wraps=read_manifest) as mock_read_manifest:
+            self.smw.loadSessionConfig(self.session_folder)
+        # the archive is not reopened for each file
+        mock_read_manifest.assert_called_once()
+        self.assertEqual(self.smw._unextracted_session_files, set())
+        for i in (0, 299):
+            with open(os.path.join(self.session_folder, "data", f"{i}.txt")) as f:
+                self.assertEqual(f.read(), str(i))
+
+    def test_mapSessionFile(self):
+        zip_directory(self.session_folder, compress=False)
+        self.smw.loadSessionConfig(self.session_folder)
+        self.assertEqual(json.loads(bytes(self.smw.mapSessionFile("session.json"))), self.config)
+
+    def test_mapSessionFile_new_session(self):
+        self.smw.session_archive = None
+        with self.assertRaises(RuntimeError):
+            self.smw.mapSessionFile("session.json")
+
     def tearDown(self):
         os.chdir("..")
         try:
@@ -350,9 +399,60 @@ class TestSaveSession(unittest.TestCase):
         self.smw.saveSessionConfigToJson = mock.MagicMock()
         self.smw.current_session_folder = mock.MagicMock()
         self.smw.saveSession(self.session_name, compress=False)
-        self.smw.moveSessionFolder.assert_called_once_with(self.session_name)
+        self.smw.moveSessionFolder.assert_called_once_with(self.session_name,
+                                                           progress_callback=None,
+                                                           cancel_event=None)
         self.smw.saveSessionConfigToJson.assert_called_once()
-        mock_zip_directory.assert_called_once_with(self.smw.current_session_folder, False)
+        mock_zip_directory.assert_called_once_with(self.smw.current_session_folder, False,
+                                                   workers=self.smw.session_zip_workers,
+                                                   manifest=True, base_archive=None,
+                                                   compresslevel=None, progress_callback=None,
+                                                   cancel_event=None)
+        self.assertEqual(self.smw.session_archive, f'{self.smw.current_session_folder}.zip')
+
+    @mock.patch('eqt.ui.MainWindowWithSessionManagement.zip_directory')
+    def test_saveSession_incremental_uses_session_archive(self, mock_zip_directory):
+        self.smw.moveSessionFolder = mock.MagicMock()
+        self.smw.saveSessionConfigToJson = mock.MagicMock()
+        self.smw.current_session_folder = "session folder"
+        self.smw.session_archive = "previous session.zip"
+        self.smw.saveSession(self.session_name, compress=True, compresslevel=9)
+        mock_zip_directory.assert_called_once_with("session folder", True,
+                                                   workers=self.smw.session_zip_workers,
+                                                   manifest=True,
+                                                   base_archive="previous session.zip",
+                                                   compresslevel=9, progress_callback=None,
+                                                   cancel_event=None)
+        self.assertEqual(self.smw.session_archive, "session folder.zip")
+
+    @mock.patch('eqt.ui.MainWindowWithSessionManagement.is_same_filesystem', return_value=False)
+    @mock.patch('eqt.ui.MainWindowWithSessionManagement.zip_directory')
+    def test_saveSession_progress_across_filesystems(self, mock_zip_directory, _):
+        def move(session_name, progress_callback, cancel_event):
+            for percentage in (0, 50, 100):
+                progress_callback.emit(percentage)
+
+        def zip_directory(*args, progress_callback, **kwargs):
+            for percentage in (0, 50, 100):
+                progress_callback.emit(percentage)
+
+        self.smw.moveSessionFolder = move
+        mock_zip_directory.side_effect = zip_directory
+        self.smw.saveSessionConfigToJson = mock.MagicMock()
+        self.smw.current_session_folder = "session folder"
+        self.smw.sessions_directory = "sessions"
+        progress_callback = mock.MagicMock()
+        self.smw.saveSession(self.session_name, compress=True, progress_callback=progress_callback)
+        # the progress never goes back when zipping starts
+        self.assertEqual([call.args[0] for call in progress_callback.emit.call_args_list],
+                         [0, 25, 50, 50, 75, 100])
+
+    def test_saveSessionCancelled(self):
+        self.smw.finishProcess = mock.MagicMock()
+        self.smw.should_really_close = True
+        self.smw.saveSessionCancelled("Save Session")
+        self.smw.finishProcess.assert_called_once_with("Save Session")
+        self.assertFalse(self.smw.should_really_close)
 
     def test_moveSessionFolder(self):
         os.mkdir("Test_Folder")
@@ -458,3 +558,134 @@ class TestRemoveTempMethods(unittest.TestCase):
         self.smw.removeTemp.assert_called_once()
         self.smw.finishProcess.assert_called_once_with(process_name)
         self.smw.close.assert_called_once()
+
+
+@skip_ci
+class TestAutosave(unittest.TestCase):
+    '''
+    Tests autosaving the session to a journal, and recovering it
+    '''
+    def setUp(self):
+        self.smw = MainWindowWithSessionManagement("title", "app_name")
+        self.smw.autosave_timer.stop()
+        self.smw.sessions_directory = tempfile.mkdtemp()
+        self.smw.createSessionFolder()
+        self.smw.getSessionConfig = mock.MagicMock(return_value={'value': 1})
+        self.journal_file = os.path.join(self.smw.sessions_directory, autosave_journal_name())
+
+    def autosave(self):
+        self.smw.autosave()
+        self.smw.threadpool.waitForDone()
+        QCoreApplication.processEvents()
+
+    def readAutosave(self):
+        '''Reads the journal as another instance would, once this one is no longer running.'''
+        with mock.patch('eqt.ui.MainWindowWithSessionManagement.is_process_running',
+                        return_value=False):
+            return self.smw.readAutosave()
+
+    def test_autosave(self):
+        self.autosave()
+        journal = self.readAutosave()
+        self.assertEqual(journal['config'], {'value': 1})
+        self.assertEqual(journal['session_folder'], self.smw.current_session_folder)
+        self.assertIsNone(journal['session_archive'])
+        self.assertEqual(journal['pid'], os.getpid())
+        self.assertEqual(journal['journal'], self.journal_file)
+
+        # an unchanged config is not autosaved again
+        os.remove(self.journal_file)
+        self.autosave()
+        self.assertIsNone(self.readAutosave())
+
+    def test_readAutosave_skips_running_instances(self):
+        self.autosave()
+        # the journal of this instance, which is running
+        self.assertIsNone(self.smw.readAutosave())
+        # the journal of another running instance
+        other_journal = os.path.join(self.smw.sessions_directory,
+                                     autosave_journal_name(pid=os.getppid()))
+        os.replace(self.journal_file, other_journal)
+        self.assertIsNone(self.smw.readAutosave())
+
+    def test_autosave_coalesces_snapshots(self):
+        self.smw._autosave_running = True
+        self.smw.autosave()
+        self.smw.getSessionConfig.return_value = {'value': 2}
+        self.smw.autosave()
+        self.smw.threadpool.waitForDone()
+        self.assertFalse(os.path.exists(self.journal_file))
+
+        self.smw._finishAutosave()
+        self.smw.threadpool.waitForDone()
+        QCoreApplication.processEvents()
+        self.assertEqual(self.readAutosave()['config'], {'value': 2})
+        self.assertIsNone(self.smw._autosave_pending)
+
+    def test_scheduleAutosave_is_debounced(self):
+        self.smw.autosave_delay = 10000
+        self.smw.scheduleAutosave()
+        self.smw.scheduleAutosave()
+        self.assertTrue(self.smw._autosave_debounce_timer.isActive())
+        self.autosave()
+        self.assertFalse(self.smw._autosave_debounce_timer.isActive())
+
+    def test_discardAutosave(self):
+        self.autosave()
+        self.smw.discardAutosave(json.dumps({'value': 1}))
+        self.assertFalse(os.path.exists(self.journal_file))
+        # the saved config is not autosaved
+        self.autosave()
+        self.assertFalse(os.path.exists(self.journal_file))
+
+    def test_setupSession_offers_recovery(self):
+        self.autosave()
+        self.smw.settings = mock.MagicMock()
+        self.smw.settings.value = mock.MagicMock(return_value=self.smw.sessions_directory)
+        self.smw.createSessionSelector = mock.MagicMock()
+        self.smw.createRecoverSessionDialog = mock.MagicMock()
+        with mock.patch('eqt.ui.MainWindowWithSessionManagement.is_process_running',
+                        return_value=False):
+            self.smw.setupSession()
+        self.smw.createRecoverSessionDialog.assert_called_once_with(self.readAutosave())
+        self.smw.createSessionSelector.assert_not_called()
+
+    def test_recoverSession(self):
+        self.autosave()
+        journal = self.readAutosave()
+        os.replace(journal['journal'],
+                   os.path.join(self.smw.sessions_directory, autosave_journal_name(pid=1)))
+        journal['journal'] = os.path.join(self.smw.sessions_directory,
+                                          autosave_journal_name(pid=1))
+        smw = MainWindowWithSessionManagement("title", "app_name")
+        smw.sessions_directory = self.smw.sessions_directory
+        smw.autosave_timer.stop()
+        smw.createUnknownProgressWindow = mock.MagicMock()
+        smw.finishLoadConfig = mock.MagicMock()
+        smw.recoverSession(journal)
+        self.assertEqual(smw.config, {'value': 1})
+        self.assertEqual(smw.current_session_folder, self.smw.current_session_folder)
+        smw.finishLoadConfig.assert_called_once()
+        # the journal now belongs to the instance which recovered the session
+        self.assertFalse(os.path.exists(journal['journal']))
+        self.assertTrue(os.path.exists(self.journal_file))
+
+    def test_recoverSessionDialogRejected(self):
+        self.autosave()
+        self.smw.createSessionSelector = mock.MagicMock()
+        self.smw.recoverSessionDialogRejected(mock.MagicMock(), self.readAutosave())
+        self.assertFalse(os.path.exists(self.smw.current_session_folder))
+        self.assertFalse(os.path.exists(self.journal_file))
+        self.smw.createSessionSelector.assert_called_once()
+
+    def test_recoverSessionDialogRejected_keeps_folders_outside_sessions_directory(self):
+        self.smw.current_session_folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.smw.current_session_folder)
+        self.autosave()
+        self.smw.createSessionSelector = mock.MagicMock()
+        self.smw.recoverSessionDialogRejected(mock.MagicMock(), self.readAutosave())
+        self.assertTrue(os.path.exists(self.smw.current_session_folder))
+        self.assertFalse(os.path.exists(self.journal_file))
+
+    def tearDown(self):
+        shutil.rmtree(self.smw.sessions_directory)
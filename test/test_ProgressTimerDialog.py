@@ -0,0 +1,51 @@
+import time
+import unittest
+
+from qtpy.QtWidgets import QApplication
+
+from eqt.ui.ProgressTimerDialog import ProgressTimerDialog
+
+from . import skip_ci
+
+
+@skip_ci
+class TestProgressTimerDialog(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.dialog = ProgressTimerDialog("test")
+
+    def tearDown(self):
+        self.dialog.close()
+
+    def test_update_percentage_keeps_dialog_open(self):
+        self.dialog.show()
+        self.dialog.update_percentage(50)
+        self.assertEqual(self.dialog.maximum(), 100)
+        self.dialog.update_percentage(100)
+        self.assertTrue(self.dialog.isVisible())
+        self.assertEqual(self.dialog.value(), 100)
+
+    def test_close_twice(self):
+        self.dialog.show()
+        # the dialog owns the worker, so the thread pool does not delete it once it has run
+        self.assertFalse(self.dialog.worker.autoDelete())
+        self.dialog.close()
+        self.assertTrue(self.dialog.worker.future.done())
+        self.dialog.threadpool.waitForDone(1000)
+        self.dialog.close()
+        self.assertFalse(self.dialog.threadpool.tryTake(self.dialog.worker))
+
+    def test_timers_of_many_dialogs_run(self):
+        count = self.dialog.threadpool.maxThreadCount() + 1
+        dialogs = [ProgressTimerDialog(f"test {i}") for i in range(count)]
+        for dialog in dialogs:
+            self.addCleanup(dialog.close)
+            dialog.show()
+        deadline = time.time() + 5
+        while (not all(dialog.worker.future.running() for dialog in dialogs)
+               and time.time() < deadline):
+            time.sleep(0.01)
+        self.assertTrue(all(dialog.worker.future.running() for dialog in dialogs))
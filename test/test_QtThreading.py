@@ -0,0 +1,413 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import CancelledError
+from unittest import mock
+
+from pytest import mark, raises
+from qtpy.QtCore import Qt, QThreadPool
+from qtpy.QtWidgets import QApplication
+
+from eqt.threading import (
+    CancellationToken,
+    LatestWorkerQueue,
+    ProcessWorker,
+    QtThreading,
+    ThrottledCallback,
+    Worker,
+    get_threadpool,
+    submit,
+    submit_async,
+)
+
+
+def run_worker(worker):
+    """Runs a worker in this thread, returning mocks connected to its signals."""
+    slots = {name: mock.MagicMock() for name in ('result', 'error', 'cancelled', 'finished')}
+    for name, slot in slots.items():
+        getattr(worker.signals, name).connect(slot)
+    worker.run()
+    return slots
+
+
+def test_worker_result():
+    fn = mock.MagicMock(return_value=1)
+    worker = Worker(fn, 2, a=3)
+    slots = run_worker(worker)
+    fn.assert_called_once_with(2, a=3, progress_callback=worker.signals.progress,
+                               message_callback=worker.signals.message,
+                               status_callback=worker.signals.status,
+                               cancel_token=worker.cancel_token)
+    slots['result'].assert_called_once_with(1)
+    slots['cancelled'].assert_not_called()
+    slots['finished'].assert_called_once()
+
+
+def test_worker_without_cancel_token():
+    # functions written before cancel_token was added are not passed it
+    def fn(value, progress_callback, message_callback, status_callback):
+        return value + 1
+
+    def fn_with_token(value, *, cancel_token, **callbacks):
+        return cancel_token
+
+    slots = run_worker(Worker(fn, 1))
+    slots['result'].assert_called_once_with(2)
+    worker = Worker(fn_with_token, 1)
+    slots = run_worker(worker)
+    slots['result'].assert_called_once_with(worker.cancel_token)
+
+
+def test_worker_cancel():
+    def fn(**kwargs):
+        # cancelled from within, as if by another thread
+        worker.cancel()
+        assert kwargs['cancel_token'].wait(0)
+        return 1
+
+    worker = Worker(fn)
+    slots = run_worker(worker)
+    slots['result'].assert_not_called()
+    slots['cancelled'].assert_called_once()
+    slots['finished'].assert_called_once()
+
+
+def test_worker_cancel_before_run():
+    fn = mock.MagicMock()
+    worker = Worker(fn)
+    worker.cancel()
+    slots = run_worker(worker)
+    fn.assert_not_called()
+    slots['cancelled'].assert_called_once()
+    slots['finished'].assert_called_once()
+
+
+def test_worker_cancelled_error():
+    worker = Worker(mock.MagicMock(side_effect=CancelledError))
+    slots = run_worker(worker)
+    slots['error'].assert_not_called()
+    slots['cancelled'].assert_called_once()
+
+
+def test_cancellation_token():
+    token = CancellationToken()
+    assert not token.is_set()
+    assert not token.wait(0)
+    token.cancel()
+    assert token.is_set()
+    assert token.wait()
+
+
+def test_cancellation_token_deadline():
+    token = CancellationToken()
+    token.deadline = time.monotonic() + 0.05
+    assert not token.is_set()
+    assert token.wait(10)
+    assert token.is_set() and token.timed_out()
+    assert not token.is_cancelled()
+
+
+def test_worker_setTimeout():
+    def fn(progress_callback, **_):
+        time.sleep(0.05)
+        progress_callback.emit(50)
+        return 1
+
+    worker = Worker(fn)
+    worker.setTimeout(0.01)
+    timeout = mock.MagicMock()
+    worker.signals.timeout.connect(timeout)
+    slots = run_worker(worker)
+    timeout.assert_called_once_with()
+    slots['result'].assert_not_called()
+    slots['cancelled'].assert_not_called()
+    slots['error'].assert_called_once()
+    assert slots['error'].call_args.args[0][0] is TimeoutError
+    assert isinstance(worker.future.exception(), TimeoutError)
+    assert worker.cancel_token.deadline is None
+
+
+def test_worker_setRetry():
+    fn = mock.MagicMock(side_effect=[OSError('flaky'), 1])
+    worker = Worker(fn)
+    worker.setRetry(2, backoff=0.01)
+    retry = mock.MagicMock()
+    worker.signals.retry.connect(retry)
+    slots = run_worker(worker)
+    assert fn.call_count == worker.attempts == 2
+    retry.assert_called_once()
+    assert retry.call_args.args[0] == 1
+    assert retry.call_args.args[1][0] is OSError
+    slots['result'].assert_called_once_with(1)
+    slots['error'].assert_not_called()
+
+
+def test_worker_setRetry_exhausted():
+    fn = mock.MagicMock(side_effect=OSError('down'))
+    worker = Worker(fn)
+    worker.setRetry(1, backoff=0.01)
+    slots = run_worker(worker)
+    assert fn.call_count == 2
+    slots['error'].assert_called_once()
+    assert slots['error'].call_args.args[0][0] is OSError
+
+    fn = mock.MagicMock(side_effect=ValueError)
+    worker = Worker(fn)
+    worker.setRetry(3, backoff=0.01)
+    slots = run_worker(worker)
+    assert fn.call_count == 1
+    slots['error'].assert_called_once()
+
+
+def test_worker_setRetry_cancel():
+    worker = Worker(mock.MagicMock(side_effect=OSError))
+    worker.setRetry(1, backoff=10)
+    worker.signals.retry.connect(lambda *_: worker.cancel(), Qt.DirectConnection)
+    slots = run_worker(worker)
+    slots['cancelled'].assert_called_once_with()
+    slots['error'].assert_not_called()
+
+
+def test_worker_setThrottle():
+    def fn(**kwargs):
+        for i in range(1, 1001):
+            kwargs['progress_callback'].emit(i // 10)
+        kwargs['message_callback'].emit("done")
+
+    worker = Worker(fn)
+    worker.setThrottle(1)
+    progress = mock.MagicMock()
+    worker.signals.progress.connect(progress)
+    message = mock.MagicMock()
+    worker.signals.message.connect(message)
+    run_worker(worker)
+    # the first value is emitted straight away, and the final value once fn returns
+    assert progress.call_args_list == [mock.call(0), mock.call(100)]
+    message.assert_called_once_with("done")
+
+
+def test_ThrottledCallback(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    signal = mock.MagicMock()
+    callback = ThrottledCallback(signal, 0.5)
+    callback.emit(1)
+    callback.emit(2)
+    callback.emit(3)
+    assert signal.emit.call_args_list == [mock.call(1)]
+    now[0] = 0.5
+    callback.emit(4)
+    assert signal.emit.call_args_list == [mock.call(1), mock.call(4)]
+    callback.flush()
+    assert signal.emit.call_count == 2
+    callback.emit(5)
+    callback.flush()
+    assert signal.emit.call_args_list[-1] == mock.call(5)
+
+
+@mark.parametrize('has_app', (True, False))
+def test_ThrottledCallback_timer(monkeypatch, has_app):
+    app = QApplication.instance() or QApplication([])
+    if not has_app:
+        monkeypatch.setattr(QtThreading.QtCore.QCoreApplication, 'instance', lambda: None)
+    signal = mock.MagicMock()
+    callback = ThrottledCallback(signal, 0.05)
+    callback.emit(1)
+    callback.emit(2)
+    callback.emit(3)
+    assert signal.emit.call_args_list == [mock.call(1)]
+    # the latest value is emitted once the interval has passed, without another call
+    deadline = time.monotonic() + 5
+    while signal.emit.call_count < 2 and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    assert signal.emit.call_args_list == [mock.call(1), mock.call(3)]
+
+
+def test_worker_setThrottle_timer():
+    app = QApplication.instance() or QApplication([])
+    delivered = threading.Event()
+
+    def fn(**kwargs):
+        kwargs['progress_callback'].emit(0)
+        kwargs['progress_callback'].emit(50)
+        # the value held back is delivered while the function is still running
+        return delivered.wait(5)
+
+    worker = Worker(fn)
+    worker.setThrottle(20)
+    progress = mock.MagicMock(side_effect=lambda value: value == 50 and delivered.set())
+    worker.signals.progress.connect(progress)
+    future = submit(worker, get_threadpool('test_worker_setThrottle_timer'))
+    while not future.done():
+        app.processEvents()
+        time.sleep(0.01)
+    app.processEvents()
+    assert future.result() is True
+    assert progress.call_args_list == [mock.call(0), mock.call(50)]
+
+
+def square_in_process(value, **kwargs):
+    for i in range(1, 4):
+        kwargs['progress_callback'].emit(i)
+    kwargs['message_callback'].emit(f"pid {os.getpid()}")
+    if kwargs['cancel_token'].is_set():
+        raise CancelledError
+    return value * value
+
+
+def test_process_worker():
+    worker = ProcessWorker(square_in_process, 3)
+    progress = mock.MagicMock()
+    worker.signals.progress.connect(progress)
+    message = mock.MagicMock()
+    worker.signals.message.connect(message)
+    try:
+        slots = run_worker(worker)
+    finally:
+        ProcessWorker.shutdown()
+    slots['result'].assert_called_once_with(9)
+    assert progress.call_args_list == [mock.call(1), mock.call(2), mock.call(3)]
+    # run in another process
+    message.assert_called_once()
+    assert message.call_args != mock.call(f"pid {os.getpid()}")
+
+
+def test_process_worker_error():
+    worker = ProcessWorker(square_in_process, "3")
+    try:
+        slots = run_worker(worker)
+    finally:
+        ProcessWorker.shutdown()
+    slots['result'].assert_not_called()
+    assert slots['error'].call_args[0][0][0] is TypeError
+
+
+def cube_in_process(value, progress_callback, message_callback, status_callback):
+    return value**3
+
+
+def test_process_worker_without_cancel_token():
+    try:
+        slots = run_worker(ProcessWorker(cube_in_process, 2))
+    finally:
+        ProcessWorker.shutdown()
+    slots['result'].assert_called_once_with(8)
+
+
+def test_submit():
+    future = submit(Worker(lambda value, **_: value + 1, 1))
+    assert future.result(timeout=10) == 2
+
+    future = submit(Worker(mock.MagicMock(side_effect=ValueError)))
+    with raises(ValueError):
+        future.result(timeout=10)
+
+
+def test_submit_async():
+    async def pipeline():
+        value = await submit_async(Worker(lambda value, **_: value + 1, 1))
+        return await submit_async(Worker(lambda value, **_: value * 10, value))
+
+    assert asyncio.run(pipeline()) == 20
+
+
+def test_worker_future_cancel():
+    fn = mock.MagicMock()
+    worker = Worker(fn)
+    assert worker.future.cancel()
+    slots = run_worker(worker)
+    fn.assert_not_called()
+    slots['cancelled'].assert_called_once()
+    assert worker.cancel_token.is_set()
+
+    worker = Worker(fn)
+    worker.cancel()
+    run_worker(worker)
+    with raises(CancelledError):
+        worker.future.result()
+
+
+def test_get_threadpool():
+    assert get_threadpool() is QThreadPool.globalInstance()
+    threadpool = get_threadpool('test_get_threadpool', max_thread_count=2)
+    assert get_threadpool('test_get_threadpool') is threadpool
+    assert threadpool.maxThreadCount() == 2
+
+
+def test_submit_priority():
+    threadpool = get_threadpool('test_submit_priority', max_thread_count=1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def block(**_):
+        started.set()
+        release.wait(10)
+
+    order = []
+    submit(Worker(block), threadpool)
+    started.wait(10)
+    futures = [
+        submit(Worker(lambda value, **_: order.append(value), priority), threadpool, priority)
+        for priority in (0, 10, -1, 5)]
+    release.set()
+    for future in futures:
+        future.result(timeout=10)
+    assert order == [10, 5, 0, -1]
+
+
+def test_LatestWorkerQueue():
+    threadpool = get_threadpool('test_LatestWorkerQueue', max_thread_count=1)
+    queue = LatestWorkerQueue()
+
+    def preview(value, **kwargs):
+        started.set()
+        release.wait(10)
+        return value
+
+    started, release = threading.Event(), threading.Event()
+    running = Worker(preview, 1)
+    cancelled = mock.MagicMock()
+    # called in the worker's thread, so that no event loop is needed
+    running.signals.cancelled.connect(cancelled, Qt.DirectConnection)
+    queue.submit('preview', running, threadpool)
+    started.wait(10)
+
+    queued = Worker(mock.MagicMock())
+    queued_slots = {name: mock.MagicMock() for name in ('result', 'cancelled', 'finished')}
+    for name, slot in queued_slots.items():
+        getattr(queued.signals, name).connect(slot, Qt.DirectConnection)
+    queue.submit('preview', queued, threadpool)
+    # supersedes both the running and the queued worker
+    latest = queue.submit('preview', Worker(lambda value, **_: value, 3), threadpool)
+    release.set()
+    assert latest.result(timeout=10) == 3
+
+    with raises(CancelledError):
+        running.future.result(timeout=10)
+    cancelled.assert_called_once()
+    assert queued.future.cancelled()
+    queued.fn.assert_not_called()
+    # the dequeued worker reports that it was cancelled, as if it had run
+    queued_slots['result'].assert_not_called()
+    queued_slots['cancelled'].assert_called_once_with()
+    queued_slots['finished'].assert_called_once_with()
+
+
+def test_LatestWorkerQueue_drops_superseded_result():
+    app = QApplication.instance() or QApplication([])
+    threadpool = get_threadpool('test_LatestWorkerQueue', max_thread_count=1)
+    queue = LatestWorkerQueue()
+    stale, latest = Worker(lambda **_: 1), Worker(lambda **_: 2)
+    stale_result, latest_result = mock.MagicMock(), mock.MagicMock()
+    stale.signals.result.connect(stale_result)
+    latest.signals.result.connect(latest_result)
+
+    # the result of the first worker is emitted before the second one is submitted,
+    # but only delivered by the event loop afterwards
+    assert queue.submit('preview', stale, threadpool).result(timeout=10) == 1
+    assert queue.submit('preview', latest, threadpool).result(timeout=10) == 2
+    app.processEvents()
+    stale_result.assert_not_called()
+    latest_result.assert_called_once_with(2)
@@ -1,5 +1,6 @@
 import os
 import unittest
+import zipfile
 from pathlib import Path
 from unittest.mock import patch
 
@@ -9,6 +10,7 @@ from eqt.ui.SessionDialogs import (
     AppSettingsDialog,
     ErrorDialog,
     LoadSessionDialog,
+    RecoverSessionDialog,
     SaveSessionDialog,
     SessionDirectorySelectionDialog,
     WarningDialog,
@@ -62,6 +64,20 @@ class TestSaveSessionDialog(unittest.TestCase):
         ssd = SaveSessionDialog(title=title)
         self.assertEqual(ssd.windowTitle(), title)
 
+    def test_getCompression(self):
+        ssd = SaveSessionDialog()
+        self.assertEqual(ssd.getCompression(), (False, None))
+        self.assertFalse(ssd.getWidget('compress_type').isEnabled())
+
+        ssd.getWidget('compress').setChecked(True)
+        ssd.getWidget('compress_level').setValue(1)
+        self.assertTrue(ssd.getWidget('compress_type').isEnabled())
+        self.assertEqual(ssd.getCompression(), (zipfile.ZIP_DEFLATED, 1))
+
+        ssd.getWidget('compress_type').setCurrentText('LZMA')
+        self.assertFalse(ssd.getWidget('compress_level').isEnabled())
+        self.assertEqual(ssd.getCompression(), (zipfile.ZIP_LZMA, None))
+
 
 @skip_ci
 class TestSessionDirectorySelectionDialog(unittest.TestCase):
@@ -132,6 +148,17 @@ class TestLoadSessionDialog(unittest.TestCase):
             f"Currently loading sessions from: {location_of_session_files}")
 
 
+@skip_ci
+class TestRecoverSessionDialog(unittest.TestCase):
+    def test_init(self):
+        rsd = RecoverSessionDialog(session_folder=os.path.join("sessions", "session"),
+                                   autosaved="01-01-2020-00-00-00")
+        self.assertEqual(rsd.getWidget('session').text(), "session")
+        self.assertEqual(rsd.getWidget('autosaved').text(), "01-01-2020-00-00-00")
+        self.assertEqual(rsd.Ok.text(), "Recover")
+        self.assertEqual(rsd.Cancel.text(), "Discard")
+
+
 @skip_ci
 class TestAppSettingsDialog(unittest.TestCase):
     def test_init(self):
@@ -0,0 +1,79 @@
+import threading
+from unittest import mock
+
+from pytest import fixture, raises
+from qtpy.QtCore import Qt, QThreadPool
+
+from eqt.threading import TaskGraph, Worker
+
+
+@fixture
+def threadpool():
+    threadpool = QThreadPool()
+    threadpool.setMaxThreadCount(4)
+    yield threadpool
+    threadpool.waitForDone()
+
+
+def run_graph(graph):
+    """Starts a graph, and returns mocks connected to its signals once it has finished."""
+    slots = {name: mock.MagicMock() for name in ('progress', 'taskFinished', 'error', 'finished')}
+    for name, slot in slots.items():
+        # called in the emitting thread, so that no event loop is needed
+        getattr(graph, name).connect(slot, Qt.DirectConnection)
+    graph.start()
+    graph.threadpool.waitForDone()
+    return slots
+
+
+def test_fan_out_fan_in(threadpool):
+    graph = TaskGraph(threadpool)
+    # b and c must run at the same time to get past the barrier
+    barrier = threading.Barrier(2, timeout=10)
+
+    def stage(value, **kwargs):
+        kwargs['progress_callback'].emit(50)
+        barrier.wait()
+        return graph.results['a'] + value
+
+    graph.addTask('a', Worker(lambda **_: 1))
+    graph.addTask('b', Worker(stage, 10), depends_on=['a'])
+    graph.addTask('c', Worker(stage, 100), depends_on=['a'])
+    graph.addTask('d', Worker(lambda **_: graph.results['b'] + graph.results['c']),
+                  depends_on=['b', 'c'])
+    slots = run_graph(graph)
+
+    assert graph.results == {'a': 1, 'b': 11, 'c': 101, 'd': 112}
+    assert not graph.failed and not graph.skipped
+    assert sorted(call.args[0] for call in slots['taskFinished'].call_args_list) == list('abcd')
+    assert slots['progress'].call_args_list[-1] == mock.call(100)
+    slots['error'].assert_not_called()
+    slots['finished'].assert_called_once()
+
+
+def test_error_skips_dependents(threadpool):
+    graph = TaskGraph(threadpool)
+    graph.addTask('a', Worker(mock.MagicMock(side_effect=ValueError)))
+    graph.addTask('b', Worker(mock.MagicMock()), depends_on=['a'])
+    graph.addTask('c', Worker(mock.MagicMock()), depends_on=['b'])
+    graph.addTask('d', Worker(mock.MagicMock(return_value=4)))
+    slots = run_graph(graph)
+
+    assert graph.results == {'d': 4}
+    assert graph.failed == {'a'}
+    assert graph.skipped == {'b', 'c'}
+    graph.workers['b'].fn.assert_not_called()
+    assert slots['error'].call_args.args[0] == 'a'
+    slots['finished'].assert_called_once()
+
+
+def test_invalid_dependencies(threadpool):
+    graph = TaskGraph(threadpool)
+    graph.addTask('a', Worker(mock.MagicMock()), depends_on=['b'])
+    with raises(ValueError):
+        graph.start()
+    graph.addTask('b', Worker(mock.MagicMock()), depends_on=['a'])
+    with raises(ValueError):
+        graph.start()
+    with raises(ValueError):
+        graph.addTask('a', Worker(mock.MagicMock()))
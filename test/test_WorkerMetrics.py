@@ -0,0 +1,74 @@
+import json
+import threading
+from unittest import mock
+
+from pytest import fixture
+
+from eqt.threading import (
+    ChromeTraceSink,
+    JSONLinesSink,
+    RingBufferSink,
+    Worker,
+    add_metrics_sink,
+    remove_metrics_sink,
+)
+
+
+@fixture
+def sink():
+    sink = RingBufferSink(maxlen=2)
+    add_metrics_sink(sink)
+    yield sink
+    remove_metrics_sink(sink)
+
+
+def process(value, **_):
+    if value is None:
+        raise ValueError
+    return value
+
+
+def test_RingBufferSink(sink):
+    for value in (1, None, 2):
+        Worker(process, value).run()
+    cancelled = Worker(process, 3)
+    cancelled.cancel()
+    cancelled.run()
+
+    records = sink.records()
+    assert [record['outcome'] for record in records] == ['result', 'cancelled']
+    record = records[0]
+    assert record['name'] == 'process'
+    assert record['thread_id'] == threading.get_ident()
+    assert record['exception'] is None
+    assert record['enqueued'] <= record['started'] <= record['ended']
+    assert record['duration'] == record['ended'] - record['started']
+    assert sink.summary()['process']['count'] == 2
+
+
+def test_error_record(sink):
+    Worker(process, None).run()
+    record = sink.records()[-1]
+    assert (record['outcome'], record['exception']) == ('error', 'ValueError')
+    assert sink.summary()['process']['errors'] == 1
+
+
+def test_JSONLinesSink_and_ChromeTraceSink(tmp_path):
+    lines, trace = JSONLinesSink(tmp_path / "metrics.jsonl"), ChromeTraceSink()
+    add_metrics_sink(lines)
+    add_metrics_sink(trace)
+    try:
+        Worker(process, 1).run()
+        Worker(mock.MagicMock()).run()
+    finally:
+        remove_metrics_sink(lines)
+        remove_metrics_sink(trace)
+
+    records = [json.loads(line) for line in (tmp_path / "metrics.jsonl").read_text().splitlines()]
+    assert [record['name'] for record in records] == ['process', 'MagicMock']
+
+    trace.save(tmp_path / "trace.json")
+    events = json.loads((tmp_path / "trace.json").read_text())['traceEvents']
+    assert [(event['name'], event['ph']) for event in events] == [('process', 'X'),
+                                                                  ('MagicMock', 'X')]
+    assert events[0]['ts'] == records[0]['started'] * 1e6
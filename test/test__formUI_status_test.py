@@ -1,13 +1,19 @@
 import abc
+import random
 import unittest
 from unittest import mock
 
 from qtpy import QtWidgets
-from qtpy.QtCore import Qt
+from qtpy.QtCore import QDate, Qt
 from qtpy.QtTest import QTest
 
 from eqt.ui.FormDialog import AdvancedFormDialog, FormDialog
-from eqt.ui.UIFormWidget import FormDockWidget, FormWidget
+from eqt.ui.UIFormWidget import (
+    FormDockWidget,
+    FormWidget,
+    register_widget_state,
+    unregister_widget_state,
+)
 from eqt.ui.UISliderWidget import UISliderWidget
 
 from . import is_ci, skip
@@ -233,6 +239,21 @@ class FormsCommonTests(metaclass=abc.ABCMeta):
         for name in self.list_all_widgets:
             self._test_remove_one_widget(name)
 
+    def test_addWidgets(self):
+        """Check that widgets added in bulk have default states saved at the end"""
+        num_widgets = self.form.getNumWidgets()
+        with self.form.deferUpdates():
+            self.form.addWidgets([(QtWidgets.QLineEdit('bulk'), 'Bulk: ', 'bulk'),
+                                  (QtWidgets.QLabel('spanning'), None, 'bulkSpanning')])
+            self.assertNotIn('bulk_field', self.form.getDefaultWidgetStates())
+        self.assertEqual(self.form.getNumWidgets(), num_widgets + 2)
+        self.assertEqual(self.form.getWidgetRow('bulkSpanning'), num_widgets + 1)
+        self.assertNotIn('bulkSpanning_label', self.form.getWidgets())
+        default_states = self.form.getDefaultWidgetStates()
+        self.assertEqual(default_states['bulk_field']['value'], 'bulk')
+        self.assertEqual(default_states['bulk_label']['value'], 'Bulk: ')
+        self.assertEqual(default_states['bulkSpanning_field']['widget_row'], num_widgets + 1)
+
     def test_getWidgetState_returns_visibility(self):
         """
         Check that the visibility of the widget is saved to the state
@@ -469,6 +490,64 @@ class FormsCommonTests(metaclass=abc.ABCMeta):
         self.assertEqual(self.simple_form.getWidgetState('checkBox'),
                          self.state_simple_form['checkBox_field'])
 
+    def test_getChangedWidgetStates(self):
+        """Check that only the widgets changed since the states were saved are returned"""
+        form = self.simple_form
+        self.assertEqual(form.getChangedWidgetStates(), {})
+        form.getWidget('checkBox').setChecked(True)
+        self.assertEqual(list(form.getChangedWidgetStates()), ['checkBox_field'])
+
+        form.saveAllWidgetStates()
+        self.assertEqual(form.getChangedWidgetStates(), {})
+        form.getWidget('checkBox').setChecked(False)
+        form.getWidget('label', 'label').setText('Changed: ')
+        form.getWidget('label').setEnabled(False)
+        changed = form.getChangedWidgetStates()
+        self.assertEqual(sorted(changed), ['checkBox_field', 'label_field', 'label_label'])
+        self.assertIs(changed['checkBox_field']['value'], False)
+        self.assertIs(changed['label_field']['enabled'], False)
+
+        form.saveAllWidgetStates()
+        self.assertEqual(form.getSavedWidgetStates(), form.getAllWidgetStates())
+        form.getWidget('checkBox').setChecked(True)
+        form.restoreAllSavedWidgetStates()
+        self.assertIs(form.getWidget('checkBox').isChecked(), False)
+        self.assertEqual(form.getChangedWidgetStates(), {})
+        self.assertEqual(form.getSavedWidgetStates(), form.getAllWidgetStates())
+
+    def test_saveAllWidgetStates_after_showing_form(self):
+        """Check that saving only the changed states matches saving all of them"""
+        form = self.simple_form
+        form.saveAllWidgetStates()
+        self.assertIs(form.getSavedWidgetStates()['checkBox_field']['visible'], False)
+        form.show()
+        self.addCleanup(form.hide)
+        form.saveAllWidgetStates()
+        self.assertIs(form.getSavedWidgetStates()['checkBox_field']['visible'], True)
+        self.assertEqual(form.getSavedWidgetStates(), form.getAllWidgetStates())
+        form.hide()
+        form.saveAllWidgetStates()
+        self.assertEqual(form.getSavedWidgetStates(), form.getAllWidgetStates())
+
+    def test_getNonDefaultSavedWidgetStates(self):
+        form = self.simple_form
+        form.saveAllWidgetStates()
+        self.assertEqual(form.getNonDefaultSavedWidgetStates(), {})
+        form.getWidget('checkBox').setChecked(True)
+        form.saveAllWidgetStates()
+        self.assertEqual(list(form.getNonDefaultSavedWidgetStates()), ['checkBox_field'])
+        form.getWidget('checkBox').setChecked(False)
+        form.saveAllWidgetStates()
+        self.assertEqual(form.getNonDefaultSavedWidgetStates(), {})
+
+    def test_applyWidgetStateChanges(self):
+        self.simple_form.applyWidgetStateChanges({
+            'checkBox_field': self.state_simple_form['checkBox_field']})
+        self.assertEqual(self.simple_form.getWidgetState('checkBox_field'),
+                         self.state_simple_form['checkBox_field'])
+        with self.assertRaises(KeyError):
+            self.simple_form.applyWidgetStateChanges({'unknown_field': {'value': 1}})
+
     def test_getAllWidgetStates(self):
         """Check that the state of all widgets is returned"""
         self.assertEqual(self.simple_form.getAllWidgetStates(), self.state_simple_form)
@@ -502,6 +581,108 @@ class FormWidgetStateTest(FormsCommonTests, unittest.TestCase):
                 self.assertEqual(name_c, name)
                 self.assertEqual(role_c, role)
 
+    def test_widget_rows_after_insert_and_remove(self):
+        """Check that the cached rows and widget names follow inserted and removed rows"""
+        self.form.insertWidget(2, 'inserted', QtWidgets.QLineEdit(), 'Inserted: ')
+        self.form.removeWidget('comboBox')
+        self.form.insertWidget(0, 'spanning', QtWidgets.QLabel('spanning'))
+        for key, widget in self.form.getWidgets().items():
+            name, role = self.form._getNameAndRoleFromWidget(widget)
+            self.assertEqual(f'{name}_{role}', key)
+            self.assertEqual(self.form.getWidgetRow(name, role),
+                             self.layout.getWidgetPosition(widget)[0])
+        self.assertEqual(self.form.getWidgetRow('inserted'), 3)
+
+    def test_register_widget_state(self):
+        """Check that registered widget types and subclasses of known types have a value"""
+        date = QDate(2024, 1, 2)
+        self.form.addWidget(QtWidgets.QDateEdit(date), 'Date: ', 'date')
+        self.assertNotIn('value', self.form.getWidgetState('date'))
+
+        register_widget_state(QtWidgets.QDateEdit, 'date', 'setDate')
+        self.addCleanup(unregister_widget_state, QtWidgets.QDateEdit)
+        self.assertEqual(self.form.getWidgetState('date')['value'], date)
+        self.form.applyWidgetState('date', {'value': date.addDays(1)})
+        self.assertEqual(self.form.getWidget('date').date(), date.addDays(1))
+
+        class CheckBox(QtWidgets.QCheckBox):
+            pass
+
+        self.form.addWidget(CheckBox(), 'Check: ', 'check')
+        self.form.applyWidgetState('check', {'value': True})
+        self.assertIs(self.form.getWidgetState('check')['value'], True)
+
+    def test_changes_tracked_for_types_registered_later(self):
+        """Check that widgets of types registered after they were added are saved"""
+        date = QDate(2024, 1, 2)
+        self.form.addWidget(QtWidgets.QDateEdit(date), 'Date: ', 'date')
+        self.form.saveAllWidgetStates()
+        self.addCleanup(unregister_widget_state, QtWidgets.QDateEdit)
+        for signal in (None, 'dateChanged'):
+            register_widget_state(QtWidgets.QDateEdit, 'date', 'setDate', signal)
+            self.form.saveAllWidgetStates()
+            self.assertEqual(self.form.getSavedWidgetStates()['date_field']['value'], date)
+            date = date.addDays(1)
+            self.form.getWidget('date').setDate(date)
+            self.form.saveAllWidgetStates()
+            self.assertEqual(self.form.getSavedWidgetStates(), self.form.getAllWidgetStates())
+
+    def add_radio_buttons(self, form):
+        form.addWidget(QtWidgets.QRadioButton('a'), 'A: ', 'a')
+        form.addWidget(QtWidgets.QRadioButton('b'), 'B: ', 'b')
+        form.addWidget(QtWidgets.QCheckBox('c'), 'C: ', 'c')
+
+    def test_saveAllWidgetStates_after_restoring_radio_button(self):
+        """Check that a state which cannot be restored is saved as it is"""
+        form = FormWidget()
+        self.add_radio_buttons(form)
+        form.saveAllWidgetStates()
+        form.getWidget('a').setChecked(True)
+        form.restoreAllSavedWidgetStates()
+        # the only checked button of an exclusive group cannot be unchecked
+        self.assertIs(form.getWidget('a').isChecked(), True)
+        self.assertEqual(form.getSavedWidgetStates(), form.getAllWidgetStates())
+        form.saveAllWidgetStates()
+        self.assertEqual(form.getSavedWidgetStates(), form.getAllWidgetStates())
+
+    def test_saveAllWidgetStates_after_restoring_in_hidden_parent(self):
+        """Check that widgets restored as visible in a hidden parent are saved as hidden"""
+        parent = QtWidgets.QWidget()
+        form = FormWidget(parent)
+        self.add_radio_buttons(form)
+        parent.show()
+        self.addCleanup(parent.hide)
+        form.saveAllWidgetStates()
+        self.assertIs(form.getSavedWidgetStates()['c_field']['visible'], True)
+        parent.hide()
+        form.restoreAllSavedWidgetStates()
+        form.saveAllWidgetStates()
+        self.assertIs(form.getSavedWidgetStates()['c_field']['visible'], False)
+        self.assertEqual(form.getSavedWidgetStates(), form.getAllWidgetStates())
+
+    def test_saveAllWidgetStates_matches_getAllWidgetStates(self):
+        """Check that saving only the changed states matches saving all of them"""
+        for seed in range(12):
+            self.save_after_random_actions(random.Random(seed))
+
+    def save_after_random_actions(self, rng):
+        parent = QtWidgets.QWidget()
+        self.addCleanup(parent.hide)
+        form = FormWidget(parent)
+        self.add_radio_buttons(form)
+        label = form.getWidget('b', 'label')
+        actions = [
+            form.saveAllWidgetStates, form.restoreAllSavedWidgetStates, parent.show, parent.hide,
+            lambda: form.getWidget('a').setChecked(True),
+            lambda: form.getWidget('b').setChecked(True), lambda: form.getWidget('c').toggle(),
+            lambda: form.getWidget('c').setEnabled(not form.getWidget('c').isEnabled()),
+            lambda: label.setVisible(not label.isVisibleTo(parent))]
+        for _ in range(40):
+            action = rng.choice(actions)
+            action()
+            if action == form.saveAllWidgetStates:
+                self.assertEqual(form.getSavedWidgetStates(), form.getAllWidgetStates())
+
     def test_getWidgetState_returns_QLabel_value(self):
         """Check that the value of the QLabel is saved to the state"""
         initial_label_value = 'test label'
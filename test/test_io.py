@@ -1,7 +1,15 @@
+import os
 import shutil
+import socket
+import subprocess
+import sys
+import threading
+import zipfile
+from concurrent.futures import CancelledError
 
-from pytest import fixture, mark
+from pytest import fixture, mark, raises
 
+from eqt import io
 from eqt.io import zip_directory
 
 
@@ -23,3 +31,362 @@ def test_zip_directory_compress_False(test_file, compress):
     assert zipname.is_file()
     shutil.unpack_archive(zipname, folder / "extracted")
     assert (folder / "extracted" / test_file.parts[-2] / test_file.parts[-1]).is_file()
+
+
+@mark.parametrize('workers', (1, 3, None))
+def test_zip_directory_workers(tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(io, 'BLOCK_SIZE', 1000)
+    folder = tmp_path / "session"
+    folder.mkdir()
+    contents = {"empty.txt": b"", "small.txt": b"small", "large.bin": os.urandom(2500) * 4}
+    for name, data in contents.items():
+        (folder / name).write_bytes(data)
+    zip_directory(folder, compress=True, workers=workers)
+    with zipfile.ZipFile(folder.with_suffix(".zip")) as zipper:
+        assert zipper.testzip() is None
+        assert {info.filename: zipper.read(info) for info in zipper.infolist()} == contents
+        assert all(info.compress_type == zipfile.ZIP_DEFLATED for info in zipper.infolist())
+
+
+@mark.parametrize('max_pending_bytes', (500, 3000))
+def test_zip_directory_workers_pending_bytes(tmp_path, monkeypatch, max_pending_bytes):
+    monkeypatch.setattr(io, 'BLOCK_SIZE', 1000)
+    monkeypatch.setattr(io, 'MAX_PENDING_BYTES', max_pending_bytes)
+    folder = tmp_path / "session"
+    folder.mkdir()
+    contents = {"a.bin": os.urandom(2500) * 4, "b.bin": os.urandom(1500) * 3}
+    for name, data in contents.items():
+        (folder / name).write_bytes(data)
+    read, written = [], []
+    iter_file_blocks = io._iter_file_blocks
+
+    def record_blocks(filepath):
+        for data, is_last_block in iter_file_blocks(filepath):
+            read.append(len(data))
+            # the blocks read but not yet written never exceed the limit, or one block
+            assert sum(read) - sum(written) <= max(max_pending_bytes, io.BLOCK_SIZE)
+            yield data, is_last_block
+
+    monkeypatch.setattr(io, '_iter_file_blocks', record_blocks)
+    monkeypatch.setattr(io, '_write_member', record_written(io._write_member, written))
+    zip_directory(folder, compress=True, workers=4)
+    assert sum(read) == sum(written) == sum(map(len, contents.values()))
+    assert read_members(folder.with_suffix(".zip")) == contents
+
+
+def record_written(write_member, written):
+    def wrapper(zipper, zinfo, blocks, *args, **kwargs):
+        def recorded():
+            for block in blocks:
+                written.append(len(block[0]))
+                yield block
+                if block[2]:
+                    return
+
+        return write_member(zipper, zinfo, recorded(), *args, **kwargs)
+
+    return wrapper
+
+
+@fixture
+def session_folder(tmp_path):
+    folder = tmp_path / "session"
+    (folder / "data").mkdir(parents=True)
+    (folder / "data" / "volume.bin").write_bytes(os.urandom(5000))
+    (folder / "session.json").write_text('{"value": 1}')
+    return folder
+
+
+def read_members(zipname):
+    with zipfile.ZipFile(zipname) as zipper:
+        assert zipper.testzip() is None
+        return {
+            info.filename: zipper.read(info)
+            for info in zipper.infolist() if info.filename != io.MANIFEST_NAME}
+
+
+@mark.parametrize('workers', (1, 2))
+def test_zip_directory_base_archive(session_folder, monkeypatch, workers):
+    zipname = session_folder.with_suffix(".zip")
+    zip_directory(session_folder, workers=workers, manifest=True)
+    (session_folder / "session.json").write_text('{"value": 20}')
+    (session_folder / "new.txt").write_text('new')
+
+    read = []
+    iter_file_blocks = io._iter_file_blocks
+    monkeypatch.setattr(io, '_iter_file_blocks',
+                        lambda filepath: read.append(filepath) or iter_file_blocks(filepath))
+    zip_directory(session_folder, workers=workers, base_archive=zipname)
+
+    assert sorted(read) == [str(session_folder / "new.txt"), str(session_folder / "session.json")]
+    assert read_members(zipname) == {
+        "data/volume.bin": (session_folder / "data" / "volume.bin").read_bytes(),
+        "session.json": b'{"value": 20}', "new.txt": b"new"}
+    # the temporary archive has been renamed into place
+    assert sorted(p.name for p in session_folder.parent.iterdir()) == ["session", "session.zip"]
+
+
+def test_zip_directory_base_archive_compresslevel(session_folder, monkeypatch):
+    zipname = session_folder.with_suffix(".zip")
+    zip_directory(session_folder, manifest=True, compresslevel=1)
+
+    read = []
+    iter_file_blocks = io._iter_file_blocks
+    monkeypatch.setattr(io, '_iter_file_blocks',
+                        lambda filepath: read.append(filepath) or iter_file_blocks(filepath))
+    # the members are compressed again at the new level
+    zip_directory(session_folder, manifest=True, compresslevel=9)
+    assert len(read) == 2
+    zip_directory(session_folder, manifest=True, compresslevel=9)
+    assert len(read) == 2
+    # the level has no effect on stored members
+    zip_directory(session_folder, compress=False, manifest=True, compresslevel=9)
+    zip_directory(session_folder, compress=False, manifest=True, compresslevel=1)
+    assert len(read) == 4
+    assert read_members(zipname)["session.json"] == b'{"value": 1}'
+
+
+@mark.parametrize('workers', (1, 2))
+def test_zip_directory_lzma_flag_bits(session_folder, workers):
+    # the flags of LZMA members match those written by `zipfile`
+    zipname = session_folder.with_suffix(".zip")
+    with zipfile.ZipFile(session_folder.parent / "expected.zip", 'w', zipfile.ZIP_LZMA) as zipper:
+        zipper.write(session_folder / "session.json", "session.json")
+    with zipfile.ZipFile(session_folder.parent / "expected.zip") as zipper:
+        expected = zipper.getinfo("session.json").flag_bits
+    assert expected & 0x02
+
+    zip_directory(session_folder, compress=zipfile.ZIP_LZMA, workers=workers, manifest=True)
+    (session_folder / "new.txt").write_text('new')
+    # unchanged members are copied with their flags
+    zip_directory(session_folder, compress=zipfile.ZIP_LZMA, workers=workers, manifest=True)
+    with zipfile.ZipFile(zipname) as zipper:
+        assert zipper.getinfo("session.json").flag_bits == expected
+        assert zipper.getinfo("new.txt").flag_bits == expected
+    assert read_members(zipname)["new.txt"] == b"new"
+
+
+def test_unzip_directory_restores_mtimes(session_folder, monkeypatch):
+    zipname = session_folder.with_suffix(".zip")
+    zip_directory(session_folder, manifest=True)
+    shutil.rmtree(session_folder)
+    io.unzip_directory(zipname, session_folder)
+    assert not (session_folder / io.MANIFEST_NAME).exists()
+
+    # unchanged files are neither read nor hashed after extraction
+    monkeypatch.setattr(io, '_iter_file_blocks', None)
+    zip_directory(session_folder, base_archive=zipname)
+    assert read_members(zipname) == {
+        "data/volume.bin": (session_folder / "data" / "volume.bin").read_bytes(),
+        "session.json": b'{"value": 1}'}
+
+
+def test_zip_directory_twice_replaces_archive(session_folder):
+    zipname = session_folder.with_suffix(".zip")
+    zip_directory(session_folder)
+    size = zipname.stat().st_size
+    zip_directory(session_folder)
+    with zipfile.ZipFile(zipname) as zipper:
+        assert sorted(zipper.namelist()) == ["data/volume.bin", "session.json"]
+    assert zipname.stat().st_size == size
+
+
+def test_zip_directory_interrupted_keeps_archive(session_folder, monkeypatch):
+    zipname = session_folder.with_suffix(".zip")
+    zip_directory(session_folder)
+    (session_folder / "session.json").write_text('{"value": 20}')
+
+    def interrupt(*args):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(io, '_write_member', interrupt)
+    with raises(KeyboardInterrupt):
+        zip_directory(session_folder)
+    assert read_members(zipname)["session.json"] == b'{"value": 1}'
+    assert sorted(p.name for p in session_folder.parent.iterdir()) == ["session", "session.zip"]
+
+
+def test_zip_directory_permissions(session_folder):
+    zipname = session_folder.with_suffix(".zip")
+    umask = os.umask(0o027)
+    try:
+        zip_directory(session_folder)
+    finally:
+        os.umask(umask)
+    assert zipname.stat().st_mode & 0o777 == 0o640
+
+    # the permissions of an existing archive are kept
+    zipname.chmod(0o604)
+    zip_directory(session_folder)
+    assert zipname.stat().st_mode & 0o777 == 0o604
+    (session_folder / "session.json").chmod(0o664)
+    io.write_file_atomically(session_folder / "session.json", b'{"value": 2}')
+    assert (session_folder / "session.json").stat().st_mode & 0o777 == 0o664
+
+
+def test_write_file_atomically_removes_stale_temporary_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(io, 'is_process_running', lambda pid: pid == 2)
+    host = socket.gethostname()
+    names = [
+        f".session.json.{host}.1.abcd{io.ATOMIC_WRITE_SUFFIX}",     # stale
+        f".session.json.{host}.2.abcd{io.ATOMIC_WRITE_SUFFIX}",     # being written
+        f".session.json.other-host.1.abcd{io.ATOMIC_WRITE_SUFFIX}", # unknown
+        f".other.json.{host}.1.abcd{io.ATOMIC_WRITE_SUFFIX}"]       # another file
+    for name in names:
+        (tmp_path / name).write_bytes(b"")
+    io.write_file_atomically(tmp_path / "session.json", b'{"value": 1}')
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(names[1:] + ["session.json"])
+
+
+@mark.parametrize('workers', (1, 2))
+@mark.parametrize('compress,compresslevel', [(True, 1), (zipfile.ZIP_DEFLATED, 9),
+                                             (zipfile.ZIP_BZIP2, None), (zipfile.ZIP_LZMA, None)])
+def test_zip_directory_compression(session_folder, workers, compress, compresslevel):
+    (session_folder / "data" / "image.png").write_bytes(b"png")
+    zip_directory(session_folder, compress=compress, workers=workers, compresslevel=compresslevel)
+    zipname = session_folder.with_suffix(".zip")
+    with zipfile.ZipFile(zipname) as zipper:
+        compress_types = {info.filename: info.compress_type for info in zipper.infolist()}
+    expected = zipfile.ZIP_DEFLATED if compress is True else compress
+    assert compress_types == {
+        "data/volume.bin": expected, "session.json": expected,
+        "data/image.png": zipfile.ZIP_STORED}
+    assert read_members(zipname)["data/image.png"] == b"png"
+
+
+def test_zip_directory_unsupported_compression(session_folder):
+    with raises(NotImplementedError):
+        zip_directory(session_folder, compress=99)
+    assert not session_folder.with_suffix(".zip").exists()
+
+
+class Recorder:
+    """Records the values emitted, like a Qt signal would deliver them."""
+    def __init__(self):
+        self.values = []
+
+    def emit(self, value):
+        self.values.append(value)
+
+
+@mark.parametrize('workers', (1, 2))
+def test_zip_directory_progress(session_folder, monkeypatch, workers):
+    monkeypatch.setattr(io, 'BLOCK_SIZE', 1000)
+    progress = Recorder()
+    zip_directory(session_folder, workers=workers, progress_callback=progress)
+    assert progress.values == sorted(set(progress.values))
+    assert len(progress.values) > 2
+    assert progress.values[-1] == 100
+
+
+def test_zip_directory_cancel(session_folder, monkeypatch):
+    monkeypatch.setattr(io, 'BLOCK_SIZE', 1000)
+    zipname = session_folder.with_suffix(".zip")
+    zip_directory(session_folder)
+    cancel_event = threading.Event()
+
+    class CancelAt50(Recorder):
+        def emit(self, value):
+            super().emit(value)
+            if value >= 50:
+                cancel_event.set()
+
+    progress = CancelAt50()
+    (session_folder / "session.json").write_text('{"value": 20}')
+    with raises(CancelledError):
+        zip_directory(session_folder, progress_callback=progress, cancel_event=cancel_event)
+    assert progress.values[-1] < 100
+    assert read_members(zipname)["session.json"] == b'{"value": 1}'
+    assert sorted(p.name for p in session_folder.parent.iterdir()) == ["session", "session.zip"]
+
+
+def test_index_sessions(tmp_path):
+    (tmp_path / "session_1_01-01-2020-00-00").mkdir()
+    (tmp_path / "session_1_01-01-2020-00-00" / "nested_01-01-2020-00-00.zip").write_bytes(b"")
+    (tmp_path / "session_1_01-01-2020-00-00.zip").write_bytes(b"1")
+    (tmp_path / "other.zip").write_bytes(b"22")
+    (tmp_path / ".session_1_01-01-2020-00-00.zip-abc.tmp").write_bytes(b"")
+
+    sessions = io.index_sessions(tmp_path)
+    assert {
+        archive: (session['name'], session['timestamp'], session['size'])
+        for archive, session in sessions.items()} == {
+            "session_1_01-01-2020-00-00.zip": ("session_1", "01-01-2020-00-00", 1),
+            "other.zip": (None, None, 2)}
+    assert (tmp_path / io.SESSION_INDEX_NAME).is_file()
+
+    # the index is updated with new archives
+    (tmp_path / "session_2_02-01-2020-00-00.zip").write_bytes(b"333")
+    sessions = io.index_sessions(tmp_path)
+    assert sessions["session_2_02-01-2020-00-00.zip"]["size"] == 3
+    assert len(sessions) == 3
+
+
+def test_map_member(session_folder):
+    volume = (session_folder / "data" / "volume.bin").read_bytes()
+    (session_folder / "empty.txt").write_bytes(b"")
+    zip_directory(session_folder, compress=False)
+    zipname = session_folder.with_suffix(".zip")
+    view = io.map_member(zipname, "data/volume.bin")
+    assert view.readonly
+    assert view == volume
+    assert io.map_member(zipname, "empty.txt") == b""
+
+    del view
+    zipname.unlink()
+    zip_directory(session_folder, compress=True)
+    with raises(ValueError):
+        io.map_member(zipname, "session.json")
+    with raises(KeyError):
+        io.map_member(zipname, "missing.txt")
+
+
+@mark.parametrize('same_filesystem', (True, False))
+def test_move_directory(session_folder, monkeypatch, same_filesystem):
+    monkeypatch.setattr(io, 'BLOCK_SIZE', 1000)
+    monkeypatch.setattr(io, 'is_same_filesystem', lambda *_: same_filesystem)
+    (session_folder / "empty").mkdir()
+    os.utime(session_folder / "session.json", ns=(1_000_000_000, 1_000_000_000))
+    contents = {
+        name: (session_folder / name).read_bytes()
+        for name in ("session.json", "data/volume.bin")}
+    progress = Recorder()
+
+    destination = io.move_directory(session_folder, session_folder.parent / "moved", workers=2,
+                                    progress_callback=progress)
+    moved = session_folder.parent / "moved"
+    assert os.fspath(destination) == str(moved)
+    assert not session_folder.exists()
+    assert {name: (moved / name).read_bytes() for name in contents} == contents
+    assert (moved / "empty").is_dir()
+    assert (moved / "session.json").stat().st_mtime_ns == 1_000_000_000
+    if not same_filesystem:
+        assert progress.values[-1] == 100
+
+
+def test_move_directory_cancel(session_folder, monkeypatch):
+    monkeypatch.setattr(io, 'is_same_filesystem', lambda *_: False)
+    cancel_event = threading.Event()
+    cancel_event.set()
+    with raises(CancelledError):
+        io.move_directory(session_folder, session_folder.parent / "moved",
+                          cancel_event=cancel_event)
+    assert sorted(p.name for p in session_folder.parent.iterdir()) == ["session"]
+    assert (session_folder / "data" / "volume.bin").is_file()
+
+
+def test_is_process_running():
+    assert io.is_process_running(os.getpid())
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    assert not io.is_process_running(process.pid)
+
+
+def test_is_in_directory(tmp_path):
+    (tmp_path / "sessions" / "session").mkdir(parents=True)
+    (tmp_path / "link").symlink_to(tmp_path / "sessions")
+    assert io.is_in_directory(tmp_path / "sessions" / "session", tmp_path / "sessions")
+    assert io.is_in_directory(tmp_path / "link" / "session", tmp_path / "sessions")
+    assert not io.is_in_directory(tmp_path / "sessions", tmp_path / "sessions")
+    assert not io.is_in_directory(tmp_path / "sessions" / "..", tmp_path / "sessions")
+    assert not io.is_in_directory(tmp_path / "sessions-other", tmp_path / "sessions")